@@ -0,0 +1,188 @@
+"""
+Learned aliases from order-text segments to menu items.
+
+Customers write the same few item strings again and again. Every segment the
+MenuMatcher resolves is remembered by its space-stripped text, so later uploads
+(and freshly started worker processes) resolve it with one dict lookup. The
+table lives in the server process; workers get a snapshot and report back what
+they learned. It is saved as JSON off the event loop, only when an upload
+taught it something new; hit counts alone wait for the next save or shutdown. It is tied to one menu version and starts
+over when menu.csv changes.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.lazy import lazy_import
+from app.menu import Menu
+
+analyzer = lazy_import("app.analyzer")
+
+_ALIAS_PATH = Path(__file__).resolve().parent.parent / "data" / "menu_aliases.json"
+
+
+def normalize_segment(segment: str) -> str:
+    """Alias key for a segment; the matcher treats spaced and unspaced text alike."""
+    return segment.replace(" ", "")
+
+
+@dataclass
+class AliasStats:
+    """What one parse learned: lookups answered by the table, new aliases and unmatched segments."""
+
+    hits: int = 0
+    misses: int = 0
+    learned: Dict[str, int] = field(default_factory=dict)  # segment -> menu id
+    unmatched: Dict[str, int] = field(default_factory=dict)  # segment -> times seen
+
+
+class AliasMatcher:
+    """MenuMatcher with an alias table in front.
+
+    Drop-in for MenuMatcher.match: returns positions in menu.food_items. aliases
+    maps normalized segments to menu ids, as in AliasTable.snapshot().
+    """
+
+    def __init__(self, menu: Menu, aliases: Dict[str, int]):
+        self.matcher = analyzer.build_menu_matcher(menu.food_items)
+        self._menu_ids = [item["id"] for item in menu.items]
+        position = {menu_id: i for i, menu_id in enumerate(self._menu_ids)}
+        self._aliases = {seg: position[menu_id] for seg, menu_id in aliases.items() if menu_id in position}
+        self.stats = AliasStats()
+
+    def match(self, item_name: str) -> Optional[int]:
+        key = normalize_segment(item_name)
+        idx = self._aliases.get(key)
+        if idx is not None:
+            self.stats.hits += 1
+            return idx
+
+        self.stats.misses += 1
+        idx = self.matcher.match(item_name)
+        if idx is None:
+            self.stats.unmatched[key] = self.stats.unmatched.get(key, 0) + 1
+        else:
+            self._aliases[key] = idx
+            self.stats.learned[key] = self._menu_ids[idx]
+        return idx
+
+
+class AliasTable:
+    """Persistent segment -> menu id table for the current menu version."""
+
+    MAX_ALIASES = 10_000
+    MAX_UNMATCHED = 1_000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Held across a whole save, so saves land on disk in the order they were taken
+        self._save_lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._reset(None)
+
+    def _reset(self, version: Optional[str]) -> None:
+        self.menu_version = version
+        self.aliases: Dict[str, int] = {}
+        self.unmatched: Counter = Counter()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.menu_version = data.get("menu_version")
+        self.aliases = dict(data.get("aliases", {}))
+        self.unmatched = Counter(data.get("unmatched", {}))
+        self.hits = data.get("hits", 0)
+        self.misses = data.get("misses", 0)
+
+    def flush(self) -> None:
+        """Save the table if anything changed since the last save. Blocks on file I/O."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = {
+                    "menu_version": self.menu_version,
+                    "aliases": self.aliases,
+                    "unmatched": dict(self.unmatched),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                }
+                text = json.dumps(data, ensure_ascii=False, indent=2)
+                path = self.path
+                self._dirty = False
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(text)
+            os.replace(tmp, path)
+
+    def _for_menu(self, menu: Menu) -> None:
+        # Caller holds the lock
+        if not self._loaded:
+            self._load()
+            self._loaded = True
+        if self.menu_version != menu.version:
+            self._reset(menu.version)
+
+    def snapshot(self, menu: Menu) -> Dict[str, int]:
+        """Aliases valid for menu, to hand to an AliasMatcher."""
+        with self._lock:
+            self._for_menu(menu)
+            return dict(self.aliases)
+
+    def record(self, menu: Menu, stats: AliasStats) -> bool:
+        """Merge what a parse against menu learned. Returns whether it taught the
+        table something (a new alias or unmatched segment, or a new menu), so that
+        it is worth a flush(); counts alone are saved with the next one.
+        """
+        with self._lock:
+            version = self.menu_version
+            self._for_menu(menu)
+            size = len(self.aliases)
+            new_unmatched = any(seg not in self.unmatched for seg in stats.unmatched)
+            self.hits += stats.hits
+            self.misses += stats.misses
+            for seg, menu_id in stats.learned.items():
+                if len(self.aliases) >= self.MAX_ALIASES:
+                    break
+                self.aliases.setdefault(seg, menu_id)
+            self.unmatched.update(stats.unmatched)
+            if len(self.unmatched) > self.MAX_UNMATCHED:
+                self.unmatched = Counter(dict(self.unmatched.most_common(self.MAX_UNMATCHED)))
+            changed = version != self.menu_version or len(self.aliases) > size or new_unmatched
+            self._dirty = self._dirty or changed or bool(stats.hits or stats.misses or stats.unmatched)
+            return changed
+
+    def report(self, menu: Menu) -> dict:
+        """Hit counts, learned aliases and never-matched segments (most frequent first)."""
+        with self._lock:
+            self._for_menu(menu)
+            lookups = self.hits + self.misses
+            return {
+                "menu_version": self.menu_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "aliases": dict(self.aliases),
+                "unmatched": self.unmatched.most_common(),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(None)
+            self._loaded = True
+            self._dirty = False
+            self.path.unlink(missing_ok=True)
+
+
+alias_table = AliasTable(_ALIAS_PATH)
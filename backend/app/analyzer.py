@@ -1,47 +1,317 @@
+import logging
+import math
 import re
-from pathlib import Path
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+
+from app.config import get_excel_reader_name
+from app.menu import get_menu
+from app.timing import stage
+from app.zip_index import cities_for_zips
+
+logger = logging.getLogger("uvicorn.error")
 
 
 def load_food_items(path: str | None = None) -> List[str]:
     """Load food items from CSV. Raises on failure."""
-    if path is None:
-        path = str(Path(__file__).resolve().parent.parent / "data" / "menu.csv")
-    food_df = pd.read_csv(path)
-    return food_df["item_zh"].tolist()
+    return list(get_menu(path).food_items)
 
 
 def load_food_label_map(path: str | None = None) -> Dict[str, str]:
     """Load mapping from full item_zh names to short item_short_zh names."""
-    if path is None:
-        path = str(Path(__file__).resolve().parent.parent / "data" / "menu.csv")
-    food_df = pd.read_csv(path)
-    return dict(zip(food_df["item_zh"], food_df["item_short_zh"]))
+    return dict(get_menu(path).label_map)
+
+
+_PORTION_SUFFIX = re.compile(r"\d+个?[/／]?份?$")
+
+
+def _substrings(text: str):
+    """Yield every contiguous substring of text, including the empty string."""
+    yield ""
+    for start in range(len(text)):
+        for end in range(start + 1, len(text) + 1):
+            yield text[start:end]
+
+
+class MenuMatcher:
+    """Resolve order-text item names to menu items.
+
+    A segment matches a food item when the segment and the item's base name
+    (portion suffix such as "15个/份" stripped) contain one another, compared
+    both as-is and with spaces removed. When several items match, the first
+    one in menu order wins.
+
+    Base names and all of their substrings are indexed once, so resolving a
+    segment costs a handful of dict probes bounded by the segment length
+    rather than a scan over the whole menu. Results are memoized per segment.
+    """
+
+    _MEMO_LIMIT = 10_000
+
+    def __init__(self, food_items: Sequence[str]):
+        self.food_items: List[str] = list(food_items)
+        self._bases: Dict[str, int] = {}
+        self._bases_norm: Dict[str, int] = {}
+        self._within: Dict[str, int] = {}
+        self._within_norm: Dict[str, int] = {}
+        for i, food_item in enumerate(self.food_items):
+            base_name = _PORTION_SUFFIX.sub("", food_item).strip()
+            base_name_norm = base_name.replace(" ", "")
+            self._bases.setdefault(base_name, i)
+            self._bases_norm.setdefault(base_name_norm, i)
+            for sub in _substrings(base_name):
+                self._within.setdefault(sub, i)
+            for sub in _substrings(base_name_norm):
+                self._within_norm.setdefault(sub, i)
+        self._lengths = sorted({len(b) for b in self._bases})
+        self._lengths_norm = sorted({len(b) for b in self._bases_norm})
+        self._memo: Dict[str, Optional[int]] = {}
+
+    def match(self, item_name: str) -> Optional[int]:
+        """Return the index into food_items of the first matching item, or None."""
+        try:
+            return self._memo[item_name]
+        except KeyError:
+            pass
+        if len(self._memo) >= self._MEMO_LIMIT:
+            self._memo.clear()
+        result = self._resolve(item_name)
+        self._memo[item_name] = result
+        return result
+
+    def _resolve(self, item_name: str) -> Optional[int]:
+        item_name_norm = item_name.replace(" ", "")
+        no_match = len(self.food_items)
+
+        # Segment contained in a base name
+        best = min(self._within.get(item_name, no_match), self._within_norm.get(item_name_norm, no_match))
+
+        # Base name contained in the segment
+        for text, bases, lengths in (
+            (item_name, self._bases, self._lengths),
+            (item_name_norm, self._bases_norm, self._lengths_norm),
+        ):
+            for length in lengths:
+                if length > len(text):
+                    break
+                for start in range(len(text) - length + 1):
+                    idx = bases.get(text[start : start + length])
+                    if idx is not None and idx < best:
+                        best = idx
+
+        return best if best < no_match else None
+
+
+@lru_cache(maxsize=8)
+def _cached_matcher(food_items: Tuple[str, ...]) -> MenuMatcher:
+    return MenuMatcher(food_items)
+
+
+def build_menu_matcher(food_items: Sequence[str]) -> MenuMatcher:
+    """Return a MenuMatcher for food_items, reusing one already built for the same menu."""
+    return _cached_matcher(tuple(food_items))
+
+
+class ExcelReader:
+    """Stream the cell values of an export's first sheet, one tuple per row."""
+
+    name = ""
+
+    def iter_rows(self, excel_file) -> Iterator[tuple]:
+        raise NotImplementedError
+
+
+class OpenpyxlReader(ExcelReader):
+    """Pure-Python fallback using openpyxl's read-only (streaming) mode."""
+
+    name = "openpyxl"
+
+    def iter_rows(self, excel_file) -> Iterator[tuple]:
+        wb = load_workbook(excel_file, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[0]
+            ws.reset_dimensions()
+            yield from ws.iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+
+class CalamineReader(ExcelReader):
+    """Rust-backed reader from the optional python-calamine package."""
+
+    name = "calamine"
+
+    def iter_rows(self, excel_file) -> Iterator[tuple]:
+        from python_calamine import CalamineWorkbook
+
+        wb = CalamineWorkbook.from_filelike(excel_file)
+        sheet = wb.get_sheet_by_index(0)
+        # Rows start at row 1, but leading empty columns are dropped; put them back
+        # so cells keep the column positions openpyxl gives them
+        pad = [None] * sheet.start[1]
+        for row in sheet.iter_rows():
+            yield pad + row if pad else row
+
+
+def _calamine_available() -> bool:
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_excel_reader(name: str | None = None) -> ExcelReader:
+    """Return the reader named by name (default: EXCEL_READER env var).
+
+    'auto' prefers calamine when it is installed; asking for calamine without
+    it installed falls back to openpyxl. Raises ValueError for unknown names.
+    """
+    if name is None:
+        name = get_excel_reader_name()
+    if name not in ("auto", "calamine", "openpyxl"):
+        raise ValueError(f"Unknown Excel reader '{name}'. Use 'auto', 'calamine' or 'openpyxl'.")
+    if name in ("auto", "calamine"):
+        if _calamine_available():
+            return CalamineReader()
+        if name == "calamine":
+            logger.warning("python-calamine is not installed, falling back to openpyxl")
+    return OpenpyxlReader()
+
+
+# pandas' default na_values: data cells holding exactly one of these read as missing
+_NA_STRINGS = frozenset(
+    {
+        "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+        "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+    }
+)  # fmt: skip
+_BLANK = frozenset([""])
+
+
+def _convert_cell(value, na_strings: frozenset = _NA_STRINGS):
+    """Normalize a cell the way pandas' Excel reader does: blanks and na_strings
+    become NaN, whole floats become int.
+    """
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        return math.nan if value in na_strings else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _header_names(header: Iterable) -> List:
+    """Name columns like pandas: 'Unnamed: N' for blanks and '.1' suffixes for repeats."""
+    columns: List = []
+    seen: Dict[str, int] = {}
+    for i, name in enumerate(header):
+        if pd.isna(name):
+            name = f"Unnamed: {i}"
+        key = str(name)
+        if key in seen:
+            seen[key] += 1
+            name = f"{key}.{seen[key]}"
+        else:
+            seen[key] = 0
+        columns.append(name)
+    return columns
+
+
+def load_sheet(excel_file, reader: ExcelReader | None = None) -> pd.DataFrame:
+    """Read the first sheet of an export once, from the header row (row 4) down.
+
+    Rows are streamed from the configured ExcelReader and normalized straight
+    into a frame, without going through pandas' Excel parser. Columns are
+    named from the header row the same way pandas would and dtypes are
+    inferred from the data rows. The result feeds format detection, the
+    summary table and the order table without re-parsing the workbook.
+    """
+    if reader is None:
+        reader = get_excel_reader()
+
+    rows: List[list] = []
+    width = 0
+    last_filled = -1
+    for i, row in enumerate(reader.iter_rows(excel_file)):
+        if i < 3:
+            continue
+        # Like pandas, the header row keeps "NA" and friends as column names
+        na_strings = _BLANK if i == 3 else _NA_STRINGS
+        cells = [_convert_cell(v, na_strings) for v in row]
+        while cells and isinstance(cells[-1], float) and math.isnan(cells[-1]):
+            cells.pop()
+        if cells:
+            width = max(width, len(cells))
+            last_filled = len(rows)
+        rows.append(cells)
+
+    # Drop trailing blank rows, as pandas does
+    rows = rows[: last_filled + 1]
+    if not rows:
+        return pd.DataFrame()
+
+    columns = _header_names(rows[0] + [math.nan] * (width - len(rows[0])))
+    sheet = pd.DataFrame.from_records(
+        [r + [math.nan] * (width - len(r)) for r in rows[1:]],
+        columns=range(width),
+    )
+    sheet = sheet.infer_objects()
+    sheet.columns = columns
+    return sheet
+
+
+def _as_sheet(excel_file) -> pd.DataFrame:
+    """Accept either a file-like Excel export or a sheet already returned by load_sheet."""
+    if isinstance(excel_file, pd.DataFrame):
+        return excel_file
+    sheet = load_sheet(excel_file)
+    if hasattr(excel_file, "seek"):
+        excel_file.seek(0)
+    return sheet
 
 
 def detect_format(excel_file) -> str:
     """Detect whether the Excel file is raw WeChat export or human-formatted.
+    Accepts a file-like object or a sheet from load_sheet.
     Returns 'raw' or 'formatted'.
     """
-    df_header = pd.read_excel(excel_file, skiprows=3, nrows=0)
-    excel_file.seek(0)
-    return "raw" if "标签" in df_header.columns else "formatted"
+    sheet = _as_sheet(excel_file)
+    return "raw" if "标签" in sheet.columns else "formatted"
 
 
 def read_summary_table(excel_file, fmt: str = "raw") -> Dict[str, int]:
     """Read the 商品汇总 summary table from a WeChat export Excel file.
+    Accepts a file-like object or a sheet from load_sheet.
     Returns {item_name: total_quantity}.
     """
+    sheet = _as_sheet(excel_file)
     if fmt == "raw":
-        return _read_summary_raw(excel_file)
-    return _read_summary_formatted(excel_file)
+        return _read_summary_raw(sheet)
+    return _read_summary_formatted(sheet)
 
 
-def _read_summary_raw(excel_file) -> Dict[str, int]:
+def _summary_pairs(items: pd.Series, quantities: pd.Series) -> Dict[str, int]:
+    """Build {item_name: quantity}, skipping quantities that aren't integers."""
+    result = {}
+    for item, qty in zip(items, quantities):
+        try:
+            result[str(item).strip()] = int(qty)
+        except (ValueError, TypeError):
+            continue
+    return result
+
+
+def _read_summary_raw(df_raw: pd.DataFrame) -> Dict[str, int]:
     """Read summary table from raw WeChat export format."""
-    df_raw = pd.read_excel(excel_file, skiprows=3, header=0)
+    if "序号" not in df_raw.columns:
+        return {}
 
     # Locate the summary table header row (序号 == '商品')
     header_mask = df_raw["序号"].astype(str).str.strip() == "商品"
@@ -49,7 +319,7 @@ def _read_summary_raw(excel_file) -> Dict[str, int]:
         return {}
 
     header_idx = int(header_mask.idxmax())
-    summary_df = df_raw.iloc[header_idx + 1 :].copy()
+    summary_df = df_raw.iloc[header_idx + 1 :]
 
     # Stop at the 总计 row
     total_mask = summary_df["序号"].astype(str).str.strip() == "总计"
@@ -58,70 +328,65 @@ def _read_summary_raw(excel_file) -> Dict[str, int]:
         summary_df = summary_df.loc[: total_idx - 1]
 
     summary_df = summary_df.dropna(subset=["序号", "内容"])
-
-    result = {}
-    for _, row in summary_df.iterrows():
-        item_name = str(row["序号"]).strip()
-        try:
-            result[item_name] = int(row["内容"])
-        except (ValueError, TypeError):
-            continue
-    return result
+    return _summary_pairs(summary_df["序号"], summary_df["内容"])
 
 
-def _read_summary_formatted(excel_file) -> Dict[str, int]:
+def _read_summary_formatted(df_raw: pd.DataFrame) -> Dict[str, int]:
     """Read summary table from human-formatted export."""
-    df_raw = pd.read_excel(excel_file, skiprows=3, header=0)
+    if df_raw.empty:
+        return {}
 
-    # Find the row containing '商品汇总' in any cell
-    summary_start = None
-    for col in df_raw.columns:
-        mask = df_raw[col].astype(str).str.strip() == "商品汇总"
-        if mask.any():
-            summary_start = int(mask.idxmax())
-            break
+    labels = df_raw.apply(lambda col: col.astype(str).str.strip())
 
-    if summary_start is None:
+    # Find the row containing '商品汇总' in any cell (first matching column wins)
+    hits = (labels == "商品汇总").to_numpy()
+    hit_cols = hits.any(axis=0)
+    if not hit_cols.any():
+        return {}
+    summary_start = int(hits[:, hit_cols.argmax()].argmax())
+    if summary_start + 1 >= len(df_raw):
         return {}
 
     # Next row has sub-headers: find first '商品' and '数量' columns
     # (extra columns like 周五送货/周六送货 may repeat '数量' — take the first)
-    header_row = df_raw.iloc[summary_start + 1]
-    item_col = None
-    qty_col = None
-    for c in df_raw.columns:
-        val = str(header_row[c]).strip()
-        if val == "商品" and item_col is None:
-            item_col = c
-        elif val == "数量" and qty_col is None:
-            qty_col = c
-
-    if item_col is None or qty_col is None:
+    header_row = labels.iloc[summary_start + 1].to_numpy()
+    item_hits = (header_row == "商品").nonzero()[0]
+    qty_hits = (header_row == "数量").nonzero()[0]
+    if len(item_hits) == 0 or len(qty_hits) == 0:
         return {}
+    item_col = df_raw.columns[item_hits[0]]
+    qty_col = df_raw.columns[qty_hits[0]]
 
     # Read item/quantity pairs until 总计 or NaN
-    result = {}
-    for i in range(summary_start + 2, len(df_raw)):
-        item = df_raw.iloc[i][item_col]
-        qty = df_raw.iloc[i][qty_col]
-        if pd.isna(item):
-            break
-        item_name = str(item).strip()
-        if item_name == "总计":
-            break
-        try:
-            result[item_name] = int(qty)
-        except (ValueError, TypeError):
-            continue
-    return result
+    items = df_raw[item_col].iloc[summary_start + 2 :]
+    quantities = df_raw[qty_col].iloc[summary_start + 2 :]
+    stop = (items.isna() | (labels[item_col].iloc[summary_start + 2 :] == "总计")).to_numpy()
+    if stop.any():
+        end = int(stop.argmax())
+        items, quantities = items.iloc[:end], quantities.iloc[:end]
+    return _summary_pairs(items, quantities)
+
+
+QUANTITY_COLUMNS = ["order_index", "item_id", "quantity"]
+
+
+def empty_quantities() -> pd.DataFrame:
+    """Return an empty sparse quantity table."""
+    return pd.DataFrame({col: pd.Series(dtype="int64") for col in QUANTITY_COLUMNS})
+
+
+def item_totals(quantities: pd.DataFrame) -> pd.Series:
+    """Sum a sparse quantity table per item_id."""
+    return quantities.groupby("item_id")["quantity"].sum()
 
 
 def validate_against_summary(
-    df: pd.DataFrame,
+    quantities: pd.DataFrame,
     food_items: List[str],
     summary_dict: Dict[str, int],
 ) -> List[Tuple[str, int, int]]:
     """Compare parsed item totals against the summary table.
+    quantities is the sparse (order_index, item_id, quantity) table from process_excel.
     Returns list of (food_item, parsed_total, expected_total) for any mismatches.
     Items not present in the summary table are skipped.
     """
@@ -130,10 +395,11 @@ def validate_against_summary(
         return re.sub(r"\s+", "", name)
 
     normalized_summary = {normalize(k): v for k, v in summary_dict.items()}
+    totals = item_totals(quantities)
 
     discrepancies = []
-    for food_item in food_items:
-        parsed_total = int(df[food_item].sum())
+    for item_id, food_item in enumerate(food_items):
+        parsed_total = int(totals.get(item_id, 0))
         expected = summary_dict.get(food_item) or normalized_summary.get(normalize(food_item))
 
         if expected is None:
@@ -145,138 +411,16 @@ def validate_against_summary(
     return discrepancies
 
 
-BAY_AREA_ZIP_TO_CITY: Dict[str, str] = {
-    # East Bay - Alameda County
-    "94536": "Fremont",
-    "94538": "Fremont",
-    "94539": "Fremont",
-    "94555": "Fremont",
-    "94587": "Union City",
-    "94560": "Newark",
-    "94541": "Hayward",
-    "94542": "Hayward",
-    "94544": "Hayward",
-    "94545": "Hayward",
-    "94546": "Castro Valley",
-    "94552": "Castro Valley",
-    "94577": "San Leandro",
-    "94578": "San Leandro",
-    "94579": "San Leandro",
-    "94568": "Dublin",
-    "94566": "Pleasanton",
-    "94588": "Pleasanton",
-    "94550": "Livermore",
-    "94551": "Livermore",
-    "94601": "Oakland",
-    "94602": "Oakland",
-    "94603": "Oakland",
-    "94605": "Oakland",
-    "94606": "Oakland",
-    "94607": "Oakland",
-    "94609": "Oakland",
-    "94610": "Oakland",
-    "94611": "Oakland",
-    "94612": "Oakland",
-    "94618": "Oakland",
-    "94619": "Oakland",
-    "94621": "Oakland",
-    "94702": "Berkeley",
-    "94703": "Berkeley",
-    "94704": "Berkeley",
-    "94705": "Berkeley",
-    "94707": "Berkeley",
-    "94708": "Berkeley",
-    "94709": "Berkeley",
-    "94710": "Berkeley",
-    "94501": "Alameda",
-    "94502": "Alameda",
-    "94706": "Albany",
-    "94608": "Emeryville",
-    # South Bay - Santa Clara County
-    "95035": "Milpitas",
-    "95110": "San Jose",
-    "95111": "San Jose",
-    "95112": "San Jose",
-    "95113": "San Jose",
-    "95116": "San Jose",
-    "95117": "San Jose",
-    "95118": "San Jose",
-    "95119": "San Jose",
-    "95120": "San Jose",
-    "95121": "San Jose",
-    "95122": "San Jose",
-    "95123": "San Jose",
-    "95124": "San Jose",
-    "95125": "San Jose",
-    "95126": "San Jose",
-    "95127": "San Jose",
-    "95128": "San Jose",
-    "95129": "San Jose",
-    "95130": "San Jose",
-    "95131": "San Jose",
-    "95132": "San Jose",
-    "95133": "San Jose",
-    "95134": "San Jose",
-    "95135": "San Jose",
-    "95136": "San Jose",
-    "95138": "San Jose",
-    "95139": "San Jose",
-    "95148": "San Jose",
-    "95050": "Santa Clara",
-    "95051": "Santa Clara",
-    "95054": "Santa Clara",
-    "94085": "Sunnyvale",
-    "94086": "Sunnyvale",
-    "94087": "Sunnyvale",
-    "94089": "Sunnyvale",
-    "95014": "Cupertino",
-    "94040": "Mountain View",
-    "94041": "Mountain View",
-    "94043": "Mountain View",
-    "94022": "Los Altos",
-    "94024": "Los Altos",
-    "94301": "Palo Alto",
-    "94302": "Palo Alto",
-    "94303": "Palo Alto",
-    "94304": "Palo Alto",
-    "94306": "Palo Alto",
-    "95008": "Campbell",
-    "95070": "Saratoga",
-    "95030": "Los Gatos",
-    "95032": "Los Gatos",
-    "95033": "Los Gatos",
-    "95020": "Gilroy",
-    "95037": "Morgan Hill",
-    # Peninsula - San Mateo County
-    "94014": "Daly City",
-    "94015": "Daly City",
-    "94005": "Brisbane",
-    "94132": "San Francisco",
-    "94080": "South San Francisco",
-    "94066": "San Bruno",
-    "94030": "Millbrae",
-    "94010": "Burlingame",
-    "94401": "San Mateo",
-    "94402": "San Mateo",
-    "94403": "San Mateo",
-    "94404": "San Mateo",
-    "94002": "Belmont",
-    "94070": "San Carlos",
-    "94061": "Redwood City",
-    "94062": "Redwood City",
-    "94063": "Redwood City",
-    "94065": "Redwood City",
-    "94025": "Menlo Park",
-    "94027": "Atherton",
-    "94028": "Portola Valley",
-    "94044": "Pacifica",
-    "94019": "Half Moon Bay",
-}
-
 _STATE_PATTERN = re.compile(r",?\s*\b(?:CA|California)\b\.?\s*$", re.IGNORECASE)
 _ZIP_PATTERN = re.compile(r",?\s*\b\d{5}(?:-\d{4})?\s*$")
 
 
+@lru_cache(maxsize=512)
+def _city_pattern(city: str) -> re.Pattern:
+    """Compiled, memoized pattern matching a trailing city name (case-insensitive)."""
+    return re.compile(r",?\s*" + re.escape(city) + r"\s*$", re.IGNORECASE)
+
+
 def clean_address(address: str, city: str) -> str:
     """Extract street portion from a full address string.
 
@@ -297,30 +441,90 @@ def clean_address(address: str, city: str) -> str:
     addr = _STATE_PATTERN.sub("", addr).strip()
     # Strip trailing city name (case-insensitive)
     if city:
-        city_pattern = re.compile(r",?\s*" + re.escape(city) + r"\s*$", re.IGNORECASE)
-        addr = city_pattern.sub("", addr).strip()
+        addr = _city_pattern(city).sub("", addr).strip()
 
     return addr
 
 
-def process_excel(excel_file, food_items: List[str]) -> Tuple[pd.DataFrame, List[Tuple[str, int, int]], str]:
-    """
-    Process an uploaded Excel file into a DataFrame with food item quantity columns.
-    Auto-detects raw WeChat export vs human-formatted files.
-    Returns (df, discrepancies, fmt) where discrepancies is a list of
-    (food_item, parsed_total, expected_total) for any summary table mismatches
-    and fmt is 'raw' or 'formatted'.
-    Raises ValueError on bad input structure.
+def clean_addresses(addresses: pd.Series, cities: pd.Series) -> pd.Series:
+    """Column-wise clean_address: same result for each row, computed with vectorized string ops.
+
+    Missing addresses are treated as empty strings. The trailing-city pass runs
+    once per distinct city with that city's precompiled pattern.
     """
-    fmt = detect_format(excel_file)
+    addr = addresses.astype(object).where(addresses.notna(), "").astype(str).str.strip()
+    has_comma = addr.str.contains(",", regex=False).to_numpy()
 
-    summary_dict = read_summary_table(excel_file, fmt)
-    excel_file.seek(0)
+    street = addr.str.split(",", n=1).str[0].str.strip()
+    rest = addr.str.replace(_ZIP_PATTERN, "", regex=True).str.strip()
+    rest = rest.str.replace(_STATE_PATTERN, "", regex=True).str.strip()
 
-    if fmt == "raw":
-        df = pd.read_excel(excel_file, skiprows=3, usecols=[0, 1, 2, 4, 5, 6, 7])
+    rest = rest.to_numpy(dtype=object, copy=True)
+    for city, positions in pd.Series(cities.to_numpy()).groupby(cities.to_numpy(), sort=False).indices.items():
+        if not city:
+            continue
+        part = pd.Series(rest[positions], dtype=object)
+        rest[positions] = part.str.replace(_city_pattern(city), "", regex=True).str.strip().to_numpy()
+
+    result = pd.Series(rest, index=addresses.index, dtype=object)
+    result[has_comma] = street[has_comma]
+    return result.astype(str)
+
+
+def _column_to_str(col: pd.Series, na: str = "") -> pd.Series:
+    """Column-wise str(): whole-number floats drop their '.0' and missing values become na."""
+    values = col.astype(object)
+    if pd.api.types.is_float_dtype(col):
+        is_float = col.notna()
+    elif col.dtype == object:
+        is_float = values.map(type).eq(float) & col.notna()
     else:
-        df = pd.read_excel(excel_file, skiprows=3, usecols=[1, 2, 3, 4, 5, 6, 7])
+        is_float = pd.Series(False, index=col.index)
+
+    floats = values[is_float].astype(float)
+    whole = floats[(floats % 1 == 0) & (floats.abs() < 2**63)]
+
+    # Fill before astype(str): pandas 2 turns missing values into the string "nan"
+    text = values.where(col.notna(), na).astype(str).astype(object)
+    text[whole.index] = whole.astype("int64").astype(str).astype(object)
+    return text.astype(str)
+
+
+def process_excel(
+    excel_file, food_items: List[str], reader: ExcelReader | None = None, matcher: MenuMatcher | None = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, List[Tuple[str, int, int]], str]:
+    """
+    Process an uploaded Excel file into an order DataFrame and a sparse item quantity table.
+    Auto-detects raw WeChat export vs human-formatted files.
+    reader overrides the configured ExcelReader backend; matcher overrides the
+    MenuMatcher for food_items (anything with a compatible match method).
+    Returns (df, quantities, discrepancies, fmt) where quantities has one
+    (order_index, item_id, quantity) row per item actually ordered, with
+    order_index a row position in df and item_id a position in food_items;
+    discrepancies is a list of (food_item, parsed_total, expected_total) for
+    any summary table mismatches and fmt is 'raw' or 'formatted'.
+    Raises ValueError on bad input structure.
+    """
+    with stage("xlsx"):
+        sheet = load_sheet(excel_file, reader)
+    with stage("summary"):
+        fmt = detect_format(sheet)
+        summary_dict = read_summary_table(sheet, fmt)
+    with stage("orders"):
+        df = read_orders(sheet, fmt)
+    with stage("match"):
+        quantities = parse_order_items(df["items_ordered"], food_items, matcher)
+    with stage("validate"):
+        discrepancies = validate_against_summary(quantities, food_items, summary_dict)
+    return df, quantities, discrepancies, fmt
+
+
+def read_orders(sheet: pd.DataFrame, fmt: str) -> pd.DataFrame:
+    """Extract the order rows of a loaded sheet with normalized delivery, phone,
+    zip, city and address columns. Raises ValueError on bad input structure.
+    """
+    usecols = [0, 1, 2, 4, 5, 6, 7] if fmt == "raw" else [1, 2, 3, 4, 5, 6, 7]
+    df = sheet.iloc[:, [c for c in usecols if c < len(sheet.columns)]]
 
     df = df.dropna(how="all")
 
@@ -345,94 +549,172 @@ def process_excel(excel_file, food_items: List[str]) -> Tuple[pd.DataFrame, List
     has_order_text = df["items_ordered"].astype(str).str.contains("总价", na=False)
     df = df[has_order_text].reset_index(drop=True)
 
-    # Keep delivery as string
-    df["delivery"] = df["delivery"].apply(lambda x: str(int(x)) if isinstance(x, float) and x == int(x) else str(x))
+    # Keep delivery, phone and zip as strings
+    df["delivery"] = _column_to_str(df["delivery"], na="nan")
+    df["phone_number"] = _column_to_str(df["phone_number"])
+    df["zip_code"] = _column_to_str(df["zip_code"])
 
-    def _to_str(x):
-        if pd.isna(x):
-            return ""
-        if isinstance(x, float) and x == int(x):
-            return str(int(x))
-        return str(x)
+    # Normalize city from zip code lookup, then clean address
+    raw_city = df["city"].astype(object).where(df["city"].notna(), "").astype(str)
+    df["city"] = cities_for_zips(df["zip_code"]).fillna(raw_city).astype(str)
+    df["address"] = clean_addresses(df["address"], df["city"])
 
-    df["phone_number"] = df["phone_number"].apply(_to_str)
-    df["zip_code"] = df["zip_code"].apply(_to_str)
+    if len(df) == 0:
+        raise ValueError("No orders found. Make sure you're uploading a valid WeChat export .xlsx file.")
+    return df
 
-    # Normalize city from zip code lookup, then clean address
-    df["city"] = df.apply(
-        lambda row: BAY_AREA_ZIP_TO_CITY.get(row["zip_code"], str(row["city"]) if pd.notna(row["city"]) else ""),
-        axis=1,
+
+_QUANTITY = re.compile(r"\d+")
+
+
+def _split_entry(entry: str) -> Tuple[str, int] | None:
+    """(name, quantity) of one "name xN" entry, or None when it has no usable quantity."""
+    entry = entry.strip()
+    if "x" not in entry:
+        return None
+    name, rest = entry.rsplit("x", 1)
+    quantity = _QUANTITY.match(rest.strip())
+    if not quantity:
+        return None
+    return name.strip(), int(quantity.group())
+
+
+def tokenize_items(items_ordered: pd.Series) -> pd.DataFrame:
+    """Split a whole items_ordered column into one (order_index, segment, quantity) row per entry.
+
+    Each cell is "name xN， name xN， 总价：$..."; entries are separated by "， "
+    and the last one (the 总价 total) is dropped unless it is the only one.
+    An entry is split at its last "x" into the stripped name and the leading
+    digits of what follows; entries without an "x" or without those digits
+    are skipped. order_index is a position in items_ordered and rows keep the
+    order of the text. Missing cells have no entries.
+
+    The column is flattened to entries in one pass and each distinct entry
+    string (a few hundred per export at most) is split once.
+    """
+    cells = [text.split("， ") if isinstance(text, str) else [] for text in items_ordered.tolist()]
+    kept = [entries[:-1] if len(entries) > 1 else entries for entries in cells]
+    counts = np.fromiter(map(len, kept), dtype="int64", count=len(kept))
+    order_index = np.repeat(np.arange(len(kept), dtype="int64"), counts)
+
+    codes, uniques = pd.factorize(np.array(list(chain.from_iterable(kept)), dtype=object))
+    split = [_split_entry(entry) for entry in uniques]
+    usable = np.array([parts is not None for parts in split] + [False], dtype=bool)  # last slot: code -1
+    names = np.array([parts[0] if parts else "" for parts in split] + [""], dtype=object)
+    quantities = np.array([parts[1] if parts else 0 for parts in split] + [0], dtype="int64")
+
+    found = usable[codes]
+    return pd.DataFrame(
+        {
+            "order_index": order_index[found],
+            "segment": names[codes[found]],
+            "quantity": quantities[codes[found]],
+        }
     )
-    df["address"] = df.apply(
-        lambda row: clean_address(str(row["address"]) if pd.notna(row["address"]) else "", row["city"]),
-        axis=1,
+
+
+def parse_order_items(
+    items_ordered: pd.Series, food_items: List[str], matcher: MenuMatcher | None = None
+) -> pd.DataFrame:
+    """Parse each order's items text into the sparse (order_index, item_id, quantity)
+    table, with order_index a position in items_ordered.
+    """
+    if matcher is None:
+        matcher = build_menu_matcher(food_items)
+    tokens = tokenize_items(items_ordered)
+
+    # Orders repeat the same few segment strings, so match each distinct one once
+    codes, segments = pd.factorize(tokens["segment"])
+    item_ids = np.array([_no_match(matcher.match(segment)) for segment in segments] + [-1], dtype="int64")[codes]
+    matched = item_ids >= 0
+    return _build_quantities(
+        tokens["order_index"].to_numpy()[matched],
+        item_ids[matched],
+        tokens["quantity"].to_numpy()[matched],
     )
 
-    if len(df) == 0:
-        raise ValueError("No orders found. Make sure you're uploading a valid WeChat export .xlsx file.")
 
-    for food_item in food_items:
-        df[food_item] = 0
+def _no_match(item_id: int | None) -> int:
+    return -1 if item_id is None else item_id
 
-    for idx, row in df.iterrows():
-        items_text = str(row["items_ordered"])
-        if items_text == "nan":
-            continue
 
-        items_list = items_text.split("， ")
-        if len(items_list) > 1:
-            items_list = items_list[:-1]
-
-        for item_entry in items_list:
-            item_entry = item_entry.strip()
-            if not item_entry or "x" not in item_entry:
-                continue
-
-            parts = item_entry.rsplit("x", 1)
-            if len(parts) != 2:
-                continue
-
-            item_name_part = parts[0].strip()
-            quantity_match = re.match(r"(\d+)", parts[1].strip())
-            if not quantity_match:
-                continue
-
-            quantity = int(quantity_match.group(1))
-
-            for food_item in food_items:
-                base_name = re.sub(r"\d+个?[/／]?份?$", "", food_item).strip()
-                item_name_norm = item_name_part.replace(" ", "")
-                base_name_norm = base_name.replace(" ", "")
-
-                if (
-                    base_name in item_name_part
-                    or item_name_part in base_name
-                    or base_name_norm in item_name_norm
-                    or item_name_norm in base_name_norm
-                ):
-                    df.at[idx, food_item] = quantity
-                    break
+def _build_quantities(order_indices: Sequence[int], item_ids: Sequence[int], item_qtys: Sequence[int]) -> pd.DataFrame:
+    """Assemble the sparse quantity table from parallel sequences of matches.
 
-    discrepancies = validate_against_summary(df, food_items, summary_dict)
-    return df, discrepancies, fmt
+    A later mention of the same item in an order replaces the earlier one and
+    zero quantities are dropped. Rows are sorted by order then menu position.
+    """
+    if len(order_indices) == 0:
+        return empty_quantities()
+    quantities = pd.DataFrame(
+        {"order_index": order_indices, "item_id": item_ids, "quantity": item_qtys},
+        dtype="int64",
+    )
+    quantities = quantities.drop_duplicates(["order_index", "item_id"], keep="last")
+    quantities = quantities[quantities["quantity"] > 0]
+    return quantities.sort_values(["order_index", "item_id"]).reset_index(drop=True)
+
+
+def quantities_from_orders(orders: Sequence[Dict[str, int]]) -> Tuple[pd.DataFrame, List[str]]:
+    """Sparse quantity table for per-order {item name: quantity} dicts.
+
+    Item ids are positions in the returned name list, in order of first mention.
+    """
+    names: Dict[str, int] = {}
+    order_indices, item_ids, item_qtys = [], [], []
+    for order_index, order in enumerate(orders):
+        for name, quantity in order.items():
+            order_indices.append(order_index)
+            item_ids.append(names.setdefault(name, len(names)))
+            item_qtys.append(quantity)
+    return _build_quantities(order_indices, item_ids, item_qtys), list(names)
 
 
 class DeliveryOrderAnalyzer:
     def __init__(self):
-        self.df = None
+        self.quantities = None
         self.food_columns: List[str] = []
 
-    def load(self, df: pd.DataFrame) -> None:
-        """Load data from a processed DataFrame."""
-        self.df = df
-        self.food_columns = [col for col in df.columns[7:] if re.search(r"[\u4e00-\u9fff]", col)]
+    def load(self, quantities: pd.DataFrame, food_items: List[str]) -> None:
+        """Load the sparse quantity table and menu returned by process_excel."""
+        self.quantities = quantities
+        self.food_columns = list(food_items)
 
     def analyze(self, selected_indices: List[int]) -> Tuple[List[Tuple[str, int]], int]:
         """Return (sorted item totals, grand total) for selected order indices."""
-        if not selected_indices or self.df is None:
-            return [], 0
-
-        selected_df = self.df.iloc[selected_indices]
-        item_totals = {col: int(selected_df[col].sum()) for col in self.food_columns if selected_df[col].sum() > 0}
-        sorted_items = sorted(item_totals.items(), key=lambda x: x[1], reverse=True)
-        return sorted_items, sum(item_totals.values())
+        return self.analyze_many([selected_indices])[0]
+
+    def analyze_many(self, selections: Sequence[Sequence[int]]) -> List[Tuple[List[Tuple[str, int]], int]]:
+        """analyze() for several selections, aggregated together in one pass.
+
+        Each selection becomes a row of per-order weights (an order selected twice
+        counts twice); weighting every quantity row by each selection and summing
+        per (selection, item) gives all totals with a single bincount.
+        """
+        if not len(selections) or self.quantities is None or self.quantities.empty:
+            return [([], 0) for _ in selections]
+
+        order_index = self.quantities["order_index"].to_numpy()
+        item_id = self.quantities["item_id"].to_numpy()
+        quantity = self.quantities["quantity"].to_numpy()
+
+        selection_ids = np.repeat(np.arange(len(selections)), [len(indices) for indices in selections])
+        indices = np.fromiter(chain.from_iterable(selections), dtype="int64", count=len(selection_ids))
+        known = (indices >= 0) & (indices <= order_index.max())
+        weights = np.zeros((len(selections), order_index.max() + 1), dtype="int64")
+        np.add.at(weights, (selection_ids[known], indices[known]), 1)
+
+        n_items = len(self.food_columns)
+        cells = (np.arange(len(selections))[:, None] * n_items + item_id).ravel()
+        totals = np.bincount(
+            cells, weights=(weights[:, order_index] * quantity).ravel(), minlength=len(selections) * n_items
+        )
+        totals = totals.reshape(len(selections), n_items).astype("int64")
+
+        results = []
+        for row in totals:
+            # Stable sort: equal totals stay in menu order
+            ranked = [i for i in np.argsort(-row, kind="stable") if row[i] > 0]
+            sorted_items = [(self.food_columns[i], int(row[i])) for i in ranked]
+            results.append((sorted_items, int(row[row > 0].sum())))
+        return results
@@ -2,11 +2,32 @@ import hmac
 
 from fastapi import Header, HTTPException
 
-from app.config import get_password
+from app.config import get_metrics_public, get_password
+
+
+def password_matches(password: str) -> bool:
+    return hmac.compare_digest(password.encode(), get_password().encode())
 
 
 def verify_password(x_password: str = Header()) -> str:
     """FastAPI dependency that verifies the X-Password header."""
-    if not hmac.compare_digest(x_password, get_password()):
+    if not password_matches(x_password):
         raise HTTPException(status_code=401, detail="Invalid password")
     return x_password
+
+
+def verify_metrics_access(
+    x_password: str | None = Header(default=None),
+    authorization: str | None = Header(default=None),
+) -> None:
+    """FastAPI dependency for /metrics: the password as X-Password or a Bearer token
+    (what Prometheus' scrape authorization sends), unless METRICS_PUBLIC is set.
+    """
+    if get_metrics_public():
+        return
+    password = x_password
+    if password is None:
+        scheme, _, token = (authorization or "").partition(" ")
+        password = token if scheme.lower() == "bearer" else None
+    if password is None or not password_matches(password):
+        raise HTTPException(status_code=401, detail="Invalid password")
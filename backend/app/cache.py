@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe mapping bounded to maxsize entries, evicting the least recently used.
+
+    Optionally entries also expire ttl seconds after they were last used, and the
+    cache stays under max_bytes as measured by sizeof(value). Lookups through get()
+    are counted as hits or misses.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[V], int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes needs a sizeof function")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._sizeof = sizeof
+        self._clock = clock
+        self._data: "OrderedDict[K, V]" = OrderedDict()
+        self._used: Dict[K, float] = {}
+        self._sizes: Dict[K, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the cached value (marking it most recently used) or None."""
+        with self._lock:
+            self._expire()
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._used[key] = self._clock()
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        """Insert or replace key, evicting the oldest entries when over a limit.
+
+        A value larger than max_bytes on its own is still kept, as the only entry.
+        """
+        with self._lock:
+            self._expire()
+            self._discard(key)
+            self._data[key] = value
+            self._used[key] = self._clock()
+            if self._sizeof is not None:
+                self._sizes[key] = self._sizeof(value)
+                self.nbytes += self._sizes[key]
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes and len(self._data) > 1
+            ):
+                self._discard(next(iter(self._data)))
+
+    def pop(self, key: K) -> Optional[V]:
+        """Remove key, returning its value or None."""
+        with self._lock:
+            return self._discard(key)
+
+    def _expire(self) -> None:
+        # Caller holds the lock. Entries are in last-used order, so stop at the first live one.
+        if self.ttl is None:
+            return
+        cutoff = self._clock() - self.ttl
+        while self._data:
+            oldest = next(iter(self._data))
+            if self._used[oldest] > cutoff:
+                break
+            self._discard(oldest)
+
+    def _discard(self, key: K) -> Optional[V]:
+        # Caller holds the lock
+        value = self._data.pop(key, None)
+        self._used.pop(key, None)
+        self.nbytes -= self._sizes.pop(key, 0)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self._used.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+            if self.max_bytes is not None:
+                stats.update(nbytes=self.nbytes, max_bytes=self.max_bytes)
+            return stats
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            self._expire()
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._data)
@@ -1,6 +1,7 @@
 import json
 import os
 from pathlib import Path
+from typing import Optional
 
 
 def get_password() -> str:
@@ -34,3 +35,77 @@ def get_google_maps_api_key() -> str:
         "No Google Maps API key configured. "
         "Set GOOGLE_MAPS_API_KEY env var or add 'google_maps_api_key' to backend/config.json."
     )
+
+
+def get_excel_reader_name() -> str:
+    """Read the Excel reader backend from EXCEL_READER env var ('auto', 'calamine' or 'openpyxl')."""
+    return os.environ.get("EXCEL_READER", "auto").strip().lower() or "auto"
+
+
+def get_upload_cache_size() -> int:
+    """Read the number of processed uploads to keep from UPLOAD_CACHE_SIZE env var (default 32)."""
+    return int(os.environ.get("UPLOAD_CACHE_SIZE", "32"))
+
+
+def get_max_upload_size() -> int:
+    """Read the per-file upload limit in bytes from MAX_UPLOAD_MB env var (default 5)."""
+    return int(float(os.environ.get("MAX_UPLOAD_MB", "5")) * 1024 * 1024)
+
+
+def get_parse_workers() -> int:
+    """Read the parse process count from PARSE_WORKERS env var (default min(2, CPUs); 0 = threads only)."""
+    value = os.environ.get("PARSE_WORKERS")
+    if value is not None:
+        return max(0, int(value))
+    return min(2, os.cpu_count() or 1)
+
+
+def get_parse_timeout() -> float:
+    """Read the per-upload parse timeout in seconds from PARSE_TIMEOUT_SECONDS env var (default 60)."""
+    return float(os.environ.get("PARSE_TIMEOUT_SECONDS", "60"))
+
+
+def get_parse_max_pending() -> int:
+    """Read how many parse jobs may be queued or running from PARSE_MAX_PENDING env var (default 8)."""
+    return int(os.environ.get("PARSE_MAX_PENDING", "8"))
+
+
+def get_max_batch_files() -> int:
+    """Read the most files one batch upload may contain from UPLOAD_BATCH_MAX_FILES env var (default 10)."""
+    return int(os.environ.get("UPLOAD_BATCH_MAX_FILES", "10"))
+
+
+def get_session_ttl() -> float:
+    """Read how many seconds an unused upload session is kept from SESSION_TTL_SECONDS env var (default 4 hours)."""
+    return float(os.environ.get("SESSION_TTL_SECONDS", str(4 * 60 * 60)))
+
+
+def get_geocode_cache_ttl() -> Optional[float]:
+    """Read how many seconds a cached geocode stays valid from GEOCODE_CACHE_TTL_DAYS env var (default: forever)."""
+    days = float(os.environ.get("GEOCODE_CACHE_TTL_DAYS", "0"))
+    return days * 24 * 60 * 60 if days > 0 else None
+
+
+def get_session_max_bytes() -> int:
+    """Read the memory budget for all upload sessions in bytes from SESSION_MAX_MB env var (default 256)."""
+    return int(float(os.environ.get("SESSION_MAX_MB", "256")) * 1024 * 1024)
+
+
+def get_server_timing() -> bool:
+    """Read whether to time request stages (Server-Timing header and logs) from SERVER_TIMING env var (default on)."""
+    return os.environ.get("SERVER_TIMING", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_warmup() -> bool:
+    """Read whether to warm up parsing, labels and routing after startup from WARMUP env var (default on)."""
+    return os.environ.get("WARMUP", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_metrics_public() -> bool:
+    """Read whether /metrics is served without the password from METRICS_PUBLIC env var (default off)."""
+    return os.environ.get("METRICS_PUBLIC", "0").strip().lower() not in ("0", "false", "no", "off")
+
+
+def get_warmup_delay() -> float:
+    """Read seconds between startup and the first warm-up step from WARMUP_DELAY_SECONDS env var (default 1)."""
+    return float(os.environ.get("WARMUP_DELAY_SECONDS", "1"))
@@ -0,0 +1,163 @@
+"""
+Persistent geocode cache: a SQLite table with an in-process LRU in front.
+
+The database runs in WAL mode, so the server and parse workers can read while
+one of them writes, and each miss is a single-row upsert instead of a rewrite
+of the whole cache. Entries optionally expire GEOCODE_CACHE_TTL_DAYS after
+they were geocoded. The old geocode_cache.json, if present, is imported once
+when the database is created and can be deleted afterwards.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from app.cache import LRUCache
+from app.config import get_geocode_cache_ttl
+
+logger = logging.getLogger("uvicorn.error")
+
+_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+_DB_PATH = _DATA_DIR / "geocode_cache.sqlite3"
+_JSON_PATH = _DATA_DIR / "geocode_cache.json"
+
+# PRAGMA user_version once the table exists and the JSON cache has been imported
+_SCHEMA_VERSION = 1
+
+
+class GeocodeCache:
+    """Address -> (lat, lng) store shared by every process on the instance."""
+
+    MEMORY_SIZE = 4096
+    BUSY_TIMEOUT = 10.0  # seconds to wait for another process's write
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: Optional[float] = None,
+        legacy_json: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.legacy_json = legacy_json
+        self._clock = clock
+        # address -> (lat, lng, geocoded_at)
+        self._memory: LRUCache[str, Tuple[float, float, float]] = LRUCache(self.MEMORY_SIZE)
+        # sqlite3 connections must not be used by two threads at once, so each thread gets its own
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; writes open their own BEGIN IMMEDIATE transactions
+        conn = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            self._create(conn)
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _create(self, conn: sqlite3.Connection) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have created it while we waited for the write lock
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS geocode ("
+                    "address TEXT PRIMARY KEY, lat REAL NOT NULL, lng REAL NOT NULL, geocoded_at REAL NOT NULL)"
+                )
+                self._import_json(conn)
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _import_json(self, conn: sqlite3.Connection) -> None:
+        # Caller holds the write transaction
+        if self.legacy_json is None:
+            return
+        try:
+            entries = json.loads(self.legacy_json.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        now = self._clock()
+        rows = [
+            (address, float(entry["lat"]), float(entry["lng"]), now)
+            for address, entry in entries.items()
+            if isinstance(entry, dict) and "lat" in entry and "lng" in entry
+        ]
+        conn.executemany("INSERT OR IGNORE INTO geocode VALUES (?, ?, ?, ?)", rows)
+        logger.info("Imported %d geocodes from %s", len(rows), self.legacy_json)
+
+    def _fresh(self, geocoded_at: float) -> bool:
+        return self.ttl is None or geocoded_at > self._clock() - self.ttl
+
+    def get(self, address: str) -> Optional[Tuple[float, float]]:
+        """The cached (lat, lng) for address, or None if unknown or expired."""
+        entry = self._memory.get(address)
+        if entry is None:
+            query = "SELECT lat, lng, geocoded_at FROM geocode WHERE address = ?"
+            entry = self._connect().execute(query, (address,)).fetchone()
+            if entry is None:
+                return None
+            self._memory.put(address, entry)
+        lat, lng, geocoded_at = entry
+        if not self._fresh(geocoded_at):
+            self._memory.pop(address)
+            return None
+        return lat, lng
+
+    def put(self, address: str, lat: float, lng: float) -> None:
+        """Store or refresh address's coordinates in one atomic upsert."""
+        geocoded_at = self._clock()
+        self._connect().execute(
+            "INSERT INTO geocode VALUES (?, ?, ?, ?) ON CONFLICT(address) DO UPDATE SET "
+            "lat = excluded.lat, lng = excluded.lng, geocoded_at = excluded.geocoded_at",
+            (address, lat, lng, geocoded_at),
+        )
+        self._memory.put(address, (lat, lng, geocoded_at))
+
+    def preload(self) -> int:
+        """Open the database (importing the JSON cache on first use) and fill the
+        in-memory LRU with the most recently geocoded entries. Returns how many.
+        """
+        query = "SELECT address, lat, lng, geocoded_at FROM geocode ORDER BY geocoded_at DESC LIMIT ?"
+        rows = self._connect().execute(query, (self.MEMORY_SIZE,)).fetchall()
+        fresh = [(address, entry) for address, *entry in rows if self._fresh(entry[2])]
+        # Oldest first, so the newest end up most recently used
+        for address, entry in reversed(fresh):
+            self._memory.put(address, tuple(entry))
+        return len(fresh)
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+    def clear(self) -> None:
+        """Delete every entry, on disk and in memory."""
+        self._connect().execute("DELETE FROM geocode")
+        self._memory.clear()
+
+    def close(self) -> None:
+        """Close every thread's connection; the next use reopens one."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        self._memory.clear()
+
+
+geocode_cache = GeocodeCache(_DB_PATH, ttl=get_geocode_cache_ttl(), legacy_json=_JSON_PATH)
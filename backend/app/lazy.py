@@ -0,0 +1,56 @@
+"""
+Deferred imports for the API process's heavy dependencies.
+
+Instances on Render's free plan spin down when idle, so every cold start is
+user-visible. pandas, OR-Tools, ReportLab and requests are bound through
+lazy_import() and only imported when an endpoint first touches them, so
+/health and /api/menu answer without loading any of them.
+"""
+
+import importlib
+from types import ModuleType
+
+
+class LazyModule:
+    """Stand-in for a module, imported on first attribute access.
+
+    Attribute writes and deletes go to the real module as well, so
+    unittest.mock.patch("pkg.mod.requests.get") still patches requests.get.
+    """
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self) -> ModuleType:
+        module = object.__getattribute__(self, "_module")
+        if module is None:
+            # The import system's own locks make concurrent first uses safe
+            module = importlib.import_module(object.__getattribute__(self, "_name"))
+            object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if object.__getattribute__(self, "_module") is not None else "not loaded"
+        return f"<lazy module '{object.__getattribute__(self, '_name')}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """A LazyModule for the module name, e.g. lazy_import("ortools.constraint_solver.pywrapcp")."""
+    return LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """Whether a lazy_import()ed module has been imported yet; True for ordinary modules."""
+    if isinstance(module, LazyModule):
+        return object.__getattribute__(module, "_module") is not None
+    return True
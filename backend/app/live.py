@@ -0,0 +1,69 @@
+"""
+Running item totals for a selection that changes a few orders at a time.
+
+The live analyze WebSocket keeps one LiveTotals per connection. Each message
+adds or removes some orders; only their quantity rows are touched, and only
+items whose total moved are reported back, so a drag gesture costs the same
+however many orders are already selected.
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+
+from app.uploads import ParsedUpload
+
+
+class LiveTotals:
+    """Item totals of a set of selected orders of one upload."""
+
+    def __init__(self, upload: ParsedUpload):
+        self.food_items = upload.food_items
+        self._item_id = np.asarray(upload.item_id, dtype="int64")
+        self._quantity = np.asarray(upload.quantity, dtype="int64")
+        # Triplets are sorted by order, so order i's rows are offsets[i]:offsets[i + 1]
+        self._offsets = np.searchsorted(np.asarray(upload.order_index, dtype="int64"), np.arange(len(upload) + 1))
+        self.selected = np.zeros(len(upload), dtype=bool)
+        self.totals = np.zeros(len(upload.food_items), dtype="int64")
+
+    @property
+    def total_items(self) -> int:
+        return int(self.totals.sum())
+
+    @property
+    def orders_selected(self) -> int:
+        return int(self.selected.sum())
+
+    def update(self, add: Iterable[int] = (), remove: Iterable[int] = (), clear: bool = False) -> Dict[str, int]:
+        """Deselect remove (everything when clear), then select add.
+
+        Returns {item: new total} for the items whose total changed. Adding a
+        selected order or removing an unselected one does nothing. Raises
+        IndexError for an index outside the upload, before changing anything.
+        """
+        add = np.unique(np.fromiter(add, dtype="int64"))
+        remove = np.unique(np.fromiter(remove, dtype="int64"))
+        for indices in (add, remove):
+            if len(indices) and (indices[0] < 0 or indices[-1] >= len(self.selected)):
+                raise IndexError("Order index out of range")
+        if clear:
+            remove = np.flatnonzero(self.selected)
+
+        # An order both removed and added stays selected and nets out of the delta
+        remove = remove[self.selected[remove]]
+        self.selected[remove] = False
+        add = add[~self.selected[add]]
+        self.selected[add] = True
+
+        delta = self._item_totals(add) - self._item_totals(remove)
+        changed = np.flatnonzero(delta)
+        self.totals[changed] += delta[changed]
+        return {self.food_items[i]: int(self.totals[i]) for i in changed}
+
+    def _item_totals(self, orders: np.ndarray) -> np.ndarray:
+        starts, ends = self._offsets[orders], self._offsets[orders + 1]
+        lengths = ends - starts
+        # Positions of all these orders' triplets: each run starts at its order's offset
+        rows = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        totals = np.bincount(self._item_id[rows], weights=self._quantity[rows], minlength=len(self.totals))
+        return totals.astype("int64")
@@ -1,12 +1,43 @@
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
+from app import metrics
+from app.aliases import alias_table
+from app.auth import verify_metrics_access
+from app.config import get_max_batch_files, get_max_upload_size, get_warmup, get_warmup_delay
+from app.geocache import geocode_cache
+from app.lazy import is_loaded, lazy_import
+from app.middleware import BodySizeLimitMiddleware, MetricsMiddleware, ServerTimingMiddleware
 from app.routers import analyze, labels, menu, routing, upload
+from app.warmup import warmup
 
-app = FastAPI(title="haochi-midao")
+workers = lazy_import("app.workers")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: /health answers right away, /ready once it's done. The thread
+    # starts its first step only after the delay, so uvicorn is listening before it takes the GIL
+    if get_warmup():
+        threading.Thread(target=warmup.run, args=(get_warmup_delay(),), name="warm-up", daemon=True).start()
+    else:
+        warmup.skip()
+    yield
+    # No upload since startup means no pool to stop
+    if is_loaded(workers):
+        workers.parse_pool.shutdown()
+    geocode_cache.close()
+    # Hit counts since the last save
+    alias_table.flush()
+
+
+app = FastAPI(title="haochi-midao", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +47,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Multipart framing adds a few hundred bytes around the file; the handler checks the exact file size
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/upload": get_max_upload_size() + 64 * 1024,
+        "/api/upload/batch": get_max_upload_size() * get_max_batch_files() + 64 * 1024,
+    },
+)
+
+# Outermost, so "app" and request latency cover the other middleware too
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 api_router = APIRouter(prefix="/api")
 api_router.include_router(upload.router)
 api_router.include_router(menu.router)
@@ -30,6 +74,21 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """200 once startup warm-up has finished (or is turned off), 503 while it runs.
+
+    Unauthenticated like /health, for readiness probes; it only reports warm-up step timings and errors.
+    """
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if warmup.ready else 503)
+
+
+@app.get("/metrics", dependencies=[Depends(verify_metrics_access)])
+def get_metrics():
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # In production, serve the built frontend as static files
 static_dir = Path(__file__).resolve().parent.parent.parent / "frontend" / "dist"
 if static_dir.is_dir():
@@ -0,0 +1,95 @@
+"""
+Process-wide menu registry. menu.csv is parsed once and re-parsed only when
+the file's modification time or size changes.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+MENU_CSV = Path(__file__).resolve().parent.parent / "data" / "menu.csv"
+
+
+@dataclass(frozen=True)
+class Menu:
+    """One parsed version of menu.csv, with the lookups each consumer needs."""
+
+    version: str  # content hash, stable across processes and restarts
+    items: List[Dict]  # rows with id, item_zh, item_short_zh, item_en
+    food_items: List[str]  # item_zh in file order
+    label_map: Dict[str, str]  # item_zh -> item_short_zh
+    label_lookup: Dict[str, Tuple[int, str]]  # item_zh -> (id, item_short_zh)
+
+
+def parse_menu(data: bytes) -> Menu:
+    """Parse menu.csv bytes into a Menu."""
+    rows = list(csv.DictReader(io.StringIO(data.decode("utf-8-sig"))))
+    items = [
+        {
+            "id": int(row["id"]),
+            "item_zh": row["item_zh"],
+            "item_short_zh": row["item_short_zh"],
+            "item_en": row["item_en"],
+        }
+        for row in rows
+    ]
+    return Menu(
+        version=hashlib.sha256(data).hexdigest()[:16],
+        items=items,
+        food_items=[item["item_zh"] for item in items],
+        label_map={item["item_zh"]: item["item_short_zh"] for item in items},
+        label_lookup={item["item_zh"]: (item["id"], item["item_short_zh"]) for item in items},
+    )
+
+
+class MenuRegistry:
+    """Holds the current Menu for one CSV path, reloading it when the file changes."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.loads = 0
+        self._menu: Menu | None = None
+        self._stamp: Tuple[int, int] | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Menu:
+        """Return the current Menu. Raises FileNotFoundError if the CSV is missing."""
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._menu is not None and stamp == self._stamp:
+            return self._menu
+        with self._lock:
+            if self._menu is None or stamp != self._stamp:
+                self._menu = parse_menu(self.path.read_bytes())
+                self._stamp = stamp
+                self.loads += 1
+            return self._menu
+
+
+_registries: Dict[Path, MenuRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_menu_registry(path: str | Path | None = None) -> MenuRegistry:
+    """Return the shared registry for path (default data/menu.csv)."""
+    key = Path(path) if path is not None else MENU_CSV
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = MenuRegistry(key)
+        return registry
+
+
+def get_menu(path: str | Path | None = None) -> Menu:
+    """Return the current Menu for path (default data/menu.csv)."""
+    return get_menu_registry(path).get()
+
+
+def menu_version(path: str | Path | None = None) -> str:
+    """Return the content version of the current menu."""
+    return get_menu(path).version
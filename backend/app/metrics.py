@@ -0,0 +1,190 @@
+"""
+Process metrics in the Prometheus text exposition format, served at /metrics.
+
+Counters, gauges and histograms cover request latency and concurrency, and the
+Google APIs billed per call: geocode cache hits and misses, Distance Matrix
+requests and elements, plus OR-Tools solve time and label counts per PDF.
+Values are per server process; parse worker processes don't report.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client defaults plus room for large uploads and 5 s route solves
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: Sequence[str]) -> Tuple[str, ...]:
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(label_values)}")
+        return tuple(str(v) for v in label_values)
+
+    def _selector(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = [*zip(self.labels, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.help)}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """Monotonically increasing total per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(label_values), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._selector(key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value per label combination that goes up and down."""
+
+    kind = "gauge"
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative le buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts with a final +Inf bucket, sum)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = self._key(label_values)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            counts, _total = self._values.get(self._key(label_values), ([0], 0.0))
+            return sum(counts)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], counts):
+                cumulative += count
+                le = _format_value(bound)
+                lines.append(f"{self.name}_bucket{self._selector(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._selector(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._selector(key)} {cumulative}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Registry:
+    """The metrics /metrics reports, in registration order."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+registry = Registry()
+
+request_seconds = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time from request start to the end of the response body",
+        ["method", "route", "status"],
+    )
+)
+requests_in_progress = registry.register(
+    Gauge("http_requests_in_progress", "Requests currently being handled", ["method"])
+)
+geocode_cache_lookups = registry.register(
+    Counter("geocode_cache_lookups_total", "geocode_address lookups by cache result; misses call the API", ["result"])
+)
+distance_matrix_requests = registry.register(
+    Counter("distance_matrix_requests_total", "Distance Matrix API requests sent")
+)
+distance_matrix_elements = registry.register(
+    Counter("distance_matrix_elements_total", "Distance Matrix elements requested (origins x destinations)")
+)
+route_solve_seconds = registry.register(
+    Histogram(
+        "route_solve_seconds",
+        "OR-Tools route solve wall time",
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+    )
+)
+labels_per_pdf = registry.register(
+    Histogram(
+        "labels_per_pdf",
+        "Labels on each generated PDF (80 per sheet)",
+        buckets=(80, 240, 800, 1600, 4000, 8000, 16000),
+    )
+)
@@ -0,0 +1,138 @@
+import json
+import logging
+from time import perf_counter
+from typing import Dict
+
+from fastapi import HTTPException
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import metrics, timing
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over a per-path byte limit with 413.
+
+    The declared Content-Length is checked before anything is read; the
+    streamed body is counted chunk by chunk, so an oversized upload is cut off
+    as soon as it crosses the limit instead of after it has been buffered.
+    limits maps path prefixes to their maximum body size in bytes.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def _limit_for(self, path: str) -> int | None:
+        matches = [prefix for prefix in self.limits if path.startswith(prefix)]
+        if not matches:
+            return None
+        return self.limits[max(matches, key=len)]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self._limit_for(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = "Request body too large"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+class ServerTimingMiddleware:
+    """Report the stages timed during a request (see app.timing).
+
+    Every response gets a Server-Timing header with the stages plus "app", the
+    time until the response started. Requests that timed any stage also log one
+    JSON line with method, path, status and the stages in milliseconds.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not timing.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        with timing.collect() as timings:
+
+            async def timed_send(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    stages = dict(timings.stages)
+                    timings.add("app", perf_counter() - start)
+                    MutableHeaders(scope=message).append("Server-Timing", timings.header())
+                    if stages:
+                        log = {"method": scope["method"], "path": scope["path"], "status": message["status"]}
+                        log.update((name, round(seconds * 1000, 1)) for name, seconds in timings.stages.items())
+                        logger.info("timing %s", json.dumps(log, ensure_ascii=False))
+                await send(message)
+
+            await self.app(scope, receive, timed_send)
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the route that handled a request, e.g. /api/sessions/{session_id}."""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # A route of an included router knows only its own path; put back the prefix it matched under
+    path = scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + template or "/"
+    return template or "/"
+
+
+class MetricsMiddleware:
+    """Track in-flight requests and each request's latency by method, route and status (see app.metrics).
+
+    Routes are labelled by their path template, e.g. /api/sessions/{session_id},
+    so labels stay bounded; requests matching no route count as "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def status_send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.requests_in_progress.inc(method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            metrics.request_seconds.observe(perf_counter() - start, method, _route_template(scope), str(status))
+            metrics.requests_in_progress.dec(method)
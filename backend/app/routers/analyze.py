@@ -1,15 +1,37 @@
+import json
 from collections import Counter
+from itertools import chain
+from typing import List, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
 
-from app.auth import verify_password
-from app.schemas import AnalyzeRequest, AnalyzeResponse, SortedItem
+from app.auth import password_matches, verify_password
+from app.lazy import lazy_import
+from app.schemas import (
+    AnalyzeRequest,
+    AnalyzeResponse,
+    BatchAnalyzeRequest,
+    BatchAnalyzeResponse,
+    PivotRequest,
+    PivotResponse,
+    PivotRow,
+    SelectionAnalysis,
+    SortedItem,
+)
+
+analyzer = lazy_import("app.analyzer")
+live = lazy_import("app.live")
+sessions = lazy_import("app.sessions")
 
 router = APIRouter()
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
 def analyze(request: AnalyzeRequest, _password: str = Depends(verify_password)):
+    if request.session_id is not None:
+        result = sessions.session_for(request.session_id, request.indices).analyzer.analyze(request.indices)
+        return AnalyzeResponse(**_analysis(result, len(request.indices)))
+
     totals: Counter[str] = Counter()
     for order in request.orders:
         for item_name, quantity in order.items():
@@ -23,3 +45,113 @@ def analyze(request: AnalyzeRequest, _password: str = Depends(verify_password)):
         total_items=total_items,
         orders_analyzed=len(request.orders),
     )
+
+
+@router.post("/analyze/batch", response_model=BatchAnalyzeResponse)
+def analyze_batch(request: BatchAnalyzeRequest, _password: str = Depends(verify_password)):
+    """Totals for several named selections of one order list, e.g. one per delivery group.
+
+    The orders are either sent in the request or those of an upload session.
+    """
+    if request.session_id is not None:
+        all_indices = list(chain.from_iterable(selection.indices for selection in request.selections))
+        order_analyzer = sessions.session_for(request.session_id, all_indices).analyzer
+    else:
+        for selection in request.selections:
+            if any(not 0 <= i < len(request.orders) for i in selection.indices):
+                raise HTTPException(
+                    status_code=400, detail=f"Selection '{selection.name}' has an order index out of range"
+                )
+        order_analyzer = analyzer.DeliveryOrderAnalyzer()
+        order_analyzer.load(*analyzer.quantities_from_orders(request.orders))
+
+    selections = [selection.indices for selection in request.selections]
+    # The combined total is one more selection, aggregated alongside the others
+    *results, combined = order_analyzer.analyze_many(selections + [list(chain.from_iterable(selections))])
+
+    return BatchAnalyzeResponse(
+        selections=[
+            SelectionAnalysis(name=selection.name, **_analysis(result, len(selection.indices)))
+            for selection, result in zip(request.selections, results)
+        ],
+        combined=AnalyzeResponse(**_analysis(combined, sum(len(indices) for indices in selections))),
+    )
+
+
+@router.post("/analyze/pivot", response_model=PivotResponse)
+def analyze_pivot(request: PivotRequest, _password: str = Depends(verify_password)):
+    """Item totals of an upload session broken down by city, ZIP code and/or group.
+
+    The breakdown comes from a cube built once per session and grouping, so
+    asking for several views of the same orders is cheap.
+    """
+    session = sessions.session_for(request.session_id, [])
+    try:
+        cube = session.cube(request.groups)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows = cube.rollup(request.by, request.where)
+    return PivotResponse(
+        by=request.by,
+        food_columns=cube.food_items,
+        rows=[
+            PivotRow(key=list(key), quantities=totals.tolist(), total_items=int(totals.sum()), orders=orders)
+            for key, totals, orders in rows
+        ],
+    )
+
+
+@router.websocket("/analyze/live/{session_id}")
+async def analyze_live(websocket: WebSocket, session_id: str):
+    """Running totals of a selection of an upload session's orders.
+
+    The first message is {"password": ...}; the server answers {"ready": true,
+    "orders": <orders in the session>}. After that every message is
+    {"add": [...], "remove": [...]} and/or {"clear": true} with order indices,
+    answered with {"changed": {item: new total}, "total_items", "orders_selected"}.
+    Only items whose total moved are listed; a total of 0 means the item left
+    the selection. A bad message gets {"error": ...} and leaves the totals alone.
+    """
+    await websocket.accept()
+    try:
+        try:
+            hello = json.loads(await websocket.receive_text())
+        except ValueError:
+            hello = None
+        if not isinstance(hello, dict) or not password_matches(str(hello.get("password", ""))):
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid password")
+            return
+        session = sessions.session_store.get(session_id)
+        if session is None:
+            await websocket.close(code=4404, reason="Session expired, please upload the file again")
+            return
+
+        selection = live.LiveTotals(session.upload)
+        await websocket.send_json({"ready": True, "orders": len(session.upload)})
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+                if not isinstance(message, dict):
+                    raise ValueError("Expected a JSON object")
+                changed = selection.update(
+                    message.get("add", []), message.get("remove", []), bool(message.get("clear"))
+                )
+            except (IndexError, TypeError, ValueError) as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            await websocket.send_json(
+                {"changed": changed, "total_items": selection.total_items, "orders_selected": selection.orders_selected}
+            )
+    except WebSocketDisconnect:
+        pass
+
+
+def _analysis(result: Tuple[List[Tuple[str, int]], int], orders_analyzed: int) -> dict:
+    sorted_items, total_items = result
+    return {
+        "sorted_items": [SortedItem(item_name=name, quantity=qty) for name, qty in sorted_items],
+        "total_items": total_items,
+        "orders_analyzed": orders_analyzed,
+    }
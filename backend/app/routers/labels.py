@@ -1,23 +1,25 @@
-from pathlib import Path
-
-import pandas as pd
 from fastapi import APIRouter, Depends
 from fastapi.responses import Response
 
 from app.auth import verify_password
 from app.labels import generate_labels_pdf
+from app.lazy import lazy_import
+from app.menu import get_menu
 from app.schemas import LabelsRequest
 
-router = APIRouter()
+sessions = lazy_import("app.sessions")
 
-MENU_CSV = Path(__file__).resolve().parent.parent.parent / "data" / "menu.csv"
+router = APIRouter()
 
 
 @router.post("/labels")
 def create_labels(request: LabelsRequest, _password: str = Depends(verify_password)):
-    menu_df = pd.read_csv(MENU_CSV)
-    sorted_items = [(item.item_name, item.quantity) for item in request.sorted_items]
-    pdf_bytes = generate_labels_pdf(sorted_items, menu_df)
+    if request.session_id is not None:
+        session = sessions.session_for(request.session_id, request.indices)
+        sorted_items, _total = session.analyzer.analyze(request.indices)
+    else:
+        sorted_items = [(item.item_name, item.quantity) for item in request.sorted_items]
+    pdf_bytes = generate_labels_pdf(sorted_items, get_menu().label_lookup)
 
     return Response(
         content=pdf_bytes,
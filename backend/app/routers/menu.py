@@ -1,26 +1,44 @@
-from pathlib import Path
-
-import pandas as pd
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 
+from app.aliases import alias_table
 from app.auth import verify_password
-from app.schemas import MenuItem, MenuResponse
+from app.menu import get_menu
+from app.schemas import MenuAlias, MenuAliasesResponse, MenuItem, MenuResponse, UnmatchedSegment
 
 router = APIRouter()
 
-MENU_CSV = Path(__file__).resolve().parent.parent.parent / "data" / "menu.csv"
-
 
 @router.get("/menu", response_model=MenuResponse)
-def get_menu(_password: str = Depends(verify_password)):
-    df = pd.read_csv(MENU_CSV)
-    items = [
-        MenuItem(
-            id=int(row["id"]),
-            item_zh=row["item_zh"],
-            item_short_zh=row["item_short_zh"],
-            item_en=row["item_en"],
-        )
-        for _, row in df.iterrows()
-    ]
-    return MenuResponse(items=items)
+def get_menu_items(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    _password: str = Depends(verify_password),
+):
+    menu = get_menu()
+    etag = f'"{menu.version}"'
+    # Let the browser keep its copy but revalidate each time; private because the route is authenticated
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return MenuResponse(items=[MenuItem(**item) for item in menu.items])
+
+
+@router.get("/menu/aliases", response_model=MenuAliasesResponse)
+def get_menu_aliases(_password: str = Depends(verify_password)):
+    """Order-text segments learned for the current menu, lookup hit rate, and segments that never matched."""
+    menu = get_menu()
+    report = alias_table.report(menu)
+    names = {item["id"]: item["item_zh"] for item in menu.items}
+    return MenuAliasesResponse(
+        menu_version=report["menu_version"],
+        hits=report["hits"],
+        misses=report["misses"],
+        hit_rate=report["hit_rate"],
+        aliases=[
+            MenuAlias(segment=segment, menu_id=menu_id, item_zh=names.get(menu_id, ""))
+            for segment, menu_id in sorted(report["aliases"].items())
+        ],
+        unmatched=[UnmatchedSegment(segment=segment, count=count) for segment, count in report["unmatched"]],
+    )
@@ -2,9 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from app.auth import verify_password
 from app.config import get_google_maps_api_key
+from app.lazy import lazy_import
 from app.routing import GeocodingError, RoutingError, optimize_route
 from app.schemas import RouteRequest, RouteResponse, RouteStopResponse
 
+sessions = lazy_import("app.sessions")
+
 router = APIRouter()
 
 
@@ -13,7 +16,7 @@ def create_route(
     request: RouteRequest,
     _password: str = Depends(verify_password),
 ):
-    if len(request.orders) == 0:
+    if len(request.orders) == 0 and (request.session_id is None or len(request.indices) == 0):
         raise HTTPException(status_code=400, detail="No orders selected for routing")
 
     try:
@@ -21,16 +24,19 @@ def create_route(
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    orders_dicts = [
-        {
-            "index": o.index,
-            "customer": o.customer,
-            "address": o.address,
-            "city": o.city,
-            "zip_code": o.zip_code,
-        }
-        for o in request.orders
-    ]
+    if request.session_id is not None:
+        orders_dicts = sessions.session_for(request.session_id, request.indices).route_orders(request.indices)
+    else:
+        orders_dicts = [
+            {
+                "index": o.index,
+                "customer": o.customer,
+                "address": o.address,
+                "city": o.city,
+                "zip_code": o.zip_code,
+            }
+            for o in request.orders
+        ]
 
     try:
         stops = optimize_route(orders_dicts, request.start_address, api_key, request.departure_time)
@@ -1,62 +1,278 @@
-import io
-import re
+import asyncio
+import hashlib
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List, Literal, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile
 
-from app.analyzer import load_food_items, load_food_label_map, process_excel
 from app.auth import verify_password
-from app.schemas import Discrepancy, OrderItem, UploadResponse
+from app.config import get_max_batch_files, get_max_upload_size
+from app.lazy import lazy_import
+from app.menu import get_menu
+from app.schemas import (
+    BatchFileResult,
+    BatchUploadResponse,
+    ColumnarBatchUploadResponse,
+    ColumnarOrders,
+    ColumnarUploadResponse,
+    Discrepancy,
+    OrderItem,
+    SparseQuantities,
+    UploadDeltaResponse,
+    UploadResponse,
+)
+from app.timing import stage
+
+if TYPE_CHECKING:
+    from app.uploads import ParsedUpload
+
+sessions = lazy_import("app.sessions")
+uploads = lazy_import("app.uploads")
+workers = lazy_import("app.workers")
 
 router = APIRouter()
 
-MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5 MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@router.post("/upload", response_model=UploadResponse | ColumnarUploadResponse)
+async def upload(
+    file: UploadFile,
+    layout: Literal["rows", "columnar"] = "rows",
+    include_text: bool = False,
+    _password: str = Depends(verify_password),
+):
+    """Parse a WeChat export.
+
+    layout=columnar returns parallel order arrays and sparse quantity triplets
+    keyed by menu id; the raw items_ordered text is only included with
+    include_text=true. The default rows layout is one OrderItem per order.
+    upload_id can be passed to /upload/delta with a later re-export.
+    """
+    upload_id, parsed = await _parse_cached(file)
+    with stage("session"):
+        session_id = sessions.session_store.create(parsed)
+
+    if layout == "columnar":
+        return _columnar_response(parsed, include_text, upload_id=upload_id, session_id=session_id)
+    return _upload_response(parsed, upload_id=upload_id, session_id=session_id)
+
+
+@router.post("/upload/delta", response_model=UploadDeltaResponse)
+async def upload_delta(
+    file: UploadFile,
+    previous_upload_id: str,
+    _password: str = Depends(verify_password),
+):
+    """Re-upload an updated export of a previous upload.
+
+    Only orders whose content is not in the previous upload are parsed; the
+    rest are copied from it. Returns the added and changed orders (indexed in
+    the new upload), the previous indices of removed orders, and for every new
+    order the previous one it continues so the client can carry its state over.
+    """
+    previous = uploads.upload_cache.get(previous_upload_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Previous upload not found, please upload the full file")
+    menu = get_menu()
+    if previous_upload_id.rsplit(":", 1)[-1] != menu.version:
+        raise HTTPException(
+            status_code=409, detail="Menu changed since the previous upload, please upload the full file"
+        )
+
+    _check_file(file)
+    upload_id = await _file_key(file)
+    with _parse_errors():
+        known_hashes = await asyncio.to_thread(uploads.row_hashes, previous.columns)
+        changes = await workers.parse_pool.parse_changed(file.file, menu, known_hashes)
+    with stage("delta"):
+        delta = await asyncio.to_thread(uploads.apply_delta, previous, changes, menu)
+    uploads.upload_cache.put(upload_id, delta.upload)
+
+    parsed = delta.upload
+    orders = _order_items(parsed, delta.added + delta.changed)
+    return UploadDeltaResponse(
+        upload_id=upload_id,
+        session_id=sessions.session_store.create(parsed),
+        previous_upload_id=previous_upload_id,
+        total_orders=len(parsed),
+        previous_index=delta.previous_index,
+        added=orders[: len(delta.added)],
+        changed=orders[len(delta.added) :],
+        removed=delta.removed,
+        discrepancies=_discrepancies(parsed),
+        food_columns=parsed.food_items,
+        format=parsed.fmt,
+        food_column_labels=parsed.food_column_labels,
+    )
+
+
+@router.post("/upload/batch", response_model=BatchUploadResponse | ColumnarBatchUploadResponse)
+async def upload_batch(
+    files: List[UploadFile],
+    layout: Literal["rows", "columnar"] = "rows",
+    include_text: bool = False,
+    _password: str = Depends(verify_password),
+):
+    """Parse several WeChat exports in parallel and merge them into one set of orders.
+
+    Orders keep file order and get one global index; an order identical to one
+    in an earlier file is dropped and its file entry points at the kept copy.
+    Top-level discrepancies are for the merged set, per-file ones are in files;
+    mismatches that cancel out across files only show up per file.
+    """
+    max_files = get_max_batch_files()
+    if len(files) > max_files:
+        raise HTTPException(status_code=400, detail=f"Too many files ({max_files} max)")
+
+    # Leave the rest of the pool to other requests; one slot when parsing in threads
+    slots = asyncio.Semaphore(max(1, workers.parse_pool.max_workers))
+
+    async def parse(file: UploadFile) -> "ParsedUpload":
+        async with slots:
+            try:
+                return (await _parse_cached(file))[1]
+            except HTTPException as e:
+                e.detail = f"{file.filename}: {e.detail}"
+                raise
+
+    results = await asyncio.gather(*(parse(file) for file in files), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
 
+    with stage("merge"):
+        merged = uploads.merge_uploads(results)
+    file_results = [
+        BatchFileResult(
+            filename=file.filename,
+            format=parsed.fmt,
+            orders=len(parsed),
+            duplicates=duplicates,
+            order_indices=order_indices,
+            discrepancies=_discrepancies(parsed),
+        )
+        for file, parsed, order_indices, duplicates in zip(files, results, merged.order_indices, merged.duplicates)
+    ]
+
+    with stage("session"):
+        session_id = sessions.session_store.create(merged.upload)
+    if layout == "columnar":
+        return _columnar_response(
+            merged.upload, include_text, ColumnarBatchUploadResponse, files=file_results, session_id=session_id
+        )
+    return _upload_response(merged.upload, BatchUploadResponse, files=file_results, session_id=session_id)
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+def delete_session(session_id: str, _password: str = Depends(verify_password)):
+    """Drop an upload session early, e.g. when the user starts over with a new file."""
+    sessions.session_store.delete(session_id)
 
-@router.post("/upload", response_model=UploadResponse)
-async def upload(file: UploadFile, _password: str = Depends(verify_password)):
+
+def _check_file(file: UploadFile) -> None:
     if not file.filename or not file.filename.endswith(".xlsx"):
         raise HTTPException(status_code=400, detail="Please upload an .xlsx file")
 
-    contents = await file.read()
-    if len(contents) > MAX_UPLOAD_SIZE:
-        raise HTTPException(status_code=413, detail="File too large (5MB max)")
-    excel_file = io.BytesIO(contents)
+    # The body has already been streamed into a spooled temp file (memory first, disk past 1 MB);
+    # BodySizeLimitMiddleware stops oversized requests while they stream
+    max_size = get_max_upload_size()
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=413, detail=f"File too large ({max_size / (1024 * 1024):g}MB max)")
+
+
+async def _file_key(file: UploadFile) -> str:
+    digest = hashlib.sha256()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        digest.update(chunk)
+    await file.seek(0)
+    # Identical bytes against the same menu always parse the same way
+    return uploads.upload_key(digest.hexdigest())
 
+
+@contextmanager
+def _parse_errors():
+    """Turn parse pool and parsing failures into HTTP errors."""
     try:
-        food_items = load_food_items()
-        food_label_map = load_food_label_map()
-        df, raw_discrepancies, fmt = process_excel(excel_file, food_items)
+        yield
+    except workers.PoolBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry shortly", headers={"Retry-After": "5"})
+    except workers.PoolTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except BrokenProcessPool:
+        # Its worker was restarted under it; a retry runs on a fresh one
+        raise HTTPException(status_code=503, detail="Parser restarted, please retry", headers={"Retry-After": "1"})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to process file: {e}")
 
-    # Identify food columns (columns after the first 7 that contain Chinese characters)
-    food_columns = [col for col in df.columns[7:] if re.search(r"[\u4e00-\u9fff]", col)]
-
-    orders = []
-    for idx, row in df.iterrows():
-        item_quantities = {col: int(row[col]) for col in food_columns if int(row[col]) > 0}
-        orders.append(
-            OrderItem(
-                index=int(idx),
-                delivery=str(row["delivery"]),
-                customer=str(row["customer"]),
-                items_ordered=str(row["items_ordered"]),
-                phone_number=str(row["phone_number"]),
-                address=str(row["address"]),
-                city=str(row["city"]),
-                zip_code=str(row["zip_code"]),
-                item_quantities=item_quantities,
-            )
-        )
 
-    discrepancies = [Discrepancy(food_item=d[0], parsed_total=d[1], expected_total=d[2]) for d in raw_discrepancies]
+async def _parse_cached(file: UploadFile) -> Tuple[str, "ParsedUpload"]:
+    """Validate and parse one uploaded export, reusing the cached result for identical bytes.
+    Returns (upload id, parsed upload).
+    """
+    _check_file(file)
+    key = await _file_key(file)
+    parsed = uploads.upload_cache.get(key)
+    if parsed is None:
+        with _parse_errors():
+            parsed = await workers.parse_pool.parse(file.file, get_menu())
+        uploads.upload_cache.put(key, parsed)
+    return key, parsed
+
+
+def _discrepancies(parsed: "ParsedUpload") -> list[Discrepancy]:
+    return [Discrepancy(food_item=d[0], parsed_total=d[1], expected_total=d[2]) for d in parsed.discrepancies]
+
+
+def _order_items(parsed: "ParsedUpload", indices: List[int]) -> List[OrderItem]:
+    columns = parsed.columns
+    item_quantities = parsed.item_quantities()
+    return [
+        OrderItem(index=idx, item_quantities=item_quantities[idx], **{f: columns[f][idx] for f in uploads.ORDER_FIELDS})
+        for idx in indices
+    ]
+
+
+def _upload_response(parsed: "ParsedUpload", response_class=UploadResponse, **extra) -> UploadResponse:
+    return response_class(
+        orders=_order_items(parsed, list(range(len(parsed)))),
+        discrepancies=_discrepancies(parsed),
+        food_columns=parsed.food_items,
+        format=parsed.fmt,
+        food_column_labels=parsed.food_column_labels,
+        **extra,
+    )
+
+
+def _columnar_response(
+    parsed: "ParsedUpload", include_text: bool, response_class=ColumnarUploadResponse, **extra
+) -> ColumnarUploadResponse:
+    menu_ids = parsed.menu_ids
+    columns = parsed.columns
 
-    return UploadResponse(
-        orders=orders,
-        discrepancies=discrepancies,
-        food_columns=food_columns,
-        format=fmt,
-        food_column_labels=food_label_map,
+    return response_class(
+        orders=ColumnarOrders(
+            index=list(range(len(parsed))),
+            delivery=columns["delivery"],
+            customer=columns["customer"],
+            phone_number=columns["phone_number"],
+            address=columns["address"],
+            city=columns["city"],
+            zip_code=columns["zip_code"],
+            items_ordered=columns["items_ordered"] if include_text else None,
+        ),
+        quantities=SparseQuantities(
+            order=parsed.order_index,
+            item=[menu_ids[item_id] for item_id in parsed.item_id],
+            quantity=parsed.quantity,
+        ),
+        menu_ids=menu_ids,
+        discrepancies=_discrepancies(parsed),
+        food_columns=parsed.food_items,
+        format=parsed.fmt,
+        food_column_labels=parsed.food_column_labels,
+        **extra,
     )
@@ -1,29 +1,25 @@
-import json
 import logging
+import time
 from dataclasses import dataclass
-from pathlib import Path
 from typing import List, Tuple
 
-import requests
-from ortools.constraint_solver import pywrapcp, routing_enums_pb2
-
-logger = logging.getLogger("uvicorn.error")
-
-_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "geocode_cache.json"
+from app import metrics
+from app.geocache import geocode_cache
+from app.lazy import lazy_import
+from app.timing import stage
 
+requests = lazy_import("requests")
+pywrapcp = lazy_import("ortools.constraint_solver.pywrapcp")
+routing_enums_pb2 = lazy_import("ortools.constraint_solver.routing_enums_pb2")
 
-def _load_cache() -> dict:
-    """Load geocode cache from disk. Returns empty dict if file doesn't exist."""
-    try:
-        return json.loads(_CACHE_PATH.read_text())
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+logger = logging.getLogger("uvicorn.error")
 
 
-def _save_cache(cache: dict) -> None:
-    """Write geocode cache to disk."""
-    _CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    _CACHE_PATH.write_text(json.dumps(cache, indent=2))
+def warm_up() -> None:
+    """Import requests and OR-Tools and preload the geocode cache, so the first route doesn't wait for them."""
+    requests.Session
+    pywrapcp.RoutingModel(pywrapcp.RoutingIndexManager(2, 1, 0))
+    geocode_cache.preload()
 
 
 @dataclass
@@ -64,12 +60,13 @@ def geocode_address(
     full_address = f"{address}, {city} {zip_code}".strip()
 
     # Check cache first
-    cache = _load_cache()
-    if full_address in cache:
+    cached = geocode_cache.get(full_address)
+    if cached is not None:
         logger.info("Geocode cache hit: %s", full_address)
-        entry = cache[full_address]
-        return entry["lat"], entry["lng"]
+        metrics.geocode_cache_lookups.inc("hit")
+        return cached
 
+    metrics.geocode_cache_lookups.inc("miss")
     url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {"address": full_address, "key": api_key}
 
@@ -88,8 +85,7 @@ def geocode_address(
 
     # Save to cache
     logger.info("Geocode cache miss, calling API: %s", full_address)
-    cache[full_address] = {"lat": lat, "lng": lng}
-    _save_cache(cache)
+    geocode_cache.put(full_address, lat, lng)
 
     return lat, lng
 
@@ -133,6 +129,9 @@ def get_distance_matrix(
             if departure_time is not None:
                 params["departure_time"] = departure_time
 
+            # Billed per element, whatever the response
+            metrics.distance_matrix_requests.inc()
+            metrics.distance_matrix_elements.inc(amount=(i_end - i_start) * (j_end - j_start))
             try:
                 resp = requests.get(url, params=params, timeout=30)
                 resp.raise_for_status()
@@ -189,7 +188,9 @@ def solve_tsp(
     search_parameters.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
     search_parameters.time_limit.FromSeconds(5)
 
+    start = time.perf_counter()
     solution = routing.SolveWithParameters(search_parameters)
+    metrics.route_solve_seconds.observe(time.perf_counter() - start)
     if not solution:
         raise RoutingError("OR-Tools could not find a solution")
 
@@ -233,7 +234,8 @@ def optimize_route(
     locations: List[Location] = []
 
     # Geocode start
-    start_lat, start_lng = geocode_address(start_address, "", "", api_key)
+    with stage("geocode"):
+        start_lat, start_lng = geocode_address(start_address, "", "", api_key)
     locations.append(
         Location(address=start_address, city="", zip_code="", lat=start_lat, lng=start_lng, customer="Start", index=-1)
     )
@@ -242,7 +244,8 @@ def optimize_route(
     errors = []
     for order in orders:
         try:
-            lat, lng = geocode_address(order["address"], order["city"], order["zip_code"], api_key)
+            with stage("geocode"):
+                lat, lng = geocode_address(order["address"], order["city"], order["zip_code"], api_key)
             locations.append(
                 Location(
                     address=order["address"],
@@ -260,8 +263,10 @@ def optimize_route(
     if errors:
         raise GeocodingError("multiple addresses", "Failed to geocode: " + "; ".join(errors))
 
-    dist_matrix, dur_matrix = get_distance_matrix(locations, api_key, departure_time)
-    route_indices = solve_tsp(dist_matrix, 0)
+    with stage("distance_matrix"):
+        dist_matrix, dur_matrix = get_distance_matrix(locations, api_key, departure_time)
+    with stage("solve"):
+        route_indices = solve_tsp(dist_matrix, 0)
 
     stops = []
     for i, loc_idx in enumerate(route_indices):
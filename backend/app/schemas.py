@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Literal
 
 from pydantic import BaseModel
 
@@ -27,6 +27,73 @@ class UploadResponse(BaseModel):
     food_columns: List[str]
     format: str
     food_column_labels: Dict[str, str]
+    upload_id: str | None = None
+    session_id: str | None = None  # pass with order indices to /analyze, /route and /labels
+
+
+class ColumnarOrders(BaseModel):
+    """Order fields as parallel arrays, one entry per order."""
+
+    index: List[int]
+    delivery: List[str]
+    customer: List[str]
+    phone_number: List[str]
+    address: List[str]
+    city: List[str]
+    zip_code: List[str]
+    items_ordered: List[str] | None = None
+
+
+class SparseQuantities(BaseModel):
+    """Ordered items as (order position, menu id, quantity) triplets."""
+
+    order: List[int]
+    item: List[int]
+    quantity: List[int]
+
+
+class ColumnarUploadResponse(BaseModel):
+    orders: ColumnarOrders
+    quantities: SparseQuantities
+    menu_ids: List[int]  # menu id of each entry in food_columns
+    discrepancies: List[Discrepancy]
+    food_columns: List[str]
+    format: str
+    food_column_labels: Dict[str, str]
+    upload_id: str | None = None
+    session_id: str | None = None  # pass with order indices to /analyze, /route and /labels
+
+
+class UploadDeltaResponse(BaseModel):
+    upload_id: str
+    session_id: str | None = None
+    previous_upload_id: str
+    total_orders: int
+    previous_index: List[int | None]  # per new order: the previous order it continues, null if added
+    added: List[OrderItem]
+    changed: List[OrderItem]
+    removed: List[int]  # previous indices of orders that are gone
+    discrepancies: List[Discrepancy]
+    food_columns: List[str]
+    format: str
+    food_column_labels: Dict[str, str]
+
+
+class BatchFileResult(BaseModel):
+    filename: str
+    format: str
+    orders: int
+    duplicates: int  # orders already present in an earlier file
+    order_indices: List[int]  # merged index of each of this file's orders
+    discrepancies: List[Discrepancy]
+
+
+class BatchUploadResponse(UploadResponse):
+    files: List[BatchFileResult]
+
+
+class ColumnarBatchUploadResponse(ColumnarUploadResponse):
+    files: List[BatchFileResult]
 
 
 class MenuItem(BaseModel):
@@ -40,8 +107,31 @@ class MenuResponse(BaseModel):
     items: List[MenuItem]
 
 
+class MenuAlias(BaseModel):
+    segment: str
+    menu_id: int
+    item_zh: str
+
+
+class UnmatchedSegment(BaseModel):
+    segment: str
+    count: int
+
+
+class MenuAliasesResponse(BaseModel):
+    menu_version: str
+    hits: int
+    misses: int
+    hit_rate: float
+    aliases: List[MenuAlias]
+    unmatched: List[UnmatchedSegment]  # most frequent first
+
+
 class AnalyzeRequest(BaseModel):
-    orders: List[Dict[str, int]]
+    orders: List[Dict[str, int]] = []
+    # Instead of orders: an upload session and positions in it
+    session_id: str | None = None
+    indices: List[int] = []
 
 
 class SortedItem(BaseModel):
@@ -55,8 +145,54 @@ class AnalyzeResponse(BaseModel):
     orders_analyzed: int
 
 
+class AnalysisSelection(BaseModel):
+    name: str
+    indices: List[int]  # positions in BatchAnalyzeRequest.orders, or in the session
+
+
+class BatchAnalyzeRequest(BaseModel):
+    orders: List[Dict[str, int]] = []
+    selections: List[AnalysisSelection]
+    session_id: str | None = None  # selections index the session's orders instead
+
+
+class SelectionAnalysis(AnalyzeResponse):
+    name: str
+
+
+class BatchAnalyzeResponse(BaseModel):
+    selections: List[SelectionAnalysis]
+    combined: AnalyzeResponse  # all selections together; an order in two selections counts twice
+
+
+PivotDimension = Literal["city", "zip_code", "group"]
+
+
+class PivotRequest(BaseModel):
+    session_id: str
+    by: List[PivotDimension] = []
+    groups: Dict[str, List[int]] = {}  # group name -> order indices; other orders have group ""
+    where: Dict[PivotDimension, List[str]] = {}  # keep only these values of a dimension
+
+
+class PivotRow(BaseModel):
+    key: List[str]  # values of the by dimensions
+    quantities: List[int]  # per entry of food_columns
+    total_items: int
+    orders: int
+
+
+class PivotResponse(BaseModel):
+    by: List[PivotDimension]
+    food_columns: List[str]
+    rows: List[PivotRow]
+
+
 class LabelsRequest(BaseModel):
-    sorted_items: List[SortedItem]
+    sorted_items: List[SortedItem] = []
+    # Instead of sorted_items: label the totals of these orders of an upload session
+    session_id: str | None = None
+    indices: List[int] = []
 
 
 class RouteOrderInput(BaseModel):
@@ -68,7 +204,10 @@ class RouteOrderInput(BaseModel):
 
 
 class RouteRequest(BaseModel):
-    orders: List[RouteOrderInput]
+    orders: List[RouteOrderInput] = []
+    # Instead of orders: an upload session and positions in it
+    session_id: str | None = None
+    indices: List[int] = []
     start_address: str
     departure_time: int | None = None
 
@@ -0,0 +1,119 @@
+"""
+Server-side upload sessions.
+
+An upload's parsed orders stay on the server under a random session id, so
+/analyze, /route and /labels can take that id plus order indices instead of
+the orders themselves. Each session keeps its quantity table loaded in a
+DeliveryOrderAnalyzer. Sessions expire after SESSION_TTL_SECONDS without use,
+and the least recently used are dropped once SESSION_MAX_MB is exceeded.
+"""
+
+import secrets
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+from fastapi import HTTPException
+
+from app.analyzer import DeliveryOrderAnalyzer
+from app.cache import LRUCache
+from app.config import get_session_max_bytes, get_session_ttl
+from app.cube import OrderCube, build_cube
+from app.uploads import ParsedUpload
+
+# Entry limit on top of the memory budget; sessions are usually far larger than their bookkeeping
+MAX_SESSIONS = 10_000
+
+# Cubes kept per session, one per group assignment; regrouping usually goes back and forth
+CUBES_PER_SESSION = 4
+
+
+@dataclass
+class UploadSession:
+    upload: ParsedUpload
+    analyzer: DeliveryOrderAnalyzer
+    cubes: LRUCache[tuple, OrderCube] = field(default_factory=lambda: LRUCache(maxsize=CUBES_PER_SESSION))
+
+    def cube(self, groups: Mapping[str, Sequence[int]]) -> OrderCube:
+        """The pivot cube for this grouping of the orders, built on first use."""
+        key = tuple(sorted((name, tuple(sorted(indices))) for name, indices in groups.items()))
+        cube = self.cubes.get(key)
+        if cube is None:
+            cube = build_cube(self.upload, groups)
+            self.cubes.put(key, cube)
+        return cube
+
+    def route_orders(self, indices: List[int]) -> List[Dict]:
+        """Order dicts in the shape optimize_route expects, index being the position in the upload."""
+        columns = self.upload.columns
+        return [
+            {
+                "index": i,
+                "customer": columns["customer"][i],
+                "address": columns["address"][i],
+                "city": columns["city"][i],
+                "zip_code": columns["zip_code"][i],
+            }
+            for i in indices
+        ]
+
+
+def session_nbytes(session: UploadSession) -> int:
+    """Approximate memory held by a session: order strings, quantity lists and the analyzer table."""
+    upload = session.upload
+    strings = sum(sys.getsizeof(value) + 8 for values in upload.columns.values() for value in values)
+    # Small ints are shared, so the triplet lists cost about one pointer per value
+    triplets = 8 * (len(upload.order_index) + len(upload.item_id) + len(upload.quantity))
+    table = session.analyzer.quantities
+    return strings + triplets + (int(table.memory_usage(deep=True).sum()) if table is not None else 0)
+
+
+class SessionStore:
+    """Upload sessions by id, bounded by idle time and total size."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self._sessions: LRUCache[str, UploadSession] = LRUCache(
+            maxsize=MAX_SESSIONS, ttl=ttl, max_bytes=max_bytes, sizeof=session_nbytes
+        )
+
+    def create(self, upload: ParsedUpload) -> str:
+        """Store an upload and return its new session id."""
+        analyzer = DeliveryOrderAnalyzer()
+        analyzer.load(
+            pd.DataFrame(
+                {"order_index": upload.order_index, "item_id": upload.item_id, "quantity": upload.quantity},
+                dtype="int64",
+            ),
+            upload.food_items,
+        )
+        session_id = secrets.token_urlsafe(16)
+        self._sessions.put(session_id, UploadSession(upload=upload, analyzer=analyzer))
+        return session_id
+
+    def get(self, session_id: str) -> Optional[UploadSession]:
+        """The session (its idle timer restarted), or None once expired or evicted."""
+        return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id) is not None
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._sessions.stats()
+
+
+def session_for(session_id: str, indices: List[int]) -> UploadSession:
+    """The session, checking indices against it; 404 once it has expired, 400 for a bad index."""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session expired, please upload the file again")
+    n_orders = len(session.upload)
+    if any(not 0 <= i < n_orders for i in indices):
+        raise HTTPException(status_code=400, detail=f"Order index out of range (session has {n_orders} orders)")
+    return session
+
+
+session_store = SessionStore(max_bytes=get_session_max_bytes(), ttl=get_session_ttl())
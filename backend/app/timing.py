@@ -0,0 +1,79 @@
+"""
+Stage timers for the Server-Timing header and per-request timing logs.
+
+ServerTimingMiddleware starts a StageTimings for each request and code on the
+request path wraps its expensive steps in `with stage("name"):`. Outside a
+request, or with SERVER_TIMING=0, stage() only looks up a context variable, so
+the timers can stay in library code. Worker processes and executor threads do
+not share the request's context: parsing collects its own timings, returns them
+with the result and the server adds them to the request with record().
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Iterator, Mapping, Optional
+
+from app.config import get_server_timing
+
+enabled = get_server_timing()
+
+
+class StageTimings:
+    """Seconds spent per named stage; a stage entered several times accumulates."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, stages: Mapping[str, float]) -> None:
+        for name, seconds in stages.items():
+            self.add(name, seconds)
+
+    def header(self) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the block as stage name of the timings being collected, if any."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, perf_counter() - start)
+
+
+@contextmanager
+def collect() -> Iterator[StageTimings]:
+    """Collect stage() calls made in this context into a fresh StageTimings.
+
+    Nested collections are independent: the outer one only sees what is
+    record()ed into it. When timing is disabled nothing is collected.
+    """
+    timings = StageTimings()
+    if not enabled:
+        yield timings
+        return
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def record(stages: Mapping[str, float]) -> None:
+    """Add stages timed elsewhere, e.g. in a parse worker, to the timings being collected."""
+    timings = _current.get()
+    if timings is not None:
+        timings.merge(stages)
@@ -0,0 +1,374 @@
+"""
+Processed uploads in plain Python types, plus the content-addressed cache that
+lets a repeat upload of the same export skip parsing entirely and a re-export
+reuse every row that did not change.
+"""
+
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from itertools import accumulate, compress
+from typing import Collection, Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.aliases import AliasMatcher, AliasStats
+from app.analyzer import (
+    QUANTITY_COLUMNS,
+    detect_format,
+    load_sheet,
+    parse_order_items,
+    process_excel,
+    read_orders,
+    read_summary_table,
+    validate_against_summary,
+)
+from app.cache import LRUCache
+from app.config import get_upload_cache_size
+from app.menu import Menu, menu_version
+from app.timing import collect, stage
+
+ORDER_FIELDS = ["delivery", "customer", "items_ordered", "phone_number", "address", "city", "zip_code"]
+
+
+@dataclass
+class ParsedUpload:
+    """Everything /api/upload returns for one export, column-oriented.
+
+    Item quantities are sparse: the k-th ordered item is food_items[item_id[k]]
+    with quantity[k], belonging to order order_index[k].
+    """
+
+    columns: Dict[str, List[str]]  # ORDER_FIELDS -> one value per order, in sheet order
+    order_index: List[int]
+    item_id: List[int]
+    quantity: List[int]
+    discrepancies: List[Tuple[str, int, int]]
+    fmt: str
+    food_items: List[str]
+    food_column_labels: Dict[str, str]
+    menu_ids: List[int]  # menu id of each food item
+    alias_stats: AliasStats = field(default_factory=AliasStats, compare=False)
+    timings: Dict[str, float] = field(default_factory=dict, compare=False)  # parse stage -> seconds, see app.timing
+
+    def __len__(self) -> int:
+        return len(self.columns["delivery"])
+
+    def item_quantities(self) -> List[Dict[str, int]]:
+        """Per order: {food_item: quantity} for items actually ordered."""
+        result: List[Dict[str, int]] = [{} for _ in range(len(self))]
+        for order_index, item_id, quantity in zip(self.order_index, self.item_id, self.quantity):
+            result[order_index][self.food_items[item_id]] = quantity
+        return result
+
+
+def parse_upload(excel_file, menu: Menu, aliases: Optional[Dict[str, int]] = None) -> ParsedUpload:
+    """Run process_excel against menu and convert its DataFrames into a ParsedUpload.
+    aliases (segment -> menu id, see app.aliases) resolve known segments first.
+    Raises ValueError on bad input structure.
+    """
+    with collect() as timings:
+        matcher = AliasMatcher(menu, aliases or {})
+        df, quantities, discrepancies, fmt = process_excel(excel_file, list(menu.food_items), matcher=matcher)
+        with stage("convert"):
+            columns = {field: df[field].astype(str).tolist() for field in ORDER_FIELDS}
+            order_index, item_id, quantity = (quantities[name].tolist() for name in QUANTITY_COLUMNS)
+    return ParsedUpload(
+        columns=columns,
+        order_index=order_index,
+        item_id=item_id,
+        quantity=quantity,
+        discrepancies=discrepancies,
+        fmt=fmt,
+        food_items=list(menu.food_items),
+        food_column_labels=dict(menu.label_map),
+        menu_ids=[item["id"] for item in menu.items],
+        alias_stats=matcher.stats,
+        timings=timings.stages,
+    )
+
+
+def row_hashes(columns: Dict[str, List[str]]) -> List[int]:
+    """Stable 64-bit hash of each order's ORDER_FIELDS values.
+
+    Unlike hash(), the result is the same in every process, so worker processes
+    and the server agree on it.
+    """
+    return [
+        int.from_bytes(blake2b("\x1f".join(row).encode(), digest_size=8).digest(), "big")
+        for row in zip(*(columns[field] for field in ORDER_FIELDS))
+    ]
+
+
+@dataclass
+class ChangedRows:
+    """A re-export with only the rows missing from a previous upload parsed.
+
+    hashes covers every order in sheet order; columns and the quantity triplets
+    cover just the positions in rows, with order_index a sheet position.
+    """
+
+    fmt: str
+    summary: Dict[str, int]
+    hashes: List[int]
+    rows: List[int]
+    columns: Dict[str, List[str]]
+    order_index: List[int]
+    item_id: List[int]
+    quantity: List[int]
+    alias_stats: AliasStats = field(default_factory=AliasStats)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def parse_changed_rows(
+    excel_file, menu: Menu, known_hashes: Collection[int], aliases: Optional[Dict[str, int]] = None
+) -> ChangedRows:
+    """Load an export and parse the items of orders whose row hash is not in known_hashes.
+    aliases are used as in parse_upload. Raises ValueError on bad input structure.
+    """
+    with collect() as timings:
+        with stage("xlsx"):
+            sheet = load_sheet(excel_file)
+        with stage("summary"):
+            fmt = detect_format(sheet)
+            summary = read_summary_table(sheet, fmt)
+        with stage("orders"):
+            df = read_orders(sheet, fmt)
+
+        with stage("hash"):
+            columns = {field: df[field].astype(str).tolist() for field in ORDER_FIELDS}
+            hashes = row_hashes(columns)
+            known = set(known_hashes)
+            rows = [i for i, h in enumerate(hashes) if h not in known]
+
+        matcher = AliasMatcher(menu, aliases or {})
+        with stage("match"):
+            quantities = parse_order_items(df["items_ordered"].iloc[rows], list(menu.food_items), matcher)
+    return ChangedRows(
+        fmt=fmt,
+        summary=summary,
+        hashes=hashes,
+        rows=rows,
+        columns={field: [values[i] for i in rows] for field, values in columns.items()},
+        order_index=[rows[k] for k in quantities["order_index"].tolist()],
+        item_id=quantities["item_id"].tolist(),
+        quantity=quantities["quantity"].tolist(),
+        alias_stats=matcher.stats,
+        timings=timings.stages,
+    )
+
+
+@dataclass
+class UploadDelta:
+    """How a re-export differs from a previous upload.
+
+    previous_index gives, per order of the new upload, the previous order it
+    continues (None when added). changed orders kept their delivery number but
+    not their content; removed holds previous indices with no successor.
+    """
+
+    upload: ParsedUpload
+    previous_index: List[Optional[int]]
+    added: List[int]
+    changed: List[int]
+    removed: List[int]
+
+
+def apply_delta(previous: ParsedUpload, changes: ChangedRows, menu: Menu) -> UploadDelta:
+    """Assemble the full upload for a re-export from its changed rows and the previous upload.
+
+    Orders are first matched on content, by occurrence as in merge_uploads;
+    unmatched ones then pair up with a leftover previous order of the same
+    delivery number and count as changed. Unchanged orders, including repeats
+    of a known row, take their fields and quantities from the previous upload.
+    """
+    by_hash: Dict[int, List[int]] = defaultdict(list)
+    for i, h in enumerate(row_hashes(previous.columns)):
+        by_hash[h].append(i)
+
+    n = len(changes.hashes)
+    previous_index: List[Optional[int]] = [None] * n
+    used = [False] * len(previous)
+    occurrences: Counter = Counter()
+    for i, h in enumerate(changes.hashes):
+        candidates = by_hash.get(h)
+        if candidates:
+            k = occurrences[h]
+            occurrences[h] = k + 1
+            if k < len(candidates):
+                previous_index[i] = candidates[k]
+                used[candidates[k]] = True
+
+    # Every order is either parsed or has a previous order with identical content to copy from
+    parsed_pos: Dict[int, int] = {row: pos for pos, row in enumerate(changes.rows)}
+    source = [0 if i in parsed_pos else by_hash[h][0] for i, h in enumerate(changes.hashes)]
+    columns: Dict[str, List[str]] = {}
+    for name in ORDER_FIELDS:
+        values = previous.columns[name]
+        column = [values[j] for j in source]
+        for row, value in zip(changes.rows, changes.columns[name]):
+            column[row] = value
+        columns[name] = column
+
+    leftovers: Dict[str, Deque[int]] = defaultdict(deque)
+    for j in range(len(previous)):
+        if not used[j]:
+            leftovers[previous.columns["delivery"][j]].append(j)
+
+    added: List[int] = []
+    changed: List[int] = []
+    for i in range(n):
+        if previous_index[i] is not None:
+            continue
+        candidates = leftovers.get(columns["delivery"][i])
+        if candidates:
+            j = candidates.popleft()
+            previous_index[i] = j
+            used[j] = True
+            changed.append(i)
+        else:
+            added.append(i)
+    removed = [j for j in range(len(previous)) if not used[j]]
+
+    # Both triplet lists are sorted by order, so each order's items are one slice
+    previous_offsets = _order_offsets(previous.order_index, len(previous))
+    parsed_offsets = _order_offsets(changes.order_index, n)
+    order_index: List[int] = []
+    item_id: List[int] = []
+    quantity: List[int] = []
+    for i in range(n):
+        if i in parsed_pos:
+            ids, qtys, start, end = changes.item_id, changes.quantity, parsed_offsets[i], parsed_offsets[i + 1]
+        else:
+            j = source[i]
+            ids, qtys, start, end = previous.item_id, previous.quantity, previous_offsets[j], previous_offsets[j + 1]
+        order_index.extend([i] * (end - start))
+        item_id.extend(ids[start:end])
+        quantity.extend(qtys[start:end])
+
+    food_items = list(menu.food_items)
+    quantities = pd.DataFrame(dict(zip(QUANTITY_COLUMNS, (order_index, item_id, quantity))), dtype="int64")
+    upload = ParsedUpload(
+        columns=columns,
+        order_index=order_index,
+        item_id=item_id,
+        quantity=quantity,
+        discrepancies=validate_against_summary(quantities, food_items, changes.summary),
+        fmt=changes.fmt,
+        food_items=food_items,
+        food_column_labels=dict(menu.label_map),
+        menu_ids=[item["id"] for item in menu.items],
+    )
+    return UploadDelta(upload=upload, previous_index=previous_index, added=added, changed=changed, removed=removed)
+
+
+@dataclass
+class MergedUpload:
+    """Several parsed exports combined into one deduplicated set of orders."""
+
+    upload: ParsedUpload  # merged orders; discrepancies are the combined ones
+    order_indices: List[List[int]]  # per part: merged index of each of its orders
+    duplicates: List[int]  # per part: orders already present in an earlier part
+
+
+def merge_uploads(parts: List[ParsedUpload]) -> MergedUpload:
+    """Concatenate parsed exports in order, dropping orders already seen in an earlier export.
+
+    Orders are identical when every ORDER_FIELDS value matches. Matching is by
+    occurrence, so an order listed twice in one export and once in another is
+    kept twice. All parts must have been parsed against the same menu.
+
+    Combined discrepancies compare merged item totals with the summed summary
+    tables less what dropped duplicates contributed. Duplicates count on both
+    sides, so that difference is the sum of each export's (expected - parsed).
+    When those differences cancel out (one export short, another over) the
+    item is not listed; only the per-export discrepancies show it.
+    """
+    if not parts:
+        raise ValueError("No uploads to merge")
+    first = parts[0]
+
+    columns: Dict[str, List[str]] = {field: [] for field in ORDER_FIELDS}
+    order_index: List[int] = []
+    item_id: List[int] = []
+    quantity: List[int] = []
+    seen: Dict[tuple, List[int]] = {}
+    order_indices: List[List[int]] = []
+    duplicates: List[int] = []
+
+    for part in parts:
+        occurrences: Counter = Counter()
+        added: Dict[tuple, List[int]] = defaultdict(list)
+        mapping: List[int] = []
+        new_rows: List[int] = []
+        size = len(columns["delivery"])
+        for local, key in enumerate(zip(*(part.columns[name] for name in ORDER_FIELDS))):
+            n = occurrences[key]
+            occurrences[key] = n + 1
+            earlier = seen.get(key)
+            if earlier is not None and n < len(earlier):
+                mapping.append(earlier[n])
+                continue
+            merged = size + len(new_rows)
+            new_rows.append(local)
+            added[key].append(merged)
+            mapping.append(merged)
+        for name in ORDER_FIELDS:
+            values = part.columns[name]
+            columns[name].extend(values[local] for local in new_rows)
+
+        # Only earlier exports count as duplicates, so this one's orders join seen afterwards
+        for key, indices in added.items():
+            seen.setdefault(key, []).extend(indices)
+
+        remapped = [mapping[local] for local in part.order_index]
+        kept = [merged >= size for merged in remapped]
+        order_index.extend(compress(remapped, kept))
+        item_id.extend(compress(part.item_id, kept))
+        quantity.extend(compress(part.quantity, kept))
+
+        order_indices.append(mapping)
+        duplicates.append(len(part) - len(new_rows))
+
+    parsed_totals: Counter = Counter()
+    for k, qty in zip(item_id, quantity):
+        parsed_totals[first.food_items[k]] += qty
+    missing: Counter = Counter()
+    for part in parts:
+        for food_item, parsed_total, expected_total in part.discrepancies:
+            missing[food_item] += expected_total - parsed_total
+    discrepancies = [
+        (food_item, parsed_totals[food_item], parsed_totals[food_item] + missing[food_item])
+        for food_item in first.food_items
+        if missing[food_item]
+    ]
+
+    formats = {part.fmt for part in parts}
+    upload = ParsedUpload(
+        columns=columns,
+        order_index=order_index,
+        item_id=item_id,
+        quantity=quantity,
+        discrepancies=discrepancies,
+        fmt=formats.pop() if len(formats) == 1 else "mixed",
+        food_items=first.food_items,
+        food_column_labels=first.food_column_labels,
+        menu_ids=first.menu_ids,
+    )
+    return MergedUpload(upload=upload, order_indices=order_indices, duplicates=duplicates)
+
+
+def _order_offsets(order_index: List[int], n: int) -> List[int]:
+    """Start of each order's triplets in a sorted order_index list, plus the end."""
+    counts = [0] * (n + 1)
+    for order in order_index:
+        counts[order + 1] += 1
+    return list(accumulate(counts))
+
+
+def upload_key(digest: str) -> str:
+    """Cache key for an upload: SHA-256 hex digest of the file bytes plus the menu version."""
+    return f"{digest}:{menu_version()}"
+
+
+upload_cache: LRUCache[str, ParsedUpload] = LRUCache(maxsize=get_upload_cache_size())
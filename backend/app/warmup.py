@@ -0,0 +1,132 @@
+"""
+Startup warm-up, run in a background thread shortly after the server starts accepting requests.
+
+Cold starts defer pandas, OR-Tools, ReportLab and requests (see app.lazy) so
+/health answers quickly. Warm-up then pays for them off the request path: it
+reads the menu, parses a one-order export, loads the label font, imports the
+routing libraries, reads the geocode cache and starts the parse workers, so
+the first upload, label sheet or route is as fast as later ones.
+
+The steps hold the GIL for most of their run, so requests served meanwhile
+are slower; the thread waits WARMUP_DELAY_SECONDS before its first step and
+pauses between steps to let them through. /ready answers 503 until it has
+finished, and load balancers should gate traffic on it rather than /health.
+"""
+
+import io
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from app import labels, routing
+from app.lazy import lazy_import
+from app.menu import Menu, get_menu
+
+logger = logging.getLogger("uvicorn.error")
+
+live = lazy_import("app.live")
+openpyxl = lazy_import("openpyxl")
+sessions = lazy_import("app.sessions")
+uploads = lazy_import("app.uploads")
+workers = lazy_import("app.workers")
+
+
+def _one_order_export(menu: Menu) -> bytes:
+    """A raw-layout export with a single order of the first menu item, and its summary table."""
+    item = menu.food_items[0]
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(["Warm-up"])
+    ws.append([])
+    ws.append([])
+    ws.append(["序号", "姓名", "内容", "标签", "手机号码", "收货地址", "所在城市", "邮政编码"])
+    ws.append([1, "warm-up", f"{item}x1， 总价：$1.00", "", "4085550100", "1 Main St", "San Jose", "95110"])
+    ws.append([])
+    ws.append(["商品", None, "数量"])
+    ws.append([item, None, 1])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def warm_parsing() -> None:
+    """Parse a one-order export end to end, loading pandas, the Excel reader,
+    the menu matcher and the ZIP index. Touches no upload cache or aliases.
+    """
+    menu = get_menu()
+    uploads.parse_upload(io.BytesIO(_one_order_export(menu)), menu)
+
+
+def _warm_sessions() -> None:
+    live.LiveTotals
+    sessions.session_store
+
+
+def _warm_parse_pool() -> None:
+    workers.parse_pool.warm_up()
+
+
+STEPS: Sequence[Tuple[str, Callable[[], object]]] = (
+    ("menu", get_menu),
+    ("parsing", warm_parsing),
+    ("sessions", _warm_sessions),
+    ("labels", labels.warm_up),
+    ("routing", routing.warm_up),
+    ("parse_pool", _warm_parse_pool),
+)
+
+
+class WarmUp:
+    """Runs the warm-up steps once and reports their progress for /ready."""
+
+    STEP_PAUSE = 0.05  # seconds between steps, for requests waiting on the GIL
+
+    def __init__(self, steps: Sequence[Tuple[str, Callable[[], object]]] = STEPS):
+        self.steps = steps
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.skipped = False
+        self._done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def run(self, delay: float = 0.0) -> None:
+        """Run every step in order, after waiting delay seconds. A failing step is
+        logged and skipped; it only means the first request that needs it pays for it instead.
+        """
+        time.sleep(delay)
+        start = time.perf_counter()
+        for i, (name, step) in enumerate(self.steps):
+            if i:
+                time.sleep(self.STEP_PAUSE)
+            step_start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning("Warm-up step %s failed: %s", name, e)
+                self.errors[name] = str(e)
+            self.timings[name] = time.perf_counter() - step_start
+        self._done.set()
+        logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - start) * 1000)
+
+    def skip(self) -> None:
+        """Report ready without warming anything (WARMUP=0)."""
+        self.skipped = True
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "skipped": self.skipped,
+            "steps": {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+            "errors": dict(self.errors),
+        }
+
+
+warmup = WarmUp()
@@ -0,0 +1,224 @@
+"""
+Bounded pool that runs CPU-heavy export parsing off the event loop.
+
+With PARSE_WORKERS > 0 jobs run in a process pool so parallel uploads use
+several cores; with 0 they run in the default thread pool, which keeps the
+event loop free but shares the GIL. In both modes at most PARSE_MAX_PENDING
+jobs may be queued or running. A job still running after PARSE_TIMEOUT_SECONDS
+gets a timeout error. A thread can only be left to finish and keeps counting
+against the limit until it does. A process pool is retired instead: new jobs
+go to a fresh pool, and the old one's workers are stopped once the other jobs
+running on it have finished, since stopping any worker fails all of them.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Callable, Collection, Dict, List, Set, TypeVar
+
+from app import warmup
+from app.aliases import AliasStats, alias_table
+from app.config import get_parse_max_pending, get_parse_timeout, get_parse_workers
+from app.menu import Menu
+from app.timing import record, stage
+from app.uploads import ChangedRows, ParsedUpload, parse_changed_rows, parse_upload
+
+T = TypeVar("T")
+
+
+class PoolBusyError(Exception):
+    """Raised when the pool already has max_pending jobs queued or running."""
+
+
+class PoolTimeoutError(Exception):
+    """Raised when a job does not finish within the pool's timeout."""
+
+
+class ParsePool:
+    def __init__(self, max_workers: int, timeout: float, max_pending: int):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        # Jobs in flight per process pool, and the timed-out ones of pools being retired
+        self._jobs: Dict[ProcessPoolExecutor, Set[asyncio.Future]] = {}
+        self._retiring: Dict[ProcessPoolExecutor, Set[asyncio.Future]] = {}
+        self._workers: Dict[ProcessPoolExecutor, List[multiprocessing.Process]] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the parent runs threads (uvicorn, anyio) that fork would copy mid-flight
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # Queued jobs are cancelled, and run() resubmits them to the next pool
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _retire(self, executor: ProcessPoolExecutor, hung: "asyncio.Future") -> None:
+        """Send no more jobs to executor, and stop its workers once only timed-out jobs are left on it."""
+        if executor not in self._retiring:
+            # shutdown() forgets the processes, and lets running jobs finish; a hung one would hold its worker forever
+            self._workers[executor] = list(executor._processes.values())
+            self._retiring[executor] = set()
+            self._discard_executor(executor)
+        self._retiring[executor].add(hung)
+        self._reap(executor)
+
+    def _reap(self, executor: ProcessPoolExecutor) -> None:
+        hung = self._retiring.get(executor)
+        if hung is None or not self._jobs.get(executor, set()) <= hung:
+            return
+        del self._retiring[executor]
+        for process in self._workers.pop(executor):
+            process.terminate()
+
+    def _job_done(self, executor: ProcessPoolExecutor, future: "asyncio.Future") -> None:
+        jobs = self._jobs[executor]
+        jobs.discard(future)
+        self._reap(executor)
+        if not jobs:
+            del self._jobs[executor]
+
+    def _release(self, future: "asyncio.Future") -> None:
+        self.pending -= 1
+        if not future.cancelled():
+            future.exception()  # retrieved here when nobody awaits it any more
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run fn(*args) in the pool and await its result.
+
+        Raises PoolBusyError when the queue is full and PoolTimeoutError when
+        the job takes longer than timeout; exceptions raised by fn propagate.
+        A job counts as pending until it really ends: on timeout its process
+        pool is retired (see _retire), while a thread is left to finish.
+        """
+        if self.pending >= self.max_pending:
+            raise PoolBusyError(f"{self.pending} parse jobs already pending")
+
+        loop = asyncio.get_running_loop()
+        timeout = self.timeout
+        deadline = loop.time() + timeout
+        while True:
+            executor = self._get_executor() if self.max_workers > 0 else None
+            future = loop.run_in_executor(executor, fn, *args)
+            self.pending += 1
+            future.add_done_callback(self._release)
+            if executor is not None:
+                self._jobs.setdefault(executor, set()).add(future)
+                future.add_done_callback(functools.partial(self._job_done, executor))
+            try:
+                # shield: a timeout or a disconnected client stops the wait, not the job
+                return await asyncio.wait_for(asyncio.shield(future), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                if executor is not None:
+                    self._retire(executor, future)
+                raise PoolTimeoutError(f"Parsing did not finish within {timeout:g}s")
+            except asyncio.CancelledError:
+                # Still queued when its pool was shut down: run it on the next one
+                if executor is not None and future.cancelled():
+                    continue
+                raise
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory, or a timed-out job was stopped); start fresh next time
+                self._discard_executor(executor)
+                raise
+
+    async def run_on_file(self, fn: Callable[..., T], excel_file: IO[bytes], *args) -> T:
+        """Run fn(file, *args) in the pool on an uploaded file."""
+        if self.max_workers == 0:
+            return await self.run(fn, excel_file, *args)
+
+        # Worker processes can't share the open file, so hand them a named copy on disk
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as tmp:
+            await asyncio.to_thread(_spill, excel_file, tmp)
+            return await self.run(_call_with_path, fn, tmp.name, *args)
+
+    async def parse(self, excel_file: IO[bytes], menu: Menu) -> ParsedUpload:
+        """Parse an uploaded export with parse_upload in the pool, with the learned
+        segment aliases in front of the matcher; what it learns goes back into them,
+        and its stage timings into the request's (see app.timing).
+        """
+        with stage("parse"):
+            parsed = await self.run_on_file(parse_upload, excel_file, menu, alias_table.snapshot(menu))
+        record(parsed.timings)
+        await _record_aliases(menu, parsed.alias_stats)
+        return parsed
+
+    async def parse_changed(self, excel_file: IO[bytes], menu: Menu, known_hashes: Collection[int]) -> ChangedRows:
+        """Parse only the orders of a re-export whose row hash is not in known_hashes."""
+        with stage("parse"):
+            changes = await self.run_on_file(
+                parse_changed_rows, excel_file, menu, known_hashes, alias_table.snapshot(menu)
+            )
+        record(changes.timings)
+        await _record_aliases(menu, changes.alias_stats)
+        return changes
+
+    def warm_up(self) -> None:
+        """Start the worker processes and warm each one's parsing code (see
+        app.warmup), so the first upload doesn't wait for spawned interpreters.
+        """
+        if self.max_workers == 0:
+            return
+        executor = self._get_executor()
+        try:
+            # One job per worker, submitted together so they don't all land on the first one to start
+            list(executor.map(_warm_worker, range(self.max_workers), timeout=self.timeout))
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        # Pools still waiting to stop a hung worker
+        self._retiring.clear()
+        for workers in self._workers.values():
+            for process in workers:
+                process.terminate()
+        self._workers.clear()
+
+
+async def _record_aliases(menu: Menu, stats: AliasStats) -> None:
+    # Only a table that learned something is saved, and the file write stays off the event loop
+    if alias_table.record(menu, stats):
+        await asyncio.to_thread(alias_table.flush)
+
+
+def _warm_worker(_: int) -> None:
+    warmup.warm_parsing()
+
+
+def _call_with_path(fn: Callable[..., T], path: str, *args) -> T:
+    with open(path, "rb") as f:
+        return fn(f, *args)
+
+
+def _spill(src: IO[bytes], dst: IO[bytes]) -> None:
+    src.seek(0)
+    shutil.copyfileobj(src, dst, 64 * 1024)
+    dst.flush()
+
+
+parse_pool = ParsePool(
+    max_workers=get_parse_workers(),
+    timeout=get_parse_timeout(),
+    max_pending=get_parse_max_pending(),
+)
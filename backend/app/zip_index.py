@@ -0,0 +1,93 @@
+"""
+California ZIP code -> city lookup.
+
+The table (data/ca_zip_cities.csv, USPS primary city per ZIP) is read on first
+use into an array indexed by the integer ZIP, so a lookup is one array access
+no matter how many ZIPs are covered. ZIPs missing from the table fall back to
+their 3-digit prefix when one city accounts for most of that prefix.
+"""
+
+import csv
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+_ZIP_CITIES_PATH = Path(__file__).resolve().parent.parent / "data" / "ca_zip_cities.csv"
+
+# A prefix stands in for its ZIPs only when this share of them has the same city
+ZIP3_MIN_SHARE = 0.9
+
+_ZIP = re.compile(r"(\d{5})(?:-\d{4})?")
+
+
+@dataclass(frozen=True)
+class ZipIndex:
+    """City codes per ZIP and per ZIP3 prefix; -1 where unknown."""
+
+    base: int  # ZIP at position 0 of zip_codes; a multiple of 100
+    zip_codes: np.ndarray
+    zip3_codes: np.ndarray
+    cities: List[str]
+
+    def lookup(self, zip_codes: pd.Series) -> pd.Series:
+        """City for each ZIP (5 digits, optionally ZIP+4), None when unknown."""
+        codes, uniques = pd.factorize(zip_codes)
+        # Only distinct values are parsed; position -1 covers missing values
+        zips = np.array([_parse_zip(value) for value in uniques] + [-1], dtype="int64")
+
+        exact = _take(self.zip_codes, zips - self.base)
+        by_prefix = _take(self.zip3_codes, zips // 100 - self.base // 100)
+        city_codes = np.where(exact >= 0, exact, by_prefix)
+
+        names = np.array(self.cities + [None], dtype=object)
+        return pd.Series(names[city_codes][codes], index=zip_codes.index, dtype=object)
+
+
+def _parse_zip(value) -> int:
+    match = _ZIP.fullmatch(value) if isinstance(value, str) else None
+    return int(match.group(1)) if match else -1
+
+
+def _take(table: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    inside = (positions >= 0) & (positions < len(table))
+    return np.where(inside, table[np.where(inside, positions, 0)], -1)
+
+
+def load_zip_index(path: Path = _ZIP_CITIES_PATH) -> ZipIndex:
+    """Build a ZipIndex from a zip,city CSV."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [(int(row["zip"]), row["city"]) for row in csv.DictReader(f)]
+
+    cities = sorted({city for _, city in rows})
+    city_code = {city: i for i, city in enumerate(cities)}
+    base = min(z for z, _ in rows) // 100 * 100
+    zip_codes = np.full(max(z for z, _ in rows) - base + 1, -1, dtype="int16")
+    prefix_counts: defaultdict = defaultdict(Counter)
+    for z, city in rows:
+        zip_codes[z - base] = city_code[city]
+        prefix_counts[z // 100][city] += 1
+
+    zip3_codes = np.full(len(zip_codes) // 100 + 1, -1, dtype="int16")
+    for prefix, counts in prefix_counts.items():
+        city, count = counts.most_common(1)[0]
+        if count >= ZIP3_MIN_SHARE * sum(counts.values()):
+            zip3_codes[prefix - base // 100] = city_code[city]
+
+    return ZipIndex(base=base, zip_codes=zip_codes, zip3_codes=zip3_codes, cities=cities)
+
+
+@lru_cache(maxsize=1)
+def get_zip_index() -> ZipIndex:
+    """The California index, loaded on first use."""
+    return load_zip_index()
+
+
+def cities_for_zips(zip_codes: pd.Series) -> pd.Series:
+    """City for each ZIP in a column, None when neither the ZIP nor its prefix is known."""
+    return get_zip_index().lookup(zip_codes)
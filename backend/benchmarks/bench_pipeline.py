@@ -0,0 +1,161 @@
+"""Time each stage of the upload pipeline on synthetic exports.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pipeline [--orders 1000,10000,100000] [--format raw,formatted] [--repeat 3]
+                                        [--save NAME] [--compare NAME] [--threshold 0.2]
+
+Stages: load_sheet, detect_format, read_summary_table, process_excel (all of
+parsing, from bytes), validate_against_summary, POST /api/upload end to end
+and generate_labels_pdf for every item ordered. Timing starts once the app's
+startup warm-up has finished, and each stage reports the best of --repeat
+runs. --save writes the results to benchmarks/results/NAME.json;
+--compare prints each stage against a saved run and exits with status 1 if
+any is more than --threshold slower.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+os.environ.setdefault("APP_PASSWORD", "benchmark")
+# A 100k-order export is about 7 MB, over the server's default limit
+os.environ.setdefault("MAX_UPLOAD_MB", "64")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.aliases import alias_table  # noqa: E402
+from app.analyzer import (  # noqa: E402
+    detect_format,
+    load_sheet,
+    process_excel,
+    read_summary_table,
+    validate_against_summary,
+)
+from app.labels import generate_labels_pdf  # noqa: E402
+from app.main import app  # noqa: E402
+from app.menu import get_menu  # noqa: E402
+from app.sessions import session_store  # noqa: E402
+from app.uploads import upload_cache  # noqa: E402
+from app.warmup import warmup  # noqa: E402
+from benchmarks.synthetic_export import FORMATS, generate_export  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _best(fn: Callable[[], object], repeat: int, reset: Callable[[], None] = lambda: None) -> float:
+    timings = []
+    for _ in range(repeat):
+        reset()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _reset_server_state() -> None:
+    # Every upload is parsed afresh, without help from earlier runs' aliases
+    upload_cache.clear()
+    session_store.clear()
+    alias_table.clear()
+
+
+def bench_case(client: TestClient, n_orders: int, fmt: str, repeat: int) -> Dict[str, float]:
+    """Seconds per stage for one synthetic export."""
+    data = generate_export(n_orders, fmt)
+    food_items = get_menu().food_items
+    sheet = load_sheet(io.BytesIO(data))
+    summary = read_summary_table(sheet, fmt)
+    _df, quantities, discrepancies, _fmt = process_excel(io.BytesIO(data), food_items)
+    if discrepancies:
+        raise RuntimeError(f"Synthetic {fmt} export with {n_orders} orders parsed with discrepancies: {discrepancies}")
+    totals = quantities.groupby("item_id")["quantity"].sum().sort_values(ascending=False, kind="stable")
+    sorted_items = [(food_items[item_id], int(qty)) for item_id, qty in totals.items()]
+
+    def upload():
+        files = {"file": (f"synthetic_{fmt}_{n_orders}.xlsx", data, XLSX)}
+        response = client.post("/api/upload", files=files, headers={"X-Password": os.environ["APP_PASSWORD"]})
+        response.raise_for_status()
+
+    return {
+        "load_sheet": _best(lambda: load_sheet(io.BytesIO(data)), repeat),
+        "detect_format": _best(lambda: detect_format(sheet), repeat),
+        "read_summary_table": _best(lambda: read_summary_table(sheet, fmt), repeat),
+        "process_excel": _best(lambda: process_excel(io.BytesIO(data), food_items), repeat),
+        "validate_against_summary": _best(lambda: validate_against_summary(quantities, food_items, summary), repeat),
+        "upload": _best(upload, repeat, _reset_server_state),
+        "generate_labels_pdf": _best(lambda: generate_labels_pdf(sorted_items, get_menu().label_lookup), repeat),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> bool:
+    """Print each stage against the baseline; True if none is more than threshold slower."""
+    ok = True
+    print(f"\n{'case':<18} {'stage':<26} {'baseline (s)':>12} {'now (s)':>10} {'ratio':>7}")
+    for case, stages in results.items():
+        for stage, seconds in stages.items():
+            before = baseline.get(case, {}).get(stage)
+            if before is None:
+                continue
+            ratio = seconds / before if before else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                ok = False
+            print(f"{case:<18} {stage:<26} {before:>12.4f} {seconds:>10.4f} {ratio:>6.2f}x{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", default="1000,10000,100000", help="comma-separated order counts")
+    parser.add_argument("--format", default=",".join(FORMATS), help="comma-separated export layouts")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", metavar="NAME", help="write results to benchmarks/results/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare with benchmarks/results/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads((RESULTS_DIR / f"{args.compare}.json").read_text())["results"]
+
+    # Uploads would otherwise teach the app's real alias table
+    tmp_dir = tempfile.TemporaryDirectory()
+    alias_table.path = Path(tmp_dir.name) / "menu_aliases.json"
+
+    results: Dict[str, Dict[str, float]] = {}
+    columns = ("load", "detect", "summary", "process", "validate", "upload", "labels")
+    print(f"{'case':<18} " + " ".join(f"{column:>12}" for column in columns))
+    with TestClient(app) as client:
+        # Keep the background warm-up (parse workers, imports) from competing with the timed runs
+        warmup.wait()
+        for fmt in args.format.split(","):
+            for n_orders in (int(n) for n in args.orders.split(",")):
+                case = f"{fmt}/{n_orders}"
+                results[case] = bench_case(client, n_orders, fmt, args.repeat)
+                print(f"{case:<18} " + " ".join(f"{seconds:>12.4f}" for seconds in results[case].values()))
+    _reset_server_state()
+    tmp_dir.cleanup()
+
+    if args.save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "repeat": args.repeat}
+        path = RESULTS_DIR / f"{args.save}.json"
+        path.write_text(json.dumps({"meta": meta, "results": results}, indent=2) + "\n")
+        print(f"\nSaved to {path}")
+
+    if baseline is not None and not compare(results, baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
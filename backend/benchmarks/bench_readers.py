@@ -0,0 +1,78 @@
+"""Compare Excel reader backends on a large synthetic WeChat export.
+
+Usage (from backend/):
+    python -m benchmarks.bench_readers [--orders 20000] [--repeat 3]
+
+Each backend runs in a fresh subprocess so peak RSS reflects that backend
+alone. The 'pandas' row is pd.read_excel, the loader used before the
+reader abstraction, kept as a reference point.
+"""
+
+import argparse
+import io
+import multiprocessing as mp
+import resource
+import time
+
+from app.analyzer import load_food_items
+from benchmarks.synthetic_export import generate_export
+
+BACKENDS = ["pandas", "openpyxl", "calamine"]
+
+
+def _run(backend: str, data: bytes, repeat: int, queue) -> None:
+    import pandas as pd
+
+    from app.analyzer import get_excel_reader, load_sheet, process_excel
+
+    food_items = load_food_items()
+    if backend == "calamine" and get_excel_reader("calamine").name != "calamine":
+        queue.put(None)
+        return
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if backend == "pandas":
+            pd.read_excel(io.BytesIO(data), skiprows=3, header=None)
+        else:
+            load_sheet(io.BytesIO(data), get_excel_reader(backend))
+        timings.append(time.perf_counter() - start)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    parse_time = None
+    if backend != "pandas":
+        start = time.perf_counter()
+        process_excel(io.BytesIO(data), food_items, get_excel_reader(backend))
+        parse_time = time.perf_counter() - start
+    queue.put((min(timings), parse_time, (rss_after - rss_before) / 1024))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = generate_export(args.orders)
+    print(f"{args.orders} orders, {len(data) / 1024:.0f} KiB xlsx")
+    print(f"{'backend':<10} {'load (s)':>10} {'process_excel (s)':>18} {'load RSS growth (MiB)':>22}")
+
+    ctx = mp.get_context("spawn")
+    for backend in BACKENDS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(backend, data, args.repeat, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        if result is None:
+            print(f"{backend:<10} {'not installed':>10}")
+            continue
+        load_time, parse_time, rss = result
+        parse_col = f"{parse_time:.3f}" if parse_time is not None else "-"
+        print(f"{backend:<10} {load_time:>10.3f} {parse_col:>18} {rss:>22.1f}")
+
+
+if __name__ == "__main__":
+    main()
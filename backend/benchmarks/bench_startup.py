@@ -0,0 +1,103 @@
+"""Measure API cold start: importing app.main and serving the first requests.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--repeat 5] [--budget-ms 600]
+
+Each run starts uvicorn in a fresh process, like a Render instance waking up,
+and times how long until /health answers and then the first /api/menu. The
+import time of app.main is measured separately in its own fresh interpreter.
+Heavy modules (pandas, OR-Tools, ReportLab, requests) should not be loaded by
+either. Exits with status 1 when the median time to /health exceeds the budget.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "python_calamine", "reportlab.pdfgen", "ortools", "requests"]
+
+_IMPORT_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+
+
+def measure_import(env: dict) -> tuple:
+    """(seconds to import app.main, heavy modules it loaded) in a fresh interpreter."""
+    out = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT], env=env, capture_output=True, text=True, check=True)
+    seconds, loaded = out.stdout.split("\n")[:2]
+    return float(seconds), [m for m in loaded.split(",") if m]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url: str, headers: dict) -> int:
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=5) as resp:
+        resp.read()
+        return resp.status
+
+
+def measure_server(env: dict, timeout: float = 60) -> tuple:
+    """(seconds from process start to the first /health answer, seconds for the first /api/menu)."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        while True:
+            try:
+                _get(f"{base}/health", {})
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if proc.poll() is not None or time.perf_counter() - start > timeout:
+                    raise RuntimeError("Server did not come up")
+                time.sleep(0.005)
+        ready = time.perf_counter() - start
+
+        menu_start = time.perf_counter()
+        _get(f"{base}/api/menu", {"X-Password": env["APP_PASSWORD"]})
+        return ready, time.perf_counter() - menu_start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=600, help="median time to first /health allowed")
+    args = parser.parse_args()
+
+    env = {**os.environ, "APP_PASSWORD": os.environ.get("APP_PASSWORD", "benchmark")}
+    imports, loaded = zip(*(measure_import(env) for _ in range(args.repeat)))
+    servers = [measure_server(env) for _ in range(args.repeat)]
+    ready = statistics.median(r for r, _menu in servers)
+    menu = statistics.median(m for _ready, m in servers)
+
+    print(f"import app.main      {statistics.median(imports) * 1000:8.0f} ms (median of {args.repeat})")
+    print(f"start to /health     {ready * 1000:8.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"first /api/menu      {menu * 1000:8.0f} ms")
+    print(f"heavy modules loaded {', '.join(sorted(set(loaded[0]))) or 'none'}")
+    if ready * 1000 > args.budget_ms:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
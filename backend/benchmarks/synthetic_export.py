@@ -0,0 +1,164 @@
+"""Generate synthetic WeChat exports of any size for tests and benchmarks.
+
+Usage (from backend/):
+    python -m benchmarks.synthetic_export --orders 10000 [--format formatted] [-o export.xlsx]
+
+Orders draw items from the real menu.csv with a Zipf-like popularity (a few
+dumplings and buns dominate, most of the menu is ordered rarely), mostly
+single quantities, and item text spaced the way customers' phones write it.
+Addresses use real Bay Area ZIP codes and their cities. The summary table
+matches the generated orders, so a correct parse reports no discrepancies.
+"""
+
+import argparse
+import csv
+import io
+import random
+import re
+from datetime import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from openpyxl import Workbook
+
+from app.menu import get_menu
+from app.zip_index import _ZIP_CITIES_PATH
+
+FORMATS = ["raw", "formatted"]
+
+# Bay Area ZIP3 prefixes the delivery routes cover
+_BAY_AREA_PREFIXES = ("940", "941", "943", "944", "945", "950", "951")
+
+# Zipf exponent for item popularity; items per order and quantity weights
+_POPULARITY_EXPONENT = 1.1
+_ITEMS_PER_ORDER = [(1, 10), (2, 20), (3, 25), (4, 20), (5, 12), (6, 8), (7, 5)]
+_QUANTITIES = [(1, 70), (2, 20), (3, 7), (4, 2), (5, 1)]
+
+_STREETS = ["Main St", "Oak Ave", "El Camino Real", "Stevens Creek Blvd", "Mission Blvd", "Homestead Rd", "Bancroft St"]
+_NAMES = ["张", "李", "王", "赵", "刘", "陈", "杨", "黄", "周", "吴", "Amy", "Ken", "Judy", "Tom", "Lisa", "Wendy"]
+
+# Where customers' text usually has a space: before the portion size
+_PORTION = re.compile(r"(?<=[^\s/])(?=\d|每份|/份)")
+
+
+def _bay_area_zips() -> List[Tuple[str, str]]:
+    with open(_ZIP_CITIES_PATH, newline="", encoding="utf-8") as f:
+        return [(row["zip"], row["city"]) for row in csv.DictReader(f) if row["zip"].startswith(_BAY_AREA_PREFIXES)]
+
+
+def _weighted(rng: random.Random, choices: List[Tuple[int, int]]) -> int:
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def generate_orders(n_orders: int, seed: int = 0) -> Tuple[List[Dict], Dict[str, int]]:
+    """n_orders order dicts (customer, items text, phone, address, city, zip) and the item totals."""
+    rng = random.Random(seed)
+    food_items = get_menu().food_items
+    popularity = [1 / rank**_POPULARITY_EXPONENT for rank in range(1, len(food_items) + 1)]
+    ranked = rng.sample(food_items, len(food_items))
+    zips = _bay_area_zips()
+
+    totals = {item: 0 for item in food_items}
+    orders = []
+    for i in range(1, n_orders + 1):
+        picks = set()
+        n_items = min(_weighted(rng, _ITEMS_PER_ORDER), len(food_items))
+        while len(picks) < n_items:
+            picks.add(rng.choices(ranked, popularity)[0])
+
+        segments = []
+        price = 0
+        for item in sorted(picks, key=food_items.index):
+            qty = _weighted(rng, _QUANTITIES)
+            totals[item] += qty
+            price += qty * rng.randint(10, 30)
+            text = _PORTION.sub(" ", item, count=1) if rng.random() < 0.7 else item
+            segments.append(f"{text}x{qty}")
+
+        zip_code, city = rng.choice(zips)
+        orders.append(
+            {
+                "customer": f"{rng.choice(_NAMES)}{i}",
+                "items_ordered": "， ".join(segments + [f" 总价：${price}.00 "]),
+                "phone_number": rng.randint(2_000_000_000, 9_999_999_999),
+                "address": f"{rng.randint(1, 9999)} {rng.choice(_STREETS)}",
+                "city": city.title() if rng.random() < 0.8 else city.lower(),
+                "zip_code": int(zip_code),
+            }
+        )
+    return orders, {item: qty for item, qty in totals.items() if qty}
+
+
+def generate_export(n_orders: int, fmt: str = "raw", seed: int = 0) -> bytes:
+    """An .xlsx export with n_orders orders in the raw WeChat or the hand-formatted layout."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+    orders, totals = generate_orders(n_orders, seed)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    if fmt == "raw":
+        _write_raw(ws, orders, totals)
+    else:
+        _write_formatted(ws, orders, totals, random.Random(seed))
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _write_raw(ws, orders: List[Dict], totals: Dict[str, int]) -> None:
+    ws.append(["WeChat Order Export"])
+    ws.append(["Generated for benchmarking"])
+    ws.append([""])
+    ws.append(["序号", "姓名", "内容", "标签", "手机号码", "收货地址", "所在城市", "邮政编码"])
+    for i, o in enumerate(orders, start=1):
+        ws.append([i, o["customer"], o["items_ordered"], "", o["phone_number"], o["address"], o["city"], o["zip_code"]])
+
+    ws.append([])
+    ws.append(["商品", None, "数量"])
+    for item, qty in totals.items():
+        ws.append([item, None, qty])
+    ws.append(["总计", None, sum(totals.values())])
+
+
+def _write_formatted(ws, orders: List[Dict], totals: Dict[str, int], rng: random.Random) -> None:
+    # Metadata rows (delivery times in column A), then the order list in driver blocks separated by blank rows
+    ws.append([time(14, 30), "活动主题", "Generated for benchmarking"])
+    ws.append([time(8, 0), "报名人数", len(orders)])
+    ws.append([None, "报名名单"])
+    ws.append([None, "序号", "姓名", "手机号码", "收货地址", "所在城市", "邮编", "内容"])
+    block = 0
+    for o in orders:
+        if block and rng.random() < 0.05:
+            ws.append([])
+            block = 0
+        block += 1
+        row = [o["customer"], o["phone_number"], o["address"], o["city"], o["zip_code"], o["items_ordered"]]
+        ws.append([None, f"周五{block}", *row])
+
+    # Summary table with price and amount columns, items written with spaces like the orders
+    ws.append([])
+    ws.append([None] * 4 + ["商品汇总"])
+    ws.append([None] * 4 + ["商品", "单价", "数量", "金额"])
+    for item, qty in sorted(totals.items(), key=lambda kv: -kv[1]):
+        price = rng.randint(10, 30)
+        ws.append([None] * 4 + [_PORTION.sub(" ", item, count=1), price, qty, price * qty])
+    ws.append([None] * 4 + ["总计", None, None, None])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--format", choices=FORMATS, default="raw")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path)
+    args = parser.parse_args()
+
+    output = args.output or Path(f"synthetic_{args.format}_{args.orders}.xlsx")
+    output.write_bytes(generate_export(args.orders, args.format, args.seed))
+    print(f"Wrote {args.orders} {args.format} orders to {output}")
+
+
+if __name__ == "__main__":
+    main()
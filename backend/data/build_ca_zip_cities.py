@@ -0,0 +1,27 @@
+"""Regenerate ca_zip_cities.csv (California ZIP -> USPS primary city).
+
+Needs the zipcodes package, which the app itself does not depend on:
+
+    pip install zipcodes
+    python data/build_ca_zip_cities.py
+"""
+
+import csv
+from pathlib import Path
+
+import zipcodes
+
+OUTPUT = Path(__file__).resolve().parent / "ca_zip_cities.csv"
+
+
+def build() -> None:
+    rows = sorted((z["zip_code"], z["city"]) for z in zipcodes.filter_by(state="CA"))
+    with open(OUTPUT, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["zip", "city"])
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} ZIP codes to {OUTPUT}")
+
+
+if __name__ == "__main__":
+    build()
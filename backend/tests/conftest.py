@@ -1,17 +1,54 @@
 import os
+from io import BytesIO
 from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
+from openpyxl import load_workbook
 
 os.environ["APP_PASSWORD"] = "testpassword"
+# Parse in threads by default; test_workers.py exercises the process pool explicitly
+os.environ.setdefault("PARSE_WORKERS", "0")
 
+from app import routing  # noqa: E402
+from app.aliases import alias_table  # noqa: E402
+from app.geocache import GeocodeCache  # noqa: E402
 from app.main import app  # noqa: E402
+from app.sessions import session_store  # noqa: E402
+from app.uploads import upload_cache  # noqa: E402
 
 FIXTURE_DIR = Path(__file__).parent / "fixtures"
 SAMPLE_XLSX = FIXTURE_DIR / "sample_export.xlsx"
 
 
+@pytest.fixture(autouse=True)
+def _alias_table(tmp_path, monkeypatch):
+    """Keep learned aliases out of backend/data and start each test with an empty table."""
+    monkeypatch.setattr(alias_table, "path", tmp_path / "menu_aliases.json")
+    alias_table.clear()
+    yield
+    alias_table.clear()
+
+
+@pytest.fixture(autouse=True)
+def geocode_cache(tmp_path, monkeypatch):
+    """Keep geocodes out of backend/data: every test starts with an empty store, and no JSON cache to import."""
+    cache = GeocodeCache(tmp_path / "geocode_cache.sqlite3", legacy_json=tmp_path / "geocode_cache.json")
+    monkeypatch.setattr(routing, "geocode_cache", cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def _upload_state():
+    """Every test parses its uploads afresh and starts without sessions."""
+    upload_cache.clear()
+    session_store.clear()
+    yield
+    upload_cache.clear()
+    session_store.clear()
+
+
 @pytest.fixture
 def client():
     return TestClient(app)
@@ -30,3 +67,26 @@ def sample_xlsx_path():
 @pytest.fixture
 def sample_xlsx_bytes():
     return SAMPLE_XLSX.read_bytes()
+
+
+@pytest.fixture
+def uploaded(client, auth_headers, sample_xlsx_bytes):
+    """/api/upload response for sample_export.xlsx, including its session_id."""
+    resp = client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.fixture
+def reexport_xlsx_bytes():
+    """sample_export.xlsx re-exported later: 王五 (order 3) changed, 赵六 (order 4) replaced by a new order 5."""
+    wb = load_workbook(SAMPLE_XLSX)
+    ws = wb.active
+    ws.cell(row=7, column=3, value="荠菜鲜肉馄饨 50/份x1， 素鸭 每份x5， 总价：$80.00")
+    for col, value in enumerate(
+        [5, "钱七", "肉包子 10个/份x2， 总价：$20.00", None, 13800005555, "9 Bay St", "Oakland", 94601], start=1
+    ):
+        ws.cell(row=8, column=col, value=value)
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
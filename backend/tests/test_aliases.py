@@ -0,0 +1,88 @@
+import dataclasses
+from unittest.mock import patch
+
+from app.aliases import AliasMatcher, AliasStats, AliasTable, alias_table, normalize_segment
+from app.analyzer import build_menu_matcher
+from app.menu import get_menu
+
+
+def test_alias_matcher_learns_and_agrees_with_matcher():
+    menu = get_menu()
+    matcher = AliasMatcher(menu, {})
+    plain = build_menu_matcher(menu.food_items)
+
+    idx = matcher.match("荠菜鲜肉馄饨 50/份")
+    assert idx == plain.match("荠菜鲜肉馄饨 50/份") is not None
+    assert matcher.stats.learned == {"荠菜鲜肉馄饨50/份": menu.items[idx]["id"]}
+
+    # Spacing variants share the learned alias
+    assert matcher.match("荠菜鲜肉馄饨50/份") == idx
+    assert matcher.match("不存在的东西") is None
+    assert (matcher.stats.hits, matcher.stats.misses) == (1, 2)
+    assert matcher.stats.unmatched == {"不存在的东西": 1}
+
+
+def test_alias_matcher_uses_snapshot():
+    menu = get_menu()
+    # An alias the matcher itself would never produce proves the table is consulted first
+    matcher = AliasMatcher(menu, {normalize_segment("饺子"): menu.items[3]["id"]})
+    assert matcher.match("饺子") == 3
+    assert matcher.stats.hits == 1
+
+
+def test_alias_table_persists(tmp_path):
+    menu = get_menu()
+    path = tmp_path / "aliases.json"
+    table = AliasTable(path)
+    assert table.record(menu, AliasStats(hits=3, misses=1, learned={"素鸭每份": 7}, unmatched={"神秘": 2}))
+    assert not path.exists()
+    table.flush()
+
+    reloaded = AliasTable(path)
+    assert reloaded.snapshot(menu) == {"素鸭每份": 7}
+    report = reloaded.report(menu)
+    assert report["hit_rate"] == 0.75
+    assert report["unmatched"] == [("神秘", 2)]
+
+
+def test_alias_table_resets_on_menu_change(tmp_path):
+    menu = get_menu()
+    table = AliasTable(tmp_path / "aliases.json")
+    table.record(menu, AliasStats(learned={"素鸭每份": 7}))
+
+    changed = dataclasses.replace(menu, version="0" * 16)
+    assert table.snapshot(changed) == {}
+    assert table.report(changed)["hits"] == 0
+
+
+def test_alias_table_saves_only_what_it_learned(tmp_path):
+    menu = get_menu()
+    path = tmp_path / "aliases.json"
+    table = AliasTable(path)
+    assert table.record(menu, AliasStats(learned={"素鸭每份": 7}))
+    table.flush()
+    saved = path.read_text()
+
+    # Known aliases and unmatched segments only move counts, which wait for the next flush
+    assert not table.record(menu, AliasStats(hits=2, learned={"素鸭每份": 7}))
+    assert path.read_text() == saved
+    assert table.record(menu, AliasStats(misses=1, unmatched={"神秘": 1}))
+    assert not table.record(menu, AliasStats(misses=1, unmatched={"神秘": 1}))
+    table.flush()
+    assert AliasTable(path).report(menu)["hits"] == 2
+    assert AliasTable(path).report(menu)["unmatched"] == [("神秘", 2)]
+
+    mtime = path.stat().st_mtime_ns
+    table.flush()  # nothing new
+    assert path.stat().st_mtime_ns == mtime
+
+
+def test_repeat_upload_does_not_rewrite_aliases(client, auth_headers, sample_xlsx_bytes):
+    from app.uploads import upload_cache
+
+    with patch.object(alias_table, "flush", wraps=alias_table.flush) as flush:
+        client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+        assert flush.call_count == 1
+        upload_cache.clear()
+        client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+        assert flush.call_count == 1
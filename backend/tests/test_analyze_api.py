@@ -30,3 +30,116 @@ def test_analyze_empty_orders(client, auth_headers):
 def test_analyze_no_auth(client):
     resp = client.post("/api/analyze", json={"orders": []})
     assert resp.status_code == 422
+
+
+def test_analyze_batch(client, auth_headers):
+    payload = {
+        "orders": [
+            {"烧卖": 3, "馄饨": 2},
+            {"烧卖": 1, "素鸭": 2},
+            {"馄饨": 4},
+        ],
+        "selections": [
+            {"name": "North", "indices": [0, 1]},
+            {"name": "South", "indices": [2]},
+            {"name": "Empty", "indices": []},
+        ],
+    }
+    resp = client.post("/api/analyze/batch", headers=auth_headers, json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+
+    north, south, empty = data["selections"]
+    assert north["name"] == "North"
+    assert [(i["item_name"], i["quantity"]) for i in north["sorted_items"]] == [("烧卖", 4), ("馄饨", 2), ("素鸭", 2)]
+    assert north["total_items"] == 8
+    assert north["orders_analyzed"] == 2
+    assert [(i["item_name"], i["quantity"]) for i in south["sorted_items"]] == [("馄饨", 4)]
+    assert empty == {"name": "Empty", "sorted_items": [], "total_items": 0, "orders_analyzed": 0}
+
+    combined = data["combined"]
+    assert [(i["item_name"], i["quantity"]) for i in combined["sorted_items"]] == [
+        ("馄饨", 6),
+        ("烧卖", 4),
+        ("素鸭", 2),
+    ]
+    assert combined["total_items"] == 12
+    assert combined["orders_analyzed"] == 3
+
+
+def test_analyze_batch_matches_analyze(client, auth_headers):
+    orders = [{"a": 1, "b": 5}, {"b": 2, "c": 7}, {"a": 3}]
+    selection = [2, 0, 2]
+    batch = client.post(
+        "/api/analyze/batch",
+        headers=auth_headers,
+        json={"orders": orders, "selections": [{"name": "g", "indices": selection}]},
+    ).json()
+    single = client.post("/api/analyze", headers=auth_headers, json={"orders": [orders[i] for i in selection]}).json()
+    assert batch["selections"][0]["sorted_items"] == single["sorted_items"]
+    assert batch["selections"][0]["total_items"] == single["total_items"]
+
+
+def test_analyze_batch_index_out_of_range(client, auth_headers):
+    resp = client.post(
+        "/api/analyze/batch",
+        headers=auth_headers,
+        json={"orders": [{"a": 1}], "selections": [{"name": "g", "indices": [1]}]},
+    )
+    assert resp.status_code == 400
+    assert "'g'" in resp.json()["detail"]
+
+
+def test_analyze_batch_no_auth(client):
+    resp = client.post("/api/analyze/batch", json={"orders": [], "selections": []})
+    assert resp.status_code == 422
+
+
+def test_analyze_pivot(client, auth_headers, uploaded):
+    orders = uploaded["orders"]
+    first_city = orders[0]["city"]
+    payload = {
+        "session_id": uploaded["session_id"],
+        "by": ["group", "city"],
+        "groups": {"A": [0, 1]},
+    }
+    resp = client.post("/api/analyze/pivot", headers=auth_headers, json=payload)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["by"] == ["group", "city"]
+    assert sum(row["orders"] for row in data["rows"]) == len(orders)
+    assert sum(row["total_items"] for row in data["rows"]) == sum(sum(o["item_quantities"].values()) for o in orders)
+
+    # Group A's totals match analyzing its orders directly
+    group_a = [row for row in data["rows"] if row["key"][0] == "A"]
+    totals = [sum(q) for q in zip(*(row["quantities"] for row in group_a))]
+    expected = client.post(
+        "/api/analyze",
+        headers=auth_headers,
+        json={"orders": [orders[0]["item_quantities"], orders[1]["item_quantities"]]},
+    ).json()
+    assert dict(zip(data["food_columns"], totals)) == {
+        **{name: 0 for name in data["food_columns"]},
+        **{i["item_name"]: i["quantity"] for i in expected["sorted_items"]},
+    }
+
+    # where keeps one city's orders only
+    resp = client.post(
+        "/api/analyze/pivot",
+        headers=auth_headers,
+        json={"session_id": uploaded["session_id"], "where": {"city": [first_city]}},
+    )
+    (row,) = resp.json()["rows"]
+    assert row["key"] == []
+    assert row["orders"] == sum(o["city"] == first_city for o in orders)
+
+
+def test_analyze_pivot_bad_groups(client, auth_headers, uploaded):
+    resp = client.post(
+        "/api/analyze/pivot",
+        headers=auth_headers,
+        json={"session_id": uploaded["session_id"], "by": ["group"], "groups": {"A": [0], "B": [0]}},
+    )
+    assert resp.status_code == 400
+    resp = client.post("/api/analyze/pivot", headers=auth_headers, json={"session_id": "nope"})
+    assert resp.status_code == 404
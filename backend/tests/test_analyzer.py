@@ -1,13 +1,28 @@
 import io
+import random
+import re
+from pathlib import Path
 
 import pandas as pd
 import pytest
+from openpyxl import Workbook, load_workbook
 
 from app.analyzer import (
     DeliveryOrderAnalyzer,
+    MenuMatcher,
+    OpenpyxlReader,
+    build_menu_matcher,
+    clean_address,
+    clean_addresses,
+    detect_format,
+    get_excel_reader,
     load_food_items,
+    load_sheet,
+    parse_order_items,
     process_excel,
+    read_orders,
     read_summary_table,
+    tokenize_items,
     validate_against_summary,
 )
 
@@ -33,13 +48,127 @@ def test_read_summary_table(sample_xlsx_path):
     assert summary.get("荠菜鲜肉馄饨50/份") == 3
 
 
+def test_load_sheet_feeds_detection_and_summary():
+    formatted = Path(__file__).parent / "fixtures" / "sample_formatted_export.xlsx"
+    with open(formatted, "rb") as f:
+        sheet = load_sheet(f)
+
+    assert sheet.columns[0] == "Unnamed: 0"
+    assert "邮编" in sheet.columns
+    assert detect_format(sheet) == "formatted"
+    summary = read_summary_table(sheet, "formatted")
+    assert summary["荠菜鲜肉馄饨 50/份"] == 29
+    assert summary["蛋黄酥 6个／份"] == 0
+
+
+def test_get_excel_reader_by_name():
+    assert isinstance(get_excel_reader("openpyxl"), OpenpyxlReader)
+    assert get_excel_reader("auto").name in ("calamine", "openpyxl")
+    with pytest.raises(ValueError, match="Unknown Excel reader"):
+        get_excel_reader("xlrd")
+
+
+def test_get_excel_reader_from_env(monkeypatch):
+    monkeypatch.setenv("EXCEL_READER", "openpyxl")
+    assert get_excel_reader().name == "openpyxl"
+
+
+def test_readers_agree(sample_xlsx_path):
+    sheets = []
+    for name in ("openpyxl", "auto"):
+        with open(sample_xlsx_path, "rb") as f:
+            sheets.append(load_sheet(f, get_excel_reader(name)))
+    pd.testing.assert_frame_equal(sheets[0], sheets[1])
+
+
+def test_readers_agree_on_empty_first_column():
+    """Calamine drops leading empty columns; the reader pads them back like openpyxl."""
+    wb = load_workbook(Path(__file__).parent / "fixtures" / "sample_formatted_export.xlsx")
+    for (cell,) in wb.active.iter_rows(max_col=1):
+        cell.value = None
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    results = []
+    for name in ("openpyxl", "calamine"):
+        results.append(process_excel(io.BytesIO(buf.getvalue()), load_food_items(), get_excel_reader(name)))
+    (df, quantities, discrepancies, fmt), other = results
+    assert fmt == other[3] == "formatted"
+    assert len(df) == 58
+    pd.testing.assert_frame_equal(df, other[0])
+    pd.testing.assert_frame_equal(quantities, other[1])
+    assert discrepancies == other[2]
+
+
+RAW_HEADER = ["序号", "姓名", "内容", "标签", "手机号码", "收货地址", "所在城市", "邮政编码"]
+
+
+def _raw_export(*orders) -> io.BytesIO:
+    """A raw-layout export with the given order rows and no summary table."""
+    wb = Workbook()
+    ws = wb.active
+    for meta in ("meta1", "meta2", "meta3"):
+        ws.append([meta])
+    ws.append(RAW_HEADER)
+    for row in orders:
+        ws.append(list(row))
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("reader", ["openpyxl", "auto"])
+def test_na_strings_read_as_missing(reader):
+    """pandas' default na_values ("NA", "N/A", "NULL", "nan", ...) read as blanks, as with pd.read_excel."""
+    buf = _raw_export(
+        [1, "张三", "荠菜鲜肉馄饨 50/份x1， 总价：$10.00", "NA", "NA", "N/A", "NULL", "nan"],
+        [2, "NA", "荠菜鲜肉馄饨 50/份x1， 总价：$10.00", None, "null", "1 Main St", "#N/A", " NA"],
+    )
+    sheet = load_sheet(buf, get_excel_reader(reader))
+    buf.seek(0)
+    pd.testing.assert_frame_equal(sheet, pd.read_excel(buf, skiprows=3))
+
+    orders = read_orders(sheet, "raw")
+    # A customer named "NA" is blank, so that row is not an order
+    assert orders["customer"].tolist() == ["张三"]
+    assert orders.loc[0, ["phone_number", "address", "city", "zip_code"]].tolist() == ["", "", "", ""]
+
+
+def test_blank_cells_become_empty_strings():
+    """Blank phone, address, city and zip cells come out as "", never "nan", on pandas 2 and 3 alike."""
+    items = "荠菜鲜肉馄饨 50/份x1， 总价：$10.00"
+    buf = _raw_export(
+        [1, "张三", items, None, None, None, None, None],
+        [2, "李四", items, None, 13800001111, "1 Main St", "Oakland", 94601],
+        [3, "王五", items, None, None, "9 Bay St", None, None],
+    )
+    df, _quantities, _discrepancies, _fmt = process_excel(buf, load_food_items())
+
+    columns = ["phone_number", "address", "city", "zip_code"]
+    assert df[columns].values.tolist() == [
+        ["", "", "", ""],
+        ["13800001111", "1 Main St", "Oakland", "94601"],
+        ["", "9 Bay St", "", ""],
+    ]
+
+
+def test_read_summary_table_accepts_sheet(sample_xlsx_path):
+    with open(sample_xlsx_path, "rb") as f:
+        sheet = load_sheet(f)
+    assert detect_format(sheet) == "raw"
+    with open(sample_xlsx_path, "rb") as f:
+        assert read_summary_table(sheet) == read_summary_table(f)
+
+
 def test_process_excel_basic(sample_xlsx_path):
     food_items = load_food_items()
     with open(sample_xlsx_path, "rb") as f:
-        df, discrepancies, fmt = process_excel(f, food_items)
+        df, quantities, discrepancies, fmt = process_excel(f, food_items)
 
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 4  # 4 orders in fixture
+    assert list(quantities.columns) == ["order_index", "item_id", "quantity"]
     assert fmt in ("raw", "formatted")
     # Standard columns present
     for col in ["delivery", "customer", "items_ordered", "phone_number", "address", "city", "zip_code"]:
@@ -49,11 +178,17 @@ def test_process_excel_basic(sample_xlsx_path):
 def test_process_excel_item_parsing(sample_xlsx_path):
     food_items = load_food_items()
     with open(sample_xlsx_path, "rb") as f:
-        df, _, _fmt = process_excel(f, food_items)
+        _, quantities, _, _fmt = process_excel(f, food_items)
 
     # Order 1 (index 0): 烧卖 x3, 馄饨 x2
-    assert df.at[0, "肉末香茹胡罗卜糯米烧卖15个/份"] == 3
-    assert df.at[0, "荠菜鲜肉馄饨50/份"] == 2
+    first = quantities[quantities["order_index"] == 0]
+    assert {food_items[i]: q for i, q in zip(first["item_id"], first["quantity"])} == {
+        "肉末香茹胡罗卜糯米烧卖15个/份": 3,
+        "荠菜鲜肉馄饨50/份": 2,
+    }
+    # Only items actually ordered are stored
+    assert (quantities["quantity"] > 0).all()
+    assert len(quantities) == 9
 
 
 def test_process_excel_no_orders():
@@ -80,47 +215,184 @@ def test_process_excel_no_orders():
 def test_process_excel_discrepancies(sample_xlsx_path):
     food_items = load_food_items()
     with open(sample_xlsx_path, "rb") as f:
-        _, discrepancies, _fmt = process_excel(f, food_items)
+        _, _, discrepancies, _fmt = process_excel(f, food_items)
     # Our fixture should have matching totals, so no discrepancies
     assert isinstance(discrepancies, list)
 
 
+def _reference_match(item_name_part, food_items):
+    """Original linear scan that MenuMatcher must reproduce."""
+    for i, food_item in enumerate(food_items):
+        base_name = re.sub(r"\d+个?[/／]?份?$", "", food_item).strip()
+        item_name_norm = item_name_part.replace(" ", "")
+        base_name_norm = base_name.replace(" ", "")
+        if (
+            base_name in item_name_part
+            or item_name_part in base_name
+            or base_name_norm in item_name_norm
+            or item_name_norm in base_name_norm
+        ):
+            return i
+    return None
+
+
+def test_menu_matcher_matches_linear_scan():
+    food_items = load_food_items()
+    matcher = MenuMatcher(food_items)
+    segments = [
+        "肉末香茹胡罗卜糯米烧卖 15个/份",
+        "荠菜鲜肉馄饨 50/份",
+        "素鸭 每份",
+        "红烧",
+        "春卷",
+        "豆沙春卷 10个／份",
+        "大肉粽",
+        "肉",
+        "",
+        "盐水鸭 半只",
+        "不在菜单上的东西",
+        "糯米八宝饭/份（自制豆沙）",
+    ]
+    for segment in segments:
+        assert matcher.match(segment) == _reference_match(segment, food_items), segment
+
+
+def test_menu_matcher_first_match_wins():
+    matcher = MenuMatcher(["红烧猪蹄每份", "红烧蹄膀每份"])
+    assert matcher.match("红烧") == 0
+    assert matcher.match("红烧蹄膀 每份") == 1
+    assert matcher.match("咖喱") is None
+
+
+def _reference_tokenize(items_ordered):
+    """Original per-cell loop that tokenize_items must reproduce."""
+    tokens = []
+    for idx, items_text in enumerate(items_ordered.astype(str)):
+        if not isinstance(items_text, str) or items_text == "nan":  # astype(str) keeps missing values
+            continue
+        items_list = items_text.split("， ")
+        if len(items_list) > 1:
+            items_list = items_list[:-1]
+        for item_entry in items_list:
+            item_entry = item_entry.strip()
+            if not item_entry or "x" not in item_entry:
+                continue
+            parts = item_entry.rsplit("x", 1)
+            quantity_match = re.match(r"(\d+)", parts[1].strip())
+            if quantity_match:
+                tokens.append((idx, parts[0].strip(), int(quantity_match.group(1))))
+    return tokens
+
+
+def test_tokenize_items_matches_loop():
+    items = pd.Series(
+        [
+            "肉末香茹胡罗卜糯米烧卖 15个/份x3， 荠菜鲜肉馄饨 50/份x2， 总价：$100.00",
+            "素鸭 每份x2",  # single entry: nothing dropped
+            "素鸭 每份x2， 总价：$10.00x3",  # the total is dropped even when it has an x
+            "红烧猪蹄 每份 x 1 份， 春卷x， 无数量xabc， 没有乘号， ， 总价",
+            "box of 3x4， max x10x2， 总价",  # split at the last x
+            "　素鸭 每份x２， 总价",  # full-width space and digit
+            None,
+            "",
+            "nan",
+        ],
+        dtype=object,
+    )
+    tokens = tokenize_items(items)
+    assert list(tokens.itertuples(index=False, name=None)) == _reference_tokenize(items)
+    assert tokens["order_index"].dtype == "int64"
+    assert tokens["quantity"].dtype == "int64"
+
+
+def test_tokenize_items_random_text():
+    rng = random.Random(7)
+    pieces = ["素鸭", " 每份", "x", "X", "2", "10", "， ", "，", " ", "总价", "$", "　", "３"]
+    items = pd.Series(["".join(rng.choices(pieces, k=rng.randint(0, 12))) for _ in range(500)])
+    tokens = tokenize_items(items)
+    assert list(tokens.itertuples(index=False, name=None)) == _reference_tokenize(items)
+
+
+def test_tokenize_items_no_entries():
+    tokens = tokenize_items(pd.Series(["总价", None], dtype=object))
+    assert tokens.empty
+    assert list(tokens.columns) == ["order_index", "segment", "quantity"]
+
+
+def test_parse_order_items_positions_follow_series():
+    food_items = load_food_items()
+    items = pd.Series(["素鸭 每份x2， 总价", "不在菜单上x1， 素鸭 每份x1， 素鸭 每份x4， 总价"], index=[10, 3])
+    quantities = parse_order_items(items, food_items)
+    sua = food_items.index("素鸭每份")
+    # Positions, not index labels; a repeated item keeps its last quantity
+    assert quantities.values.tolist() == [[0, sua, 2], [1, sua, 4]]
+
+
+def test_build_menu_matcher_reused_per_menu():
+    food_items = load_food_items()
+    assert build_menu_matcher(food_items) is build_menu_matcher(list(food_items))
+
+
+def test_clean_addresses_matches_clean_address():
+    addresses = pd.Series(
+        [
+            "123 Main St, Fremont, CA 94536",
+            "456 Oak Ave Fremont CA 94538",
+            "789 Pine Rd san jose California",
+            "  12 Elm St  ",
+            "",
+            None,
+            "1 Market St San Francisco CA 94105-1234",
+        ],
+        dtype=object,
+    )
+    cities = pd.Series(["Fremont", "Fremont", "San Jose", "", "Hayward", "Oakland", "San Francisco"])
+
+    result = clean_addresses(addresses, cities)
+
+    expected = [clean_address(a if isinstance(a, str) else "", c) for a, c in zip(addresses, cities)]
+    assert result.tolist() == expected
+    assert result.tolist()[:3] == ["123 Main St", "456 Oak Ave", "789 Pine Rd"]
+
+
+def _sparse(rows):
+    return pd.DataFrame(rows, columns=["order_index", "item_id", "quantity"])
+
+
 def test_validate_against_summary_match():
-    df = pd.DataFrame({"item_a": [1, 2], "item_b": [3, 0]})
+    quantities = _sparse([(0, 0, 1), (1, 0, 2), (0, 1, 3)])
     food_items = ["item_a", "item_b"]
     summary = {"item_a": 3, "item_b": 3}
-    result = validate_against_summary(df, food_items, summary)
+    result = validate_against_summary(quantities, food_items, summary)
     assert result == []
 
 
 def test_validate_against_summary_mismatch():
-    df = pd.DataFrame({"item_a": [1, 2], "item_b": [3, 0]})
+    quantities = _sparse([(0, 0, 1), (1, 0, 2), (0, 1, 3)])
     food_items = ["item_a", "item_b"]
     summary = {"item_a": 3, "item_b": 5}  # item_b: parsed=3, expected=5
-    result = validate_against_summary(df, food_items, summary)
+    result = validate_against_summary(quantities, food_items, summary)
     assert len(result) == 1
     assert result[0] == ("item_b", 3, 5)
 
 
 def test_validate_against_summary_skips_absent():
-    df = pd.DataFrame({"item_a": [1, 2], "item_b": [0, 0]})
+    quantities = _sparse([(0, 0, 1), (1, 0, 2)])
     food_items = ["item_a", "item_b"]
     summary = {"item_a": 3}  # item_b not in summary
-    result = validate_against_summary(df, food_items, summary)
+    result = validate_against_summary(quantities, food_items, summary)
     assert result == []
 
 
 def test_analyzer_load(sample_xlsx_path):
     food_items = load_food_items()
     with open(sample_xlsx_path, "rb") as f:
-        df, _, _fmt = process_excel(f, food_items)
+        _, quantities, _, _fmt = process_excel(f, food_items)
 
     analyzer = DeliveryOrderAnalyzer()
-    analyzer.load(df)
+    analyzer.load(quantities, food_items)
     assert len(analyzer.food_columns) > 0
     # All food columns should contain Chinese characters
-    import re
-
     for col in analyzer.food_columns:
         assert re.search(r"[\u4e00-\u9fff]", col)
 
@@ -128,10 +400,10 @@ def test_analyzer_load(sample_xlsx_path):
 def test_analyzer_analyze_basic(sample_xlsx_path):
     food_items = load_food_items()
     with open(sample_xlsx_path, "rb") as f:
-        df, _, _fmt = process_excel(f, food_items)
+        _, quantities, _, _fmt = process_excel(f, food_items)
 
     analyzer = DeliveryOrderAnalyzer()
-    analyzer.load(df)
+    analyzer.load(quantities, food_items)
     sorted_items, total = analyzer.analyze([0, 1, 2, 3])
     assert total > 0
     assert len(sorted_items) > 0
@@ -140,6 +412,33 @@ def test_analyzer_analyze_basic(sample_xlsx_path):
         assert sorted_items[i][1] >= sorted_items[i + 1][1]
 
 
+def test_validate_against_summary_reports_missing_item():
+    quantities = _sparse([(0, 0, 1)])
+    result = validate_against_summary(quantities, ["item_a", "item_b"], {"item_a": 1, "item_b": 2})
+    assert result == [("item_b", 0, 2)]
+
+
+def test_analyzer_analyze_sparse_selection():
+    analyzer = DeliveryOrderAnalyzer()
+    analyzer.load(_sparse([(0, 0, 1), (0, 1, 2), (1, 1, 4), (2, 2, 5)]), ["a", "b", "c"])
+    sorted_items, total = analyzer.analyze([0, 1])
+    assert sorted_items == [("b", 6), ("a", 1)]
+    assert total == 7
+    # Selecting an order twice counts it twice
+    assert analyzer.analyze([2, 2]) == ([("c", 10)], 10)
+
+
+def test_analyzer_analyze_many():
+    analyzer = DeliveryOrderAnalyzer()
+    analyzer.load(_sparse([(0, 0, 1), (0, 1, 2), (1, 1, 4), (2, 2, 5)]), ["a", "b", "c"])
+    selections = [[0, 1], [2, 2], [], [0, 1, 2, 7]]
+    results = analyzer.analyze_many(selections)
+    assert results[0] == ([("b", 6), ("a", 1)], 7)
+    assert results[2] == ([], 0)
+    # Indices without quantity rows add nothing
+    assert results[3] == ([("b", 6), ("c", 5), ("a", 1)], 12)
+
+
 def test_analyzer_analyze_empty():
     analyzer = DeliveryOrderAnalyzer()
     sorted_items, total = analyzer.analyze([])
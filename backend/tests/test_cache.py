@@ -0,0 +1,83 @@
+import pytest
+
+from app.cache import LRUCache
+
+
+def test_lru_cache_get_put():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now the oldest
+    cache.put("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert len(cache) == 2
+
+
+def test_lru_cache_clear_resets_counters():
+    cache = LRUCache(maxsize=1)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.hits == 0 and cache.misses == 0
+
+
+def test_lru_cache_rejects_zero_size():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_cache_ttl_expires_idle_entries():
+    clock = FakeClock()
+    cache = LRUCache(maxsize=10, ttl=60, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    clock.now = 50
+    assert cache.get("a") == 1  # restarts a's idle time
+    clock.now = 100
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    clock.now = 200
+    assert len(cache) == 0
+
+
+def test_lru_cache_max_bytes_evicts_least_recently_used():
+    cache = LRUCache(maxsize=10, max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")
+    cache.put("c", "xxxx")
+    assert "b" not in cache
+    assert cache.nbytes == 8
+    assert cache.stats()["max_bytes"] == 10
+
+    # Replacing an entry counts only its new size; an oversized value still fits on its own
+    cache.put("a", "x")
+    assert cache.nbytes == 5
+    cache.put("d", "x" * 20)
+    assert len(cache) == 1 and cache.nbytes == 20
+    assert cache.pop("d") == "x" * 20
+    assert cache.nbytes == 0
+
+
+def test_lru_cache_max_bytes_needs_sizeof():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=1, max_bytes=10)
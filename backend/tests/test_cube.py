@@ -0,0 +1,86 @@
+import random
+from collections import Counter, defaultdict
+
+import pytest
+
+from app.cube import UNGROUPED, build_cube
+from app.uploads import ORDER_FIELDS, ParsedUpload
+
+
+def _upload(cities, zips, triplets, food_items=("a", "b", "c")):
+    columns = {name: [""] * len(cities) for name in ORDER_FIELDS}
+    columns["city"], columns["zip_code"] = list(cities), list(zips)
+    order_index, item_id, quantity = (list(values) for values in zip(*triplets)) if triplets else ([], [], [])
+    return ParsedUpload(
+        columns=columns,
+        order_index=order_index,
+        item_id=item_id,
+        quantity=quantity,
+        discrepancies=[],
+        fmt="raw",
+        food_items=list(food_items),
+        food_column_labels={},
+        menu_ids=list(range(len(food_items))),
+    )
+
+
+def _reference_rollup(upload, groups, by, where=None):
+    group_of = [UNGROUPED] * len(upload)
+    for name, indices in groups.items():
+        for i in indices:
+            group_of[i] = name
+    values = {"city": upload.columns["city"], "zip_code": upload.columns["zip_code"], "group": group_of}
+    keep = [all(values[dim][i] in allowed for dim, allowed in (where or {}).items()) for i in range(len(upload))]
+
+    totals = defaultdict(Counter)
+    orders = Counter()
+    for i in range(len(upload)):
+        if keep[i]:
+            orders[tuple(values[dim][i] for dim in by)] += 1
+    for o, item, qty in zip(upload.order_index, upload.item_id, upload.quantity):
+        if keep[o]:
+            totals[tuple(values[dim][o] for dim in by)][item] += qty
+    return {
+        key: ([totals[key][item] for item in range(len(upload.food_items))], count) for key, count in orders.items()
+    }
+
+
+def test_cube_matches_reference():
+    rng = random.Random(7)
+    n = 200
+    zips = [rng.choice(["94085", "94086", "95014", "95035"]) for _ in range(n)]
+    cities = [{"94085": "Sunnyvale", "94086": "Sunnyvale", "95014": "Cupertino", "95035": "Milpitas"}[z] for z in zips]
+    triplets = [(o, item, rng.randint(1, 5)) for o in range(n) for item in sorted(rng.sample(range(3), 2))]
+    upload = _upload(cities, zips, triplets)
+    groups = {"North": list(range(0, 60)), "South": list(range(100, 150))}
+
+    cube = build_cube(upload, groups)
+    cases = [
+        ([], None),
+        (["city"], None),
+        (["group"], None),
+        (["zip_code", "group"], None),
+        (["city", "zip_code", "group"], None),
+        (["group"], {"city": ["Sunnyvale", "Milpitas"]}),
+        (["city"], {"group": ["North"], "zip_code": ["94085", "95035"]}),
+    ]
+    for by, where in cases:
+        rows = cube.rollup(by, where)
+        assert [key for key, _, _ in rows] == sorted(key for key, _, _ in rows)
+        got = {key: (totals.tolist(), orders) for key, totals, orders in rows}
+        assert got == _reference_rollup(upload, groups, by, where), (by, where)
+
+
+def test_cube_empty_selection_and_bad_dimension():
+    cube = build_cube(_upload(["A"], ["1"], [(0, 0, 2)]))
+    assert cube.rollup(["city"], {"city": ["B"]}) == []
+    with pytest.raises(ValueError, match="Unknown dimension"):
+        cube.rollup(["driver"])
+
+
+def test_cube_rejects_overlapping_or_out_of_range_groups():
+    upload = _upload(["A", "A"], ["1", "1"], [(0, 0, 1), (1, 1, 1)])
+    with pytest.raises(ValueError, match="shares orders"):
+        build_cube(upload, {"x": [0], "y": [0, 1]})
+    with pytest.raises(ValueError, match="out of range"):
+        build_cube(upload, {"x": [2]})
@@ -0,0 +1,111 @@
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from app.geocache import GeocodeCache
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_put_get_and_upsert(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+    assert cache.get("1 Main St, San Jose 95110") is None
+    cache.put("1 Main St, San Jose 95110", 37.3, -121.9)
+    cache.put("1 Main St, San Jose 95110", 37.4, -121.8)
+    assert cache.get("1 Main St, San Jose 95110") == (37.4, -121.8)
+    assert len(cache) == 1
+
+    # A second instance (another worker process) reads it from disk
+    other = GeocodeCache(tmp_path / "geo.sqlite3")
+    assert other.get("1 Main St, San Jose 95110") == (37.4, -121.8)
+    cache.close()
+    other.close()
+
+
+def test_json_cache_imported_once(tmp_path):
+    legacy = tmp_path / "geocode_cache.json"
+    legacy.write_text(json.dumps({"1 Main St, San Jose 95110": {"lat": 37.3, "lng": -121.9}, "broken": {}}))
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", legacy_json=legacy)
+    assert cache.get("1 Main St, San Jose 95110") == (37.3, -121.9)
+    assert len(cache) == 1
+
+    cache.clear()
+    cache.close()
+    reopened = GeocodeCache(tmp_path / "geo.sqlite3", legacy_json=legacy)
+    assert len(reopened) == 0
+    reopened.close()
+
+
+def test_ttl_expires_entries(tmp_path):
+    now = [1000.0]
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", ttl=60, clock=lambda: now[0])
+    cache.put("1 Main St, San Jose 95110", 37.3, -121.9)
+    now[0] += 59
+    assert cache.get("1 Main St, San Jose 95110") == (37.3, -121.9)
+    now[0] += 2
+    assert cache.get("1 Main St, San Jose 95110") is None
+
+    # Geocoding it again refreshes the entry
+    cache.put("1 Main St, San Jose 95110", 37.3, -121.9)
+    assert cache.get("1 Main St, San Jose 95110") == (37.3, -121.9)
+    cache.close()
+
+
+def test_preload_fills_memory_with_fresh_entries(tmp_path):
+    now = [1000.0]
+    cache = GeocodeCache(tmp_path / "geo.sqlite3", ttl=60, clock=lambda: now[0])
+    cache.put("old", 1.0, 1.0)
+    now[0] += 30
+    cache.put("new", 2.0, 2.0)
+    cache.close()
+
+    now[0] += 40
+    assert cache.preload() == 1
+    assert cache._memory.stats()["size"] == 1
+    assert cache.get("new") == (2.0, 2.0)
+    cache.close()
+
+
+def test_concurrent_threads(tmp_path):
+    cache = GeocodeCache(tmp_path / "geo.sqlite3")
+
+    def write(worker):
+        for i in range(50):
+            cache.put(f"{worker}-{i}", worker, i)
+            assert cache.get(f"{worker}-{i}") == (worker, i)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache) == 200
+    cache.close()
+
+
+def test_concurrent_processes(tmp_path):
+    """Workers creating, migrating and writing the same database at once all succeed."""
+    path = tmp_path / "geo.sqlite3"
+    legacy = tmp_path / "geocode_cache.json"
+    legacy.write_text(json.dumps({"legacy": {"lat": 1.0, "lng": 2.0}}))
+    script = f"""
+import sys
+from pathlib import Path
+from app.geocache import GeocodeCache
+
+worker = int(sys.argv[1])
+cache = GeocodeCache(Path({str(path)!r}), legacy_json=Path({str(legacy)!r}))
+for i in range(100):
+    cache.put(f"{{worker}}-{{i}}", worker, i)
+    cache.put("shared", worker, i)
+"""
+    procs = [subprocess.Popen([sys.executable, "-c", script, str(w)], cwd=BACKEND_DIR) for w in range(4)]
+    assert [p.wait(timeout=60) for p in procs] == [0] * 4
+
+    cache = GeocodeCache(path)
+    assert len(cache) == 4 * 100 + 2
+    assert cache.get("legacy") == (1.0, 2.0)
+    assert cache.get("shared")[1] == 99
+    cache.close()
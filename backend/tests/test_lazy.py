@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from app.lazy import is_loaded, lazy_import
+from benchmarks.bench_startup import HEAVY_MODULES
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_lazy_module_imports_on_first_use():
+    module = lazy_import("json")
+    assert not is_loaded(module)
+    assert "not loaded" in repr(module)
+    assert module.dumps([1]) == "[1]"
+    assert is_loaded(module)
+    assert is_loaded(json)
+
+
+def test_patch_through_lazy_module_patches_real_module():
+    module = lazy_import("json")
+    with patch.object(module, "dumps", return_value="patched"):
+        assert json.dumps([1]) == "patched"
+        assert module.dumps([1]) == "patched"
+    assert json.dumps([1]) == "[1]"
+
+
+def test_routing_patch_targets_still_work():
+    with patch("app.routing.requests.get") as mock_get:
+        import requests
+
+        assert requests.get is mock_get
+    assert requests.get is not mock_get
+
+
+def test_cold_start_serves_health_and_menu_without_heavy_modules():
+    """A fresh process imports app.main and answers /health and /api/menu before pandas, OR-Tools or ReportLab load."""
+    script = f"""
+import sys
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+assert client.get("/health").status_code == 200
+assert client.get("/api/menu", headers={{"X-Password": "testpassword"}}).status_code == 200
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+    env = {**os.environ, "APP_PASSWORD": "testpassword"}
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == ""
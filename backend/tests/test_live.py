@@ -0,0 +1,89 @@
+from collections import Counter
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.live import LiveTotals
+from app.menu import get_menu
+from app.uploads import parse_upload
+
+
+@pytest.fixture
+def sample_upload(sample_xlsx_path):
+    with open(sample_xlsx_path, "rb") as f:
+        return parse_upload(f, get_menu())
+
+
+def _expected(upload, indices):
+    totals = Counter()
+    for order, item, qty in zip(upload.order_index, upload.item_id, upload.quantity):
+        if order in indices:
+            totals[upload.food_items[item]] += qty
+    return totals
+
+
+def test_live_totals_track_selection(sample_upload):
+    upload = sample_upload
+    live = LiveTotals(upload)
+
+    changed = live.update(add=[0, 1, 1])
+    assert changed == dict(_expected(upload, {0, 1}))
+    assert live.orders_selected == 2
+
+    # Re-adding is a no-op; removing an unselected order too
+    assert live.update(add=[0], remove=[3]) == {}
+
+    changed = live.update(add=[2], remove=[0])
+    expected = _expected(upload, {1, 2})
+    assert all(expected[name] == total for name, total in changed.items())
+    assert {name: int(live.totals[i]) for i, name in enumerate(upload.food_items) if live.totals[i]} == dict(expected)
+    assert live.total_items == sum(expected.values())
+
+    changed = live.update(clear=True, add=[2])
+    assert live.orders_selected == 1
+    assert all(total == _expected(upload, {2})[name] for name, total in changed.items())
+
+
+def test_live_totals_reject_out_of_range_without_change(sample_upload):
+    upload = sample_upload
+    live = LiveTotals(upload)
+    live.update(add=[0])
+    with pytest.raises(IndexError):
+        live.update(add=[1, len(upload)], clear=True)
+    assert live.orders_selected == 1
+
+
+def test_live_websocket(client, uploaded):
+    with client.websocket_connect(f"/api/analyze/live/{uploaded['session_id']}") as ws:
+        ws.send_json({"password": "testpassword"})
+        assert ws.receive_json() == {"ready": True, "orders": len(uploaded["orders"])}
+
+        ws.send_json({"add": [0]})
+        reply = ws.receive_json()
+        assert reply["changed"] == uploaded["orders"][0]["item_quantities"]
+        assert reply["orders_selected"] == 1
+        assert reply["total_items"] == sum(uploaded["orders"][0]["item_quantities"].values())
+
+        ws.send_json({"remove": [0]})
+        reply = ws.receive_json()
+        assert reply["changed"] == {name: 0 for name in uploaded["orders"][0]["item_quantities"]}
+        assert reply["total_items"] == 0
+
+        ws.send_json({"add": [99]})
+        assert "error" in ws.receive_json()
+        ws.send_text("not json")
+        assert "error" in ws.receive_json()
+
+
+def test_live_websocket_rejects_bad_password_or_session(client, uploaded):
+    with client.websocket_connect(f"/api/analyze/live/{uploaded['session_id']}") as ws:
+        ws.send_json({"password": "wrong"})
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+    with client.websocket_connect("/api/analyze/live/missing") as ws:
+        ws.send_json({"password": "testpassword"})
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 4404
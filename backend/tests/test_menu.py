@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from app.menu import MenuRegistry, get_menu, menu_version
+
+MENU_HEADER = "id,item_zh,item_short_zh,item_en\n"
+
+
+def test_get_menu_structures():
+    menu = get_menu()
+    assert len(menu.food_items) == 32
+    assert menu.items[0] == {
+        "id": 1,
+        "item_zh": "肉末香茹胡罗卜糯米烧卖15个/份",
+        "item_short_zh": "烧卖",
+        "item_en": "shao mai",
+    }
+    assert menu.label_map["荠菜鲜肉馄饨50/份"] == "馄饨"
+    assert menu.label_lookup["荠菜鲜肉馄饨50/份"] == (2, "馄饨")
+    assert menu_version() == menu.version
+
+
+def test_registry_loads_once(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text(MENU_HEADER + "1,甲,甲,a\n", encoding="utf-8")
+    registry = MenuRegistry(path)
+
+    first = registry.get()
+    assert registry.get() is first
+    assert registry.loads == 1
+
+
+def test_registry_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "menu.csv"
+    path.write_text(MENU_HEADER + "1,甲,甲,a\n", encoding="utf-8")
+    registry = MenuRegistry(path)
+    first = registry.get()
+
+    path.write_text(MENU_HEADER + "1,甲,甲,a\n2,乙,乙,b\n", encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    second = registry.get()
+    assert second.food_items == ["甲", "乙"]
+    assert second.version != first.version
+    assert registry.loads == 2
+
+
+def test_registry_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        MenuRegistry(tmp_path / "missing.csv").get()
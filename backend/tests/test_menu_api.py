@@ -0,0 +1,37 @@
+def test_menu_returns_items_with_etag(client, auth_headers):
+    resp = client.get("/api/menu", headers=auth_headers)
+    assert resp.status_code == 200
+    assert len(resp.json()["items"]) == 32
+    assert resp.headers["etag"].startswith('"')
+    assert "no-cache" in resp.headers["cache-control"]
+
+
+def test_menu_not_modified(client, auth_headers):
+    etag = client.get("/api/menu", headers=auth_headers).headers["etag"]
+    resp = client.get("/api/menu", headers={**auth_headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+    assert resp.content == b""
+
+
+def test_menu_stale_etag(client, auth_headers):
+    resp = client.get("/api/menu", headers={**auth_headers, "If-None-Match": '"stale"'})
+    assert resp.status_code == 200
+
+
+def test_menu_no_auth(client):
+    resp = client.get("/api/menu")
+    assert resp.status_code == 422
+
+
+def test_menu_aliases_learned_from_uploads(client, auth_headers, sample_xlsx_bytes, reexport_xlsx_bytes):
+    client.post("/api/upload", headers=auth_headers, files={"file": ("a.xlsx", sample_xlsx_bytes)})
+    first = client.get("/api/menu/aliases", headers=auth_headers).json()
+    assert first["misses"] == len(first["aliases"])
+    assert {"segment": "荠菜鲜肉馄饨50/份", "menu_id": 2, "item_zh": "荠菜鲜肉馄饨50/份"} in first["aliases"]
+
+    client.post("/api/upload", headers=auth_headers, files={"file": ("b.xlsx", reexport_xlsx_bytes)})
+    second = client.get("/api/menu/aliases", headers=auth_headers).json()
+    # Every segment of the re-export already appeared in the first upload
+    assert second["misses"] == first["misses"]
+    assert second["hits"] > first["hits"]
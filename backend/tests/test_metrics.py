@@ -0,0 +1,124 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app import metrics
+from app.labels import generate_labels_pdf
+from app.menu import get_menu
+from app.metrics import Counter, Gauge, Histogram, Registry
+from app.routing import Location, geocode_address, get_distance_matrix, solve_tsp
+
+
+def test_render_text_format():
+    registry = Registry()
+    lookups = registry.register(Counter("lookups_total", "Lookups", ["result"]))
+    busy = registry.register(Gauge("busy", "Busy"))
+    sizes = registry.register(Histogram("sizes", "Sizes", ["kind"], buckets=(1, 10)))
+
+    lookups.inc("hit")
+    lookups.inc("hit", amount=2)
+    lookups.inc('say "hi"\n')
+    busy.inc()
+    busy.inc()
+    busy.dec()
+    for value in (0.5, 1, 5, 50):
+        sizes.observe(value, "a")
+
+    assert registry.render() == (
+        "# HELP lookups_total Lookups\n"
+        "# TYPE lookups_total counter\n"
+        'lookups_total{result="hit"} 3.0\n'
+        'lookups_total{result="say \\"hi\\"\\n"} 1.0\n'
+        "# HELP busy Busy\n"
+        "# TYPE busy gauge\n"
+        "busy 1.0\n"
+        "# HELP sizes Sizes\n"
+        "# TYPE sizes histogram\n"
+        'sizes_bucket{kind="a",le="1.0"} 2\n'
+        'sizes_bucket{kind="a",le="10.0"} 3\n'
+        'sizes_bucket{kind="a",le="+Inf"} 4\n'
+        'sizes_sum{kind="a"} 56.5\n'
+        'sizes_count{kind="a"} 4\n'
+    )
+
+
+def test_metric_argument_errors():
+    registry = Registry()
+    counter = registry.register(Counter("c_total", "C", ["result"]))
+    with pytest.raises(ValueError, match="takes labels"):
+        counter.inc()
+    with pytest.raises(ValueError, match="only increase"):
+        counter.inc("hit", amount=-1)
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register(Counter("c_total", "Again"))
+
+
+def test_metrics_endpoint_reports_requests_by_route(client, auth_headers):
+    before = metrics.request_seconds.count("GET", "/api/menu", "200")
+    client.get("/api/menu", headers=auth_headers)
+    client.get("/api/menu", headers=auth_headers)
+    client.get("/no/such/page")
+    client.delete("/api/sessions/abc", headers=auth_headers)
+
+    resp = client.get("/metrics", headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert metrics.request_seconds.count("GET", "/api/menu", "200") == before + 2
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/menu",status="200"}' in resp.text
+    assert 'route="unmatched",status="404"' in resp.text
+    assert 'method="DELETE",route="/api/sessions/{session_id}",status="204"' in resp.text
+    # Only the /metrics request itself is still in flight
+    assert 'http_requests_in_progress{method="GET"} 1.0' in resp.text
+
+
+def test_metrics_endpoint_needs_the_password(client, auth_headers, monkeypatch):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Password": "wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer testpassword"}).status_code == 200
+
+    monkeypatch.setenv("METRICS_PUBLIC", "1")
+    assert client.get("/metrics").status_code == 200
+
+
+def test_geocode_cache_counters(geocode_cache):
+    hits, misses = metrics.geocode_cache_lookups.value("hit"), metrics.geocode_cache_lookups.value("miss")
+    resp = MagicMock()
+    resp.json.return_value = {"status": "OK", "results": [{"geometry": {"location": {"lat": 1.0, "lng": 2.0}}}]}
+    geocode_cache.put("1 Main St, San Jose 95110", 1.0, 2.0)
+    with patch("app.routing.requests.get", return_value=resp):
+        geocode_address("1 Main St", "San Jose", "95110", "fake")
+        geocode_address("2 Main St", "San Jose", "95110", "fake")
+
+    assert metrics.geocode_cache_lookups.value("hit") == hits + 1
+    assert metrics.geocode_cache_lookups.value("miss") == misses + 1
+
+
+def test_distance_matrix_counters():
+    locations = [Location(f"{i} Main St", "San Jose", "95110", 37.0, -121.0, f"c{i}", i) for i in range(12)]
+
+    def fake_get(url, params, timeout):
+        n_origins, n_destinations = len(params["origins"].split("|")), len(params["destinations"].split("|"))
+        element = {"status": "OK", "distance": {"value": 1}, "duration": {"value": 1}}
+        resp = MagicMock()
+        resp.json.return_value = {"status": "OK", "rows": [{"elements": [element] * n_destinations}] * n_origins}
+        return resp
+
+    requests_before = metrics.distance_matrix_requests.value()
+    elements_before = metrics.distance_matrix_elements.value()
+    with patch("app.routing.requests.get", side_effect=fake_get):
+        get_distance_matrix(locations, "fake")
+
+    # 12 locations in batches of 10: 10x10, 10x2, 2x10 and 2x2
+    assert metrics.distance_matrix_requests.value() == requests_before + 4
+    assert metrics.distance_matrix_elements.value() == elements_before + 144
+
+
+def test_solve_and_label_histograms():
+    solves = metrics.route_solve_seconds.count()
+    solve_tsp([[0, 1, 2], [1, 0, 1], [2, 1, 0]], 0)
+    assert metrics.route_solve_seconds.count() == solves + 1
+
+    pdfs = metrics.labels_per_pdf.count()
+    generate_labels_pdf([("荠菜鲜肉馄饨50/份", 3)], get_menu().label_lookup)
+    assert metrics.labels_per_pdf.count() == pdfs + 1
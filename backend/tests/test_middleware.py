@@ -0,0 +1,50 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware import BodySizeLimitMiddleware
+
+
+def _app(limit: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/limited": limit})
+
+    @app.post("/limited")
+    async def limited(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/open")
+    async def unlimited(request: Request):
+        return {"size": len(await request.body())}
+
+    return app
+
+
+def _chunks(n_chunks: int, size: int):
+    for _ in range(n_chunks):
+        yield b"x" * size
+
+
+def test_body_under_limit_passes():
+    client = TestClient(_app(1024))
+    resp = client.post("/limited", content=b"x" * 1024)
+    assert resp.status_code == 200
+    assert resp.json() == {"size": 1024}
+
+
+def test_declared_length_over_limit():
+    client = TestClient(_app(1024))
+    resp = client.post("/limited", content=b"x" * 2048)
+    assert resp.status_code == 413
+
+
+def test_streamed_body_cut_off_at_limit():
+    # Chunked upload with no Content-Length: the limit is enforced while streaming
+    client = TestClient(_app(1024))
+    resp = client.post("/limited", content=_chunks(8, 512))
+    assert resp.status_code == 413
+
+
+def test_other_paths_unlimited():
+    client = TestClient(_app(1024))
+    resp = client.post("/open", content=b"x" * 4096)
+    assert resp.status_code == 200
@@ -1,10 +1,8 @@
-import json
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from app.routing import (
-    _CACHE_PATH,
     GeocodingError,
     Location,
     RoutingError,
@@ -15,19 +13,10 @@ from app.routing import (
 )
 
 
-@pytest.fixture(autouse=True)
-def _clean_geocode_cache():
-    """Remove geocode cache file before and after each test."""
-    _CACHE_PATH.unlink(missing_ok=True)
-    yield
-    _CACHE_PATH.unlink(missing_ok=True)
-
-
 class TestGeocodeCache:
-    def test_geocode_uses_cache(self):
+    def test_geocode_uses_cache(self, geocode_cache):
         """When the address is in the cache, the API should NOT be called."""
-        cache = {"123 Main St, New York 10001": {"lat": 40.7, "lng": -74.0}}
-        _CACHE_PATH.write_text(json.dumps(cache))
+        geocode_cache.put("123 Main St, New York 10001", 40.7, -74.0)
 
         with patch("app.routing.requests.get") as mock_get:
             lat, lng = geocode_address("123 Main St", "New York", "10001", "fake-key")
@@ -37,8 +26,8 @@ class TestGeocodeCache:
         assert lng == -74.0
 
     @patch("app.routing.requests.get")
-    def test_geocode_saves_to_cache(self, mock_get):
-        """After a successful API call, the result should be written to the cache file."""
+    def test_geocode_saves_to_cache(self, mock_get, geocode_cache):
+        """After a successful API call, the result should be written to the cache database."""
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
             "status": "OK",
@@ -49,16 +38,14 @@ class TestGeocodeCache:
 
         geocode_address("456 Elm St", "San Francisco", "94102", "fake-key")
 
-        cache = json.loads(_CACHE_PATH.read_text())
-        assert "456 Elm St, San Francisco 94102" in cache
-        assert cache["456 Elm St, San Francisco 94102"] == {"lat": 37.77, "lng": -122.42}
+        geocode_cache.close()  # drop the in-memory copy and read it back from disk
+        assert geocode_cache.get("456 Elm St, San Francisco 94102") == (37.77, -122.42)
 
     @patch("app.routing.requests.get")
-    def test_geocode_cache_miss_calls_api(self, mock_get):
+    def test_geocode_cache_miss_calls_api(self, mock_get, geocode_cache):
         """When the address is NOT in the cache, the API should be called."""
         # Pre-populate cache with a different address
-        cache = {"other address,": {"lat": 0, "lng": 0}}
-        _CACHE_PATH.write_text(json.dumps(cache))
+        geocode_cache.put("other address,", 0, 0)
 
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+from app.routing import RouteStop
+from app.sessions import SessionStore, session_nbytes, session_store
+
+
+def test_session_analyze_matches_order_payload(client, auth_headers, uploaded):
+    indices = [0, 2, 3]
+    by_session = client.post(
+        "/api/analyze", headers=auth_headers, json={"session_id": uploaded["session_id"], "indices": indices}
+    ).json()
+    by_payload = client.post(
+        "/api/analyze",
+        headers=auth_headers,
+        json={"orders": [uploaded["orders"][i]["item_quantities"] for i in indices]},
+    ).json()
+    assert by_session["orders_analyzed"] == 3
+    assert by_session["total_items"] == by_payload["total_items"]
+    assert {(i["item_name"], i["quantity"]) for i in by_session["sorted_items"]} == {
+        (i["item_name"], i["quantity"]) for i in by_payload["sorted_items"]
+    }
+
+
+def test_session_analyze_batch(client, auth_headers, uploaded):
+    resp = client.post(
+        "/api/analyze/batch",
+        headers=auth_headers,
+        json={
+            "session_id": uploaded["session_id"],
+            "selections": [{"name": "A", "indices": [0, 1]}, {"name": "B", "indices": [2, 3]}],
+        },
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [s["orders_analyzed"] for s in data["selections"]] == [2, 2]
+    assert data["combined"]["total_items"] == sum(s["total_items"] for s in data["selections"])
+
+
+def test_session_route_uses_stored_addresses(client, auth_headers, uploaded):
+    with patch("app.routers.routing.optimize_route", return_value=[RouteStop(1, "Start", "s", "", "", -1, 0)]) as opt:
+        with patch("app.routers.routing.get_google_maps_api_key", return_value="fake"):
+            resp = client.post(
+                "/api/route",
+                headers=auth_headers,
+                json={"session_id": uploaded["session_id"], "indices": [1], "start_address": "s"},
+            )
+    assert resp.status_code == 200
+    order = uploaded["orders"][1]
+    assert opt.call_args.args[0] == [
+        {
+            "index": 1,
+            "customer": order["customer"],
+            "address": order["address"],
+            "city": order["city"],
+            "zip_code": order["zip_code"],
+        }
+    ]
+
+
+def test_session_labels(client, auth_headers, uploaded):
+    resp = client.post("/api/labels", headers=auth_headers, json={"session_id": uploaded["session_id"], "indices": [0]})
+    assert resp.status_code == 200
+    assert resp.content[:5] == b"%PDF-"
+
+
+def test_session_unknown_or_deleted(client, auth_headers, uploaded):
+    session_id = uploaded["session_id"]
+    resp = client.post("/api/analyze", headers=auth_headers, json={"session_id": session_id, "indices": [99]})
+    assert resp.status_code == 400
+
+    assert client.delete(f"/api/sessions/{session_id}", headers=auth_headers).status_code == 204
+    resp = client.post("/api/analyze", headers=auth_headers, json={"session_id": session_id, "indices": [0]})
+    assert resp.status_code == 404
+    assert "upload the file again" in resp.json()["detail"]
+
+
+def test_session_store_memory_budget(uploaded):
+    upload_session = session_store.get(uploaded["session_id"])
+    size = session_nbytes(upload_session)
+    assert size > 0
+
+    store = SessionStore(max_bytes=2 * size, ttl=60)
+    first = store.create(upload_session.upload)
+    second = store.create(upload_session.upload)
+    third = store.create(upload_session.upload)
+    assert store.get(first) is None
+    assert store.get(second) is not None and store.get(third) is not None
+    assert store.stats()["nbytes"] <= 2 * size
@@ -0,0 +1,32 @@
+from io import BytesIO
+
+import pytest
+
+from app.analyzer import process_excel
+from app.menu import get_menu
+from benchmarks.synthetic_export import generate_export, generate_orders
+
+
+@pytest.mark.parametrize("fmt", ["raw", "formatted"])
+def test_synthetic_export_parses_without_discrepancies(fmt):
+    df, quantities, discrepancies, detected = process_excel(
+        BytesIO(generate_export(300, fmt, seed=3)), get_menu().food_items
+    )
+    _orders, totals = generate_orders(300, seed=3)
+
+    assert detected == fmt
+    assert len(df) == 300
+    assert discrepancies == []
+    food_items = get_menu().food_items
+    parsed = quantities.groupby("item_id")["quantity"].sum()
+    assert {food_items[i]: int(qty) for i, qty in parsed.items()} == totals
+
+
+def test_synthetic_export_is_deterministic():
+    assert generate_orders(50, seed=7) == generate_orders(50, seed=7)
+    assert generate_orders(50, seed=7) != generate_orders(50, seed=8)
+
+
+def test_synthetic_export_rejects_unknown_format():
+    with pytest.raises(ValueError, match="Unknown format"):
+        generate_export(10, "csv")
@@ -0,0 +1,115 @@
+import json
+import logging
+from io import BytesIO
+from unittest.mock import patch
+
+from app import timing
+from app.menu import get_menu
+from app.routing import optimize_route
+from app.timing import StageTimings, collect, record, stage
+from app.uploads import parse_upload
+
+
+def _stages(header: str) -> dict:
+    """{name: milliseconds} from a Server-Timing header."""
+    result = {}
+    for metric in header.split(", "):
+        name, dur = metric.split(";dur=")
+        result[name] = float(dur)
+    return result
+
+
+def test_stage_outside_collect_records_nothing():
+    with stage("xlsx"):
+        pass
+    record({"xlsx": 1.0})  # nowhere to go, and no error
+
+
+def test_collect_accumulates_repeated_stages():
+    with collect() as timings:
+        for _ in range(3):
+            with stage("geocode"):
+                pass
+        record({"geocode": 1.0, "parse": 0.5})
+    assert set(timings.stages) == {"geocode", "parse"}
+    assert 1.0 < timings.stages["geocode"] < 1.1
+
+
+def test_nested_collect_is_independent():
+    with collect() as outer:
+        with collect() as inner:
+            with stage("match"):
+                pass
+        with stage("validate"):
+            pass
+    assert set(inner.stages) == {"match"}
+    assert set(outer.stages) == {"validate"}
+
+
+def test_collect_disabled(monkeypatch):
+    monkeypatch.setattr(timing, "enabled", False)
+    with collect() as timings:
+        with stage("xlsx"):
+            pass
+    assert timings.stages == {}
+
+
+def test_header_format():
+    timings = StageTimings()
+    timings.add("xlsx", 0.01234)
+    timings.add("match", 0.5)
+    assert timings.header() == "xlsx;dur=12.3, match;dur=500.0"
+
+
+def test_parse_upload_returns_its_timings(sample_xlsx_bytes):
+    parsed = parse_upload(BytesIO(sample_xlsx_bytes), get_menu())
+    assert set(parsed.timings) == {"xlsx", "summary", "orders", "match", "validate", "convert"}
+
+
+def test_upload_server_timing_header_and_log(client, auth_headers, sample_xlsx_bytes, caplog):
+    files = {"file": ("export.xlsx", sample_xlsx_bytes)}
+    with caplog.at_level(logging.INFO, logger="uvicorn.error"):
+        resp = client.post("/api/upload", files=files, headers=auth_headers)
+    assert resp.status_code == 200
+
+    stages = _stages(resp.headers["server-timing"])
+    assert {"parse", "xlsx", "match", "session", "app"} <= set(stages)
+    assert stages["app"] >= stages["parse"] >= stages["xlsx"]
+
+    lines = [r.getMessage() for r in caplog.records if r.getMessage().startswith("timing ")]
+    assert len(lines) == 1
+    log = json.loads(lines[0].removeprefix("timing "))
+    assert log["path"] == "/api/upload"
+    assert log["status"] == 200
+    assert log["xlsx"] == stages["xlsx"]
+
+
+def test_cached_upload_reports_no_parse(client, auth_headers, sample_xlsx_bytes):
+    files = {"file": ("export.xlsx", sample_xlsx_bytes)}
+    client.post("/api/upload", files=files, headers=auth_headers)
+    resp = client.post("/api/upload", files=files, headers=auth_headers)
+    assert "parse" not in _stages(resp.headers["server-timing"])
+
+
+def test_labels_server_timing(client, auth_headers):
+    payload = {"sorted_items": [{"item_name": "荠菜鲜肉馄饨50/份", "quantity": 2}]}
+    resp = client.post("/api/labels", headers=auth_headers, json=payload)
+    assert {"labels_font", "labels_pdf", "app"} <= set(_stages(resp.headers["server-timing"]))
+
+
+def test_route_stages():
+    orders = [
+        {"index": i, "customer": f"c{i}", "address": f"{i} Main St", "city": "San Jose", "zip_code": "95110"}
+        for i in range(2)
+    ]
+    with patch("app.routing.geocode_address", return_value=(37.3, -121.9)):
+        with patch("app.routing.get_distance_matrix", return_value=([[0] * 3] * 3, [[0] * 3] * 3)):
+            with collect() as timings:
+                optimize_route(orders, "Start", "fake")
+    assert set(timings.stages) == {"geocode", "distance_matrix", "solve"}
+
+
+def test_disabled_sends_no_header(client, monkeypatch):
+    monkeypatch.setattr(timing, "enabled", False)
+    resp = client.get("/health")
+    assert "server-timing" not in resp.headers
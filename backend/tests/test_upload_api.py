@@ -1,4 +1,7 @@
 from io import BytesIO
+from unittest.mock import patch
+
+from app.uploads import upload_cache
 
 
 def test_upload_success(client, auth_headers, sample_xlsx_bytes):
@@ -34,3 +37,181 @@ def test_upload_invalid_file(client, auth_headers):
         files={"file": ("test.txt", BytesIO(b"not an xlsx"))},
     )
     assert resp.status_code == 400
+
+
+def test_upload_repeat_served_from_cache(client, auth_headers, sample_xlsx_bytes):
+    first = client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+    assert first.status_code == 200
+
+    with patch("app.uploads.process_excel", side_effect=AssertionError("should not re-parse")):
+        second = client.post("/api/upload", headers=auth_headers, files={"file": ("again.xlsx", sample_xlsx_bytes)})
+
+    assert second.status_code == 200
+    # Same parsed data, but every upload starts its own session
+    first_data, second_data = first.json(), second.json()
+    assert first_data.pop("session_id") != second_data.pop("session_id")
+    assert second_data == first_data
+    assert upload_cache.hits == 1
+    assert upload_cache.misses == 1
+
+
+def test_upload_cache_keyed_by_content(client, auth_headers, sample_xlsx_bytes, sample_xlsx_path):
+    other = (sample_xlsx_path.parent / "sample_routing_export.xlsx").read_bytes()
+    client.post("/api/upload", headers=auth_headers, files={"file": ("a.xlsx", sample_xlsx_bytes)})
+    resp = client.post("/api/upload", headers=auth_headers, files={"file": ("b.xlsx", other)})
+    assert resp.status_code == 200
+    assert upload_cache.misses == 2
+    assert len(upload_cache) == 2
+
+
+def test_upload_key_changes_with_menu():
+    from app.uploads import upload_key
+
+    with patch("app.uploads.menu_version", return_value="v1"):
+        v1 = upload_key("abc123")
+    with patch("app.uploads.menu_version", return_value="v2"):
+        v2 = upload_key("abc123")
+    assert v1 != v2
+    assert v1.split(":")[0] == v2.split(":")[0] == "abc123"
+
+
+def test_upload_too_large(client, auth_headers, sample_xlsx_bytes):
+    with patch("app.routers.upload.get_max_upload_size", return_value=len(sample_xlsx_bytes) - 1):
+        resp = client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+    assert resp.status_code == 413
+
+
+def test_upload_declared_length_over_limit_rejected_before_parsing(client, auth_headers):
+    resp = client.post(
+        "/api/upload",
+        headers={**auth_headers, "Content-Length": str(500 * 1024 * 1024), "Content-Type": "multipart/form-data"},
+        content=b"",
+    )
+    assert resp.status_code == 413
+
+
+def test_upload_columnar_matches_rows(client, auth_headers, sample_xlsx_bytes):
+    rows = client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)}).json()
+    resp = client.post(
+        "/api/upload?layout=columnar",
+        headers=auth_headers,
+        files={"file": ("test.xlsx", sample_xlsx_bytes)},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+
+    assert data["orders"]["items_ordered"] is None
+    assert data["orders"]["index"] == [o["index"] for o in rows["orders"]]
+    assert data["orders"]["customer"] == [o["customer"] for o in rows["orders"]]
+    assert data["food_columns"] == rows["food_columns"]
+
+    # Decode the triplets back into per-order dicts
+    name_by_id = dict(zip(data["menu_ids"], data["food_columns"]))
+    decoded = [{} for _ in data["orders"]["index"]]
+    q = data["quantities"]
+    for order, item, quantity in zip(q["order"], q["item"], q["quantity"]):
+        decoded[order][name_by_id[item]] = quantity
+    assert decoded == [o["item_quantities"] for o in rows["orders"]]
+
+
+def test_upload_columnar_include_text(client, auth_headers, sample_xlsx_bytes):
+    resp = client.post(
+        "/api/upload?layout=columnar&include_text=true",
+        headers=auth_headers,
+        files={"file": ("test.xlsx", sample_xlsx_bytes)},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["orders"]["items_ordered"][0].startswith("肉末香茹胡罗卜糯米烧卖")
+
+
+def test_upload_batch_merges_files(client, auth_headers, sample_xlsx_bytes, sample_xlsx_path):
+    other = sample_xlsx_path.with_name("sample_mismatch_export.xlsx").read_bytes()
+    resp = client.post(
+        "/api/upload/batch",
+        headers=auth_headers,
+        files=[("files", ("a.xlsx", sample_xlsx_bytes)), ("files", ("b.xlsx", other))],
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+
+    assert [f["filename"] for f in data["files"]] == ["a.xlsx", "b.xlsx"]
+    assert [f["orders"] for f in data["files"]] == [4, 59]
+    assert [o["index"] for o in data["orders"]] == list(range(63))
+    assert data["files"][1]["order_indices"] == list(range(4, 63))
+
+    # Only b's summary disagrees with its orders, so the combined shortfall is b's
+    def shortfall(discrepancies):
+        return {d["food_item"]: d["expected_total"] - d["parsed_total"] for d in discrepancies}
+
+    assert data["files"][0]["discrepancies"] == []
+    assert shortfall(data["discrepancies"]) == shortfall(data["files"][1]["discrepancies"]) != {}
+
+
+def test_upload_batch_dedupes_repeated_export(client, auth_headers, sample_xlsx_bytes):
+    single = client.post("/api/upload", headers=auth_headers, files={"file": ("a.xlsx", sample_xlsx_bytes)}).json()
+    resp = client.post(
+        "/api/upload/batch?layout=columnar",
+        headers=auth_headers,
+        files=[("files", ("a.xlsx", sample_xlsx_bytes)), ("files", ("copy.xlsx", sample_xlsx_bytes))],
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+
+    assert data["orders"]["index"] == [o["index"] for o in single["orders"]]
+    assert data["files"][1]["duplicates"] == 4
+    assert data["files"][1]["order_indices"] == [0, 1, 2, 3]
+
+
+def test_upload_batch_names_failing_file(client, auth_headers, sample_xlsx_bytes):
+    resp = client.post(
+        "/api/upload/batch",
+        headers=auth_headers,
+        files=[("files", ("a.xlsx", sample_xlsx_bytes)), ("files", ("notes.txt", BytesIO(b"hello")))],
+    )
+    assert resp.status_code == 400
+    assert resp.json()["detail"].startswith("notes.txt:")
+
+
+def test_upload_batch_too_many_files(client, auth_headers, sample_xlsx_bytes, monkeypatch):
+    monkeypatch.setenv("UPLOAD_BATCH_MAX_FILES", "1")
+    resp = client.post(
+        "/api/upload/batch",
+        headers=auth_headers,
+        files=[("files", ("a.xlsx", sample_xlsx_bytes)), ("files", ("b.xlsx", sample_xlsx_bytes))],
+    )
+    assert resp.status_code == 400
+
+
+def test_upload_delta(client, auth_headers, sample_xlsx_bytes, reexport_xlsx_bytes):
+    first = client.post("/api/upload", headers=auth_headers, files={"file": ("a.xlsx", sample_xlsx_bytes)}).json()
+
+    resp = client.post(
+        "/api/upload/delta",
+        headers=auth_headers,
+        params={"previous_upload_id": first["upload_id"]},
+        files={"file": ("b.xlsx", reexport_xlsx_bytes)},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+
+    assert data["previous_upload_id"] == first["upload_id"]
+    assert data["previous_index"] == [0, 1, 2, None]
+    assert [o["customer"] for o in data["added"]] == ["钱七"]
+    assert [o["index"] for o in data["changed"]] == [2]
+    assert data["changed"][0]["item_quantities"]["素鸭每份"] == 5
+    assert data["removed"] == [3]
+
+    # The re-export is cached under its own id, ready to be the next previous upload
+    full = client.post("/api/upload", headers=auth_headers, files={"file": ("b.xlsx", reexport_xlsx_bytes)}).json()
+    assert full["upload_id"] == data["upload_id"]
+    assert data["discrepancies"] == full["discrepancies"]
+
+
+def test_upload_delta_unknown_previous(client, auth_headers, sample_xlsx_bytes):
+    resp = client.post(
+        "/api/upload/delta",
+        headers=auth_headers,
+        params={"previous_upload_id": "deadbeef:0"},
+        files={"file": ("a.xlsx", sample_xlsx_bytes)},
+    )
+    assert resp.status_code == 404
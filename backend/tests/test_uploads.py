@@ -0,0 +1,122 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+
+from app.analyzer import parse_order_items
+from app.menu import get_menu
+from app.uploads import (
+    ORDER_FIELDS,
+    ParsedUpload,
+    apply_delta,
+    merge_uploads,
+    parse_changed_rows,
+    parse_upload,
+    row_hashes,
+)
+
+FOOD_ITEMS = ["韭菜猪肉水饺", "红烧猪蹄每份"]
+
+
+def _upload(customers, triplets, discrepancies=(), fmt="raw"):
+    columns = {field: [f"{field}-{c}" for c in customers] for field in ORDER_FIELDS}
+    return ParsedUpload(
+        columns=columns,
+        order_index=[t[0] for t in triplets],
+        item_id=[t[1] for t in triplets],
+        quantity=[t[2] for t in triplets],
+        discrepancies=list(discrepancies),
+        fmt=fmt,
+        food_items=FOOD_ITEMS,
+        food_column_labels={},
+        menu_ids=[1, 2],
+    )
+
+
+def test_merge_drops_orders_seen_in_earlier_file():
+    a = _upload(["amy", "bob"], [(0, 0, 2), (1, 1, 1)])
+    b = _upload(["bob", "cat"], [(0, 1, 1), (1, 0, 3)])
+
+    merged = merge_uploads([a, b])
+
+    assert merged.upload.columns["customer"] == ["customer-amy", "customer-bob", "customer-cat"]
+    assert merged.order_indices == [[0, 1], [1, 2]]
+    assert merged.duplicates == [0, 1]
+    assert list(zip(merged.upload.order_index, merged.upload.item_id, merged.upload.quantity)) == [
+        (0, 0, 2),
+        (1, 1, 1),
+        (2, 0, 3),
+    ]
+
+
+def test_merge_matches_duplicates_by_occurrence():
+    a = _upload(["amy"], [(0, 0, 1)])
+    b = _upload(["amy", "amy"], [(0, 0, 1), (1, 0, 1)])
+
+    merged = merge_uploads([a, b])
+
+    # Repeats within one file are separate orders; only one of b's matches a's
+    assert len(merged.upload) == 2
+    assert merged.order_indices == [[0], [0, 1]]
+    assert merged.duplicates == [0, 1]
+
+
+def test_merge_combines_discrepancies():
+    # a parsed 2 dumplings but its summary says 3; b's summary says 1 more than parsed too
+    a = _upload(["amy"], [(0, 0, 2)], discrepancies=[("韭菜猪肉水饺", 2, 3)])
+    b = _upload(["bob"], [(0, 0, 4)], discrepancies=[("韭菜猪肉水饺", 4, 5)])
+    c = _upload(["cat"], [(0, 1, 1)], discrepancies=[("红烧猪蹄每份", 1, 0)], fmt="formatted")
+
+    merged = merge_uploads([a, b, c])
+
+    assert merged.upload.discrepancies == [("韭菜猪肉水饺", 6, 8), ("红烧猪蹄每份", 1, 0)]
+    assert merged.upload.fmt == "mixed"
+
+
+def test_merge_drops_mismatches_that_cancel_out():
+    # a's summary is one dumpling over what was parsed, b's one under: the combined totals agree
+    a = _upload(["amy"], [(0, 0, 2)], discrepancies=[("韭菜猪肉水饺", 2, 3)])
+    b = _upload(["bob"], [(0, 0, 4)], discrepancies=[("韭菜猪肉水饺", 4, 3)])
+
+    merged = merge_uploads([a, b])
+
+    assert merged.upload.discrepancies == []
+    assert a.discrepancies == [("韭菜猪肉水饺", 2, 3)]
+
+
+def test_merge_requires_parts():
+    with pytest.raises(ValueError):
+        merge_uploads([])
+
+
+def test_apply_delta_matches_full_parse(sample_xlsx_path, reexport_xlsx_bytes):
+    menu = get_menu()
+    with open(sample_xlsx_path, "rb") as f:
+        previous = parse_upload(f, menu)
+
+    with patch("app.uploads.parse_order_items", wraps=parse_order_items) as parse_items:
+        changes = parse_changed_rows(BytesIO(reexport_xlsx_bytes), menu, row_hashes(previous.columns))
+    delta = apply_delta(previous, changes, menu)
+
+    # Only 王五's edited order and the new order 5 were parsed
+    assert len(parse_items.call_args.args[0]) == 2
+    assert delta.upload == parse_upload(BytesIO(reexport_xlsx_bytes), menu)
+    assert delta.previous_index == [0, 1, 2, None]
+    assert delta.changed == [2]
+    assert delta.added == [3]
+    assert delta.removed == [3]
+
+
+def test_apply_delta_unchanged_export(sample_xlsx_path):
+    menu = get_menu()
+    with open(sample_xlsx_path, "rb") as f:
+        previous = parse_upload(f, menu)
+        f.seek(0)
+        changes = parse_changed_rows(f, menu, row_hashes(previous.columns))
+
+    delta = apply_delta(previous, changes, menu)
+
+    assert changes.rows == []
+    assert delta.upload == previous
+    assert delta.previous_index == [0, 1, 2, 3]
+    assert delta.added == delta.changed == delta.removed == []
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, metrics
+from app.aliases import alias_table
+from app.menu import get_menu
+from app.uploads import upload_cache
+from app.warmup import WarmUp, warm_parsing
+from app.workers import ParsePool
+
+
+def test_failed_step_is_reported_and_the_rest_still_run():
+    ran = []
+
+    def broken():
+        raise RuntimeError("no font")
+
+    warmup = WarmUp([("labels", broken), ("menu", lambda: ran.append("menu"))])
+    assert not warmup.ready
+    warmup.run()
+
+    assert warmup.ready
+    assert ran == ["menu"]
+    status = warmup.status()
+    assert status["status"] == "ready"
+    assert set(status["steps"]) == {"labels", "menu"}
+    assert status["errors"] == {"labels": "no font"}
+
+
+def test_default_steps_leave_no_trace():
+    pdfs = metrics.labels_per_pdf.count()
+    warmup = WarmUp()
+    warmup.run()
+
+    assert warmup.status()["errors"] == {}
+    assert len(upload_cache) == 0
+    assert alias_table.snapshot(get_menu()) == {}
+    assert metrics.labels_per_pdf.count() == pdfs
+
+
+def test_process_pool_warm_up_starts_workers():
+    pool = ParsePool(max_workers=1, timeout=120, max_pending=2)
+    try:
+        pool.warm_up()
+        assert pool._executor is not None
+    finally:
+        pool.shutdown()
+
+
+def test_warm_parsing_runs_in_thread_mode():
+    ParsePool(max_workers=0, timeout=60, max_pending=2).warm_up()  # nothing to start
+    warm_parsing()
+
+
+def test_ready_endpoint(client, monkeypatch):
+    warmup = WarmUp([])
+    monkeypatch.setattr(main, "warmup", warmup)
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "warming"
+
+    warmup.run()
+    resp = client.get("/ready")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ready", "skipped": False, "steps": {}, "errors": {}}
+
+
+@pytest.mark.parametrize("enabled", ["1", "0"])
+def test_lifespan_starts_warm_up(monkeypatch, enabled):
+    warmup = WarmUp()
+    monkeypatch.setattr(main, "warmup", warmup)
+    monkeypatch.setenv("WARMUP", enabled)
+    monkeypatch.setenv("WARMUP_DELAY_SECONDS", "0")
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        assert warmup.wait(60)
+        resp = client.get("/ready")
+    assert resp.status_code == 200
+    assert resp.json()["skipped"] is (enabled == "0")
+    assert ("parsing" in resp.json()["steps"]) is (enabled == "1")
+
+
+def test_ready_is_503_until_warm_up_finishes(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_step():
+        started.set()
+        release.wait(10)
+
+    warmup = WarmUp([("slow", slow_step)])
+    monkeypatch.setattr(main, "warmup", warmup)
+    monkeypatch.setenv("WARMUP_DELAY_SECONDS", "0")
+    with TestClient(main.app) as client:
+        assert started.wait(10)
+        assert client.get("/ready").status_code == 503
+        assert client.get("/health").status_code == 200
+
+        release.set()
+        assert warmup.wait(10)
+        assert client.get("/ready").status_code == 200
+
+
+def test_first_step_waits_for_the_delay(monkeypatch):
+    ran = []
+    warmup = WarmUp([("menu", lambda: ran.append("menu"))])
+    monkeypatch.setattr(main, "warmup", warmup)
+    monkeypatch.setenv("WARMUP_DELAY_SECONDS", "0.5")
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 503
+        assert ran == []
+        assert warmup.wait(10)
+    assert ran == ["menu"]
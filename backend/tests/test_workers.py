@@ -0,0 +1,162 @@
+import asyncio
+import time
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from app.menu import get_menu
+from app.workers import ParsePool, PoolBusyError, PoolTimeoutError, parse_pool
+
+
+def test_process_pool_parses_upload(sample_xlsx_path):
+    pool = ParsePool(max_workers=1, timeout=120, max_pending=2)
+    try:
+        with open(sample_xlsx_path, "rb") as f:
+            parsed = asyncio.run(pool.parse(f, get_menu()))
+    finally:
+        pool.shutdown()
+    assert len(parsed) == 4
+    assert parsed.columns["customer"][0] == "张三"
+    assert pool.pending == 0
+
+
+def test_thread_mode_parses_upload(sample_xlsx_path):
+    pool = ParsePool(max_workers=0, timeout=60, max_pending=2)
+    with open(sample_xlsx_path, "rb") as f:
+        parsed = asyncio.run(pool.parse(f, get_menu()))
+    assert len(parsed) == 4
+
+
+def test_pool_propagates_job_errors():
+    pool = ParsePool(max_workers=0, timeout=60, max_pending=2)
+
+    def fail():
+        raise ValueError("bad export")
+
+    with pytest.raises(ValueError, match="bad export"):
+        asyncio.run(pool.run(fail))
+    assert pool.pending == 0
+
+
+def test_pool_timeout():
+    pool = ParsePool(max_workers=0, timeout=0.05, max_pending=2)
+    with pytest.raises(PoolTimeoutError):
+        asyncio.run(pool.run(time.sleep, 0.5))
+    assert pool.pending == 0
+
+
+def test_timed_out_thread_job_stays_pending_until_it_ends():
+    pool = ParsePool(max_workers=0, timeout=0.05, max_pending=1)
+
+    async def scenario():
+        with pytest.raises(PoolTimeoutError):
+            await pool.run(time.sleep, 0.3)
+        # The thread is still running the job, so the pool is still full
+        assert pool.pending == 1
+        with pytest.raises(PoolBusyError):
+            await pool.run(time.sleep, 0)
+        await asyncio.sleep(0.5)
+        assert pool.pending == 0
+        await pool.run(time.sleep, 0)
+
+    asyncio.run(scenario())
+
+
+def test_process_pool_timeout_stops_the_worker():
+    pool = ParsePool(max_workers=1, timeout=120, max_pending=2)
+
+    async def scenario():
+        await pool.run(time.sleep, 0)  # start the worker first
+        hung = pool._executor
+        workers = list(hung._processes.values())
+        pool.timeout = 0.2
+        with pytest.raises(PoolTimeoutError):
+            await pool.run(time.sleep, 60)
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.pending == 0
+        assert pool._executor is None
+        for process in workers:
+            process.join(5)
+            assert not process.is_alive()
+
+        pool.timeout = 120
+        await pool.run(time.sleep, 0)
+        assert pool._executor is not hung
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_process_pool_timeout_lets_other_jobs_finish():
+    pool = ParsePool(max_workers=2, timeout=120, max_pending=4)
+
+    async def scenario():
+        await asyncio.to_thread(pool.warm_up)
+        retired = pool._executor
+        workers = list(retired._processes.values())
+
+        pool.timeout = 0.5
+        slow = asyncio.ensure_future(pool.run(time.sleep, 60))
+        await asyncio.sleep(0)
+        pool.timeout = 120
+        normal = asyncio.ensure_future(pool.run(time.sleep, 1.5))
+
+        with pytest.raises(PoolTimeoutError):
+            await slow
+        # The other user's parse keeps its worker, and new jobs go to a fresh pool
+        assert all(process.is_alive() for process in workers)
+        await pool.run(time.sleep, 0)
+        assert pool._executor is not retired
+
+        assert await normal is None
+        for process in workers:
+            process.join(5)
+            assert not process.is_alive()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.pending == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_when_queue_full():
+    pool = ParsePool(max_workers=0, timeout=60, max_pending=1)
+
+    async def two_jobs():
+        first = asyncio.ensure_future(pool.run(time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        try:
+            await pool.run(time.sleep, 0)
+        finally:
+            await first
+
+    with pytest.raises(PoolBusyError):
+        asyncio.run(two_jobs())
+
+
+def test_upload_busy_returns_503(client, auth_headers, sample_xlsx_bytes):
+    from app.uploads import upload_cache
+
+    upload_cache.clear()
+    with patch.object(parse_pool, "max_pending", 0):
+        resp = client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "5"
+
+
+def test_upload_after_worker_restart_returns_503(client, auth_headers, sample_xlsx_bytes):
+    with patch.object(parse_pool, "parse", side_effect=BrokenProcessPool("worker stopped")):
+        resp = client.post("/api/upload", headers=auth_headers, files={"file": ("test.xlsx", sample_xlsx_bytes)})
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pandas as pd
+
+from app.zip_index import cities_for_zips, load_zip_index
+
+
+def test_cities_for_zips():
+    zips = pd.Series(["94536", "95014", "94086", "90001", "96162", "94536-1234", "10001", "", None, "9453", "abc"])
+    assert cities_for_zips(zips).tolist() == [
+        "Fremont",
+        "Cupertino",
+        "Sunnyvale",
+        "Los Angeles",
+        "Truckee",
+        "Fremont",
+        None,
+        None,
+        None,
+        None,
+        None,
+    ]
+
+
+def test_cities_for_zips_keeps_index():
+    result = cities_for_zips(pd.Series(["94536", "10001"], index=[5, 9]))
+    assert result.index.tolist() == [5, 9]
+
+
+def test_zip3_fallback_needs_dominant_city(tmp_path):
+    path = tmp_path / "zips.csv"
+    rows = [f"951{n:02d},San Jose" for n in range(1, 20)] + ["95140,Mount Hamilton"]
+    rows += ["94501,Alameda", "94502,Alameda", "94536,Fremont"]
+    path.write_text("zip,city\n" + "\n".join(rows) + "\n")
+    index = load_zip_index(path)
+
+    result = index.lookup(pd.Series(["95140", "95150", "94540", "94536", "93000"]))
+    # 951 is 19/20 San Jose; 945 has no city with 90% of its ZIPs
+    assert result.tolist() == ["Mount Hamilton", "San Jose", None, "Fremont", None]
+
+
+def test_index_loaded_lazily():
+    code = "import app.analyzer, app.zip_index as z; print(z.get_zip_index.cache_info().currsize)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "0"
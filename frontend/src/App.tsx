@@ -1,8 +1,10 @@
 import { useState } from "react";
-import type { UploadResponse, SortedItem, OrderItem } from "./types";
+import type { UploadResponse, SortedItem, OrderItem, UploadDeltaResponse } from "./types";
 import { useAuth } from "./hooks/useAuth";
+import { applyUploadDelta, deleteSession } from "./api";
 import LoginForm from "./components/LoginForm";
 import FileUpload from "./components/FileUpload";
+import ReuploadButton from "./components/ReuploadButton";
 import AnalyzePage from "./pages/AnalyzePage";
 import LabelsPage from "./pages/LabelsPage";
 import RoutingPage from "./pages/RoutingPage";
@@ -96,7 +98,43 @@ function App() {
     }
   };
 
+  const handleDelta = (delta: UploadDeltaResponse) => {
+    if (uploadData?.session_id && uploadData.session_id !== delta.session_id) {
+      deleteSession(password, uploadData.session_id);
+    }
+    setUploadData((prev) =>
+      prev && {
+        ...prev,
+        discrepancies: delta.discrepancies,
+        food_columns: delta.food_columns,
+        format: delta.format,
+        food_column_labels: delta.food_column_labels,
+        upload_id: delta.upload_id,
+        session_id: delta.session_id,
+      },
+    );
+    setFoodColumnLabels(delta.food_column_labels || {});
+    setSortedItems(null);
+
+    // Orders new in this export get a group the way a fresh upload assigns them
+    const added = new Set(delta.added.map((o) => o.index));
+    const next = applyUploadDelta(orders, delta).map((o) =>
+      added.has(o.index) && !o.isManual
+        ? { ...o, group: delta.format === "formatted" ? "A" : assignGroup(o.city, o.zip_code) }
+        : o,
+    );
+    const colors = { ...groupColors };
+    for (const g of new Set(next.map((o) => o.group).filter(Boolean) as string[])) {
+      if (!colors[g]) {
+        colors[g] = GROUP_COLORS_MAP[g] || GROUP_COLORS[Object.keys(colors).length % GROUP_COLORS.length];
+      }
+    }
+    setGroupColors(colors);
+    setOrders(next);
+  };
+
   const handleReset = () => {
+    if (uploadData?.session_id) deleteSession(password, uploadData.session_id);
     setUploadData(null);
     setOrders([]);
     setIsConfirmed(false);
@@ -172,6 +210,9 @@ function App() {
               Back to Preview
             </button>
           )}
+          {uploadData?.upload_id && (
+            <ReuploadButton password={password} previousUploadId={uploadData.upload_id} onDelta={handleDelta} />
+          )}
           {uploadData && (
             <button onClick={handleReset} className="text-sm text-gray-700 border border-gray-300 rounded px-3 py-1 hover:bg-rose-600 hover:text-white hover:border-rose-600">
               Upload new file
@@ -238,6 +279,7 @@ function App() {
                 showLabel={showLabel}
                 onToggleLabel={() => setShowLabel((v) => !v)}
                 foodColumnLabels={foodColumnLabels}
+                sessionId={uploadData.session_id}
               />
             ) : activeTab === "labels" ? (
               <LabelsPage sortedItems={sortedItems} password={password} />
@@ -249,6 +291,7 @@ function App() {
                 showLabel={showLabel}
                 onToggleLabel={() => setShowLabel((v) => !v)}
                 foodColumnLabels={foodColumnLabels}
+                sessionId={uploadData.session_id}
               />
             )}
           </div>
@@ -1,4 +1,14 @@
-import type { AnalyzeResponse, MenuResponse, RouteResponse, UploadResponse } from "./types";
+import type {
+  AnalyzeResponse,
+  BatchUploadResponse,
+  ColumnarBatchUploadResponse,
+  ColumnarUploadResponse,
+  MenuResponse,
+  OrderItem,
+  RouteResponse,
+  UploadDeltaResponse,
+  UploadResponse,
+} from "./types";
 
 const BASE = "/api";
 
@@ -23,7 +33,67 @@ export async function fetchMenu(password: string): Promise<MenuResponse> {
 export async function uploadFile(password: string, file: File): Promise<UploadResponse> {
   const form = new FormData();
   form.append("file", file);
-  const res = await apiFetch("/upload", {
+  const res = await apiFetch("/upload?layout=columnar", {
+    method: "POST",
+    headers: authHeaders(password),
+    body: form,
+  });
+  return decodeColumnarUpload(await res.json());
+}
+
+export async function uploadFiles(password: string, files: File[]): Promise<BatchUploadResponse> {
+  const form = new FormData();
+  for (const file of files) form.append("files", file);
+  const res = await apiFetch("/upload/batch?layout=columnar", {
+    method: "POST",
+    headers: authHeaders(password),
+    body: form,
+  });
+  const data: ColumnarBatchUploadResponse = await res.json();
+  return { ...decodeColumnarUpload(data), files: data.files };
+}
+
+export function decodeColumnarUpload(data: ColumnarUploadResponse): UploadResponse {
+  const nameById = new Map(data.menu_ids.map((id, i) => [id, data.food_columns[i]]));
+  const cols = data.orders;
+  const orders: OrderItem[] = cols.index.map((index, i) => ({
+    index,
+    delivery: cols.delivery[i],
+    customer: cols.customer[i],
+    items_ordered: cols.items_ordered?.[i] ?? "",
+    phone_number: cols.phone_number[i],
+    address: cols.address[i],
+    city: cols.city[i],
+    zip_code: cols.zip_code[i],
+    item_quantities: {},
+  }));
+
+  const { order, item, quantity } = data.quantities;
+  for (let k = 0; k < order.length; k++) {
+    const name = nameById.get(item[k]);
+    if (name !== undefined) orders[order[k]].item_quantities[name] = quantity[k];
+  }
+
+  return {
+    orders,
+    discrepancies: data.discrepancies,
+    food_columns: data.food_columns,
+    format: data.format,
+    food_column_labels: data.food_column_labels,
+    upload_id: data.upload_id,
+    session_id: data.session_id,
+  };
+}
+
+export async function uploadDelta(
+  password: string,
+  file: File,
+  previousUploadId: string,
+): Promise<UploadDeltaResponse> {
+  const form = new FormData();
+  form.append("file", file);
+  const params = new URLSearchParams({ previous_upload_id: previousUploadId });
+  const res = await apiFetch(`/upload/delta?${params}`, {
     method: "POST",
     headers: authHeaders(password),
     body: form,
@@ -31,6 +101,28 @@ export async function uploadFile(password: string, file: File): Promise<UploadRe
   return res.json();
 }
 
+// Carry local state over to a re-export. Orders are matched by their index in the previous
+// upload, manual or not: unchanged rows keep local edits and stay deleted if removed locally,
+// changed rows take the new export's values but keep their group, and orders that never came
+// from the upload (added by hand) are renumbered after the new export's.
+export function applyUploadDelta(orders: OrderItem[], delta: UploadDeltaResponse): OrderItem[] {
+  const uploaded = new Set<number>(delta.removed);
+  for (const prevIndex of delta.previous_index) if (prevIndex !== null) uploaded.add(prevIndex);
+  const local = new Map(orders.filter((o) => uploaded.has(o.index)).map((o) => [o.index, o]));
+  const fresh = new Map([...delta.added, ...delta.changed].map((o) => [o.index, o]));
+
+  const next: OrderItem[] = [];
+  delta.previous_index.forEach((prevIndex, index) => {
+    const old = prevIndex === null ? undefined : local.get(prevIndex);
+    const updated = fresh.get(index);
+    if (updated) next.push(old?.group ? { ...updated, group: old.group } : updated);
+    else if (old) next.push({ ...old, index });
+  });
+
+  const added = orders.filter((o) => !uploaded.has(o.index));
+  return [...next, ...added.map((o, k) => ({ ...o, index: delta.total_orders + k }))];
+}
+
 export async function analyzeOrders(
   password: string,
   orders: Record<string, number>[],
@@ -43,6 +135,20 @@ export async function analyzeOrders(
   return res.json();
 }
 
+/** Same as analyzeOrders for orders of an upload session, sent as their indices. */
+export async function analyzeSessionOrders(
+  password: string,
+  sessionId: string,
+  indices: number[],
+): Promise<AnalyzeResponse> {
+  const res = await apiFetch("/analyze", {
+    method: "POST",
+    headers: { ...authHeaders(password), "Content-Type": "application/json" },
+    body: JSON.stringify({ session_id: sessionId, indices }),
+  });
+  return res.json();
+}
+
 export async function routeOrders(
   password: string,
   orders: { index: number; customer: string; address: string; city: string; zip_code: string }[],
@@ -61,6 +167,35 @@ export async function routeOrders(
   return res.json();
 }
 
+/** Same as routeOrders for orders of an upload session, sent as their indices. */
+export async function routeSessionOrders(
+  password: string,
+  sessionId: string,
+  indices: number[],
+  startAddress: string,
+  departureTime?: number,
+): Promise<RouteResponse> {
+  const res = await apiFetch("/route", {
+    method: "POST",
+    headers: { ...authHeaders(password), "Content-Type": "application/json" },
+    body: JSON.stringify({
+      session_id: sessionId,
+      indices,
+      start_address: startAddress,
+      ...(departureTime !== undefined && { departure_time: departureTime }),
+    }),
+  });
+  return res.json();
+}
+
+/** Free an upload session on the server; failures are ignored since sessions also expire. */
+export async function deleteSession(password: string, sessionId: string): Promise<void> {
+  await apiFetch(`/sessions/${encodeURIComponent(sessionId)}`, {
+    method: "DELETE",
+    headers: authHeaders(password),
+  }).catch(() => undefined);
+}
+
 export async function downloadLabels(
   password: string,
   sortedItems: { item_name: string; quantity: number }[],
@@ -1,14 +1,40 @@
 import { useState } from "react";
-import type { Discrepancy } from "../types";
+import type { BatchFileResult, Discrepancy } from "../types";
 
 interface DiscrepancyWarningProps {
   discrepancies: Discrepancy[];
+  /** Per-file results of a batch upload; their mismatches can cancel out in the combined totals */
+  files?: BatchFileResult[];
 }
 
-export default function DiscrepancyWarning({ discrepancies }: DiscrepancyWarningProps) {
+function DiscrepancyTable({ discrepancies }: { discrepancies: Discrepancy[] }) {
+  return (
+    <table className="mt-3 w-full text-sm">
+      <thead>
+        <tr className="text-left text-yellow-900">
+          <th className="pb-1">Item</th>
+          <th className="pb-1">Parsed</th>
+          <th className="pb-1">Expected</th>
+        </tr>
+      </thead>
+      <tbody>
+        {discrepancies.map((d) => (
+          <tr key={d.food_item} className="text-yellow-800">
+            <td className="py-0.5">{d.food_item}</td>
+            <td className="py-0.5">{d.parsed_total}</td>
+            <td className="py-0.5">{d.expected_total}</td>
+          </tr>
+        ))}
+      </tbody>
+    </table>
+  );
+}
+
+export default function DiscrepancyWarning({ discrepancies, files = [] }: DiscrepancyWarningProps) {
   const [expanded, setExpanded] = useState(false);
+  const fileIssues = files.filter((f) => f.discrepancies.length > 0);
 
-  if (discrepancies.length === 0) return null;
+  if (discrepancies.length === 0 && fileIssues.length === 0) return null;
 
   return (
     <div className="bg-yellow-50 border border-yellow-300 rounded-lg p-4">
@@ -18,28 +44,21 @@ export default function DiscrepancyWarning({ discrepancies }: DiscrepancyWarning
       >
         <span>{expanded ? "▼" : "▶"}</span>
         <span>
-          {discrepancies.length} discrepanc{discrepancies.length === 1 ? "y" : "ies"} found
+          {discrepancies.length > 0
+            ? `${discrepancies.length} discrepanc${discrepancies.length === 1 ? "y" : "ies"} found`
+            : `Discrepancies in ${fileIssues.length} file${fileIssues.length === 1 ? "" : "s"}; the combined totals match`}
         </span>
       </button>
       {expanded && (
-        <table className="mt-3 w-full text-sm">
-          <thead>
-            <tr className="text-left text-yellow-900">
-              <th className="pb-1">Item</th>
-              <th className="pb-1">Parsed</th>
-              <th className="pb-1">Expected</th>
-            </tr>
-          </thead>
-          <tbody>
-            {discrepancies.map((d) => (
-              <tr key={d.food_item} className="text-yellow-800">
-                <td className="py-0.5">{d.food_item}</td>
-                <td className="py-0.5">{d.parsed_total}</td>
-                <td className="py-0.5">{d.expected_total}</td>
-              </tr>
-            ))}
-          </tbody>
-        </table>
+        <>
+          {discrepancies.length > 0 && <DiscrepancyTable discrepancies={discrepancies} />}
+          {fileIssues.map((f, i) => (
+            <div key={i} className="mt-3">
+              <p className="text-sm font-medium text-yellow-900">{f.filename}</p>
+              <DiscrepancyTable discrepancies={f.discrepancies} />
+            </div>
+          ))}
+        </>
       )}
     </div>
   );
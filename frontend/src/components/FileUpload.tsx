@@ -1,6 +1,6 @@
 import { useRef, useState } from "react";
 import type { UploadResponse } from "../types";
-import { uploadFile } from "../api";
+import { uploadFile, uploadFiles } from "../api";
 import Spinner from "./Spinner";
 
 interface FileUploadProps {
@@ -15,13 +15,15 @@ export default function FileUpload({ password, onUpload }: FileUploadProps) {
   const fileRef = useRef<HTMLInputElement>(null);
 
   const handleProcess = async () => {
-    const file = fileRef.current?.files?.[0];
-    if (!file) return;
+    const files = Array.from(fileRef.current?.files ?? []);
+    if (files.length === 0) return;
 
     setLoading(true);
     setError(null);
     try {
-      const data = await uploadFile(password, file);
+      // Several exports are merged (and deduplicated) server-side
+      const data =
+        files.length === 1 ? await uploadFile(password, files[0]) : await uploadFiles(password, files);
       onUpload(data);
     } catch (e) {
       setError(e instanceof Error ? e.message : "Upload failed");
@@ -39,6 +41,7 @@ export default function FileUpload({ password, onUpload }: FileUploadProps) {
             ref={fileRef}
             type="file"
             accept=".xlsx"
+            multiple
             onChange={() => setHasFile(!!fileRef.current?.files?.[0])}
             className="flex-1 text-sm text-gray-600 file:mr-4 file:py-2 file:px-4 file:rounded-md file:border file:border-rose-300 file:text-sm file:font-semibold file:bg-rose-50 file:text-rose-700 hover:file:bg-rose-100"
           />
@@ -0,0 +1,53 @@
+import { useRef, useState } from "react";
+import type { UploadDeltaResponse } from "../types";
+import { uploadDelta } from "../api";
+import Spinner from "./Spinner";
+
+interface ReuploadButtonProps {
+  password: string;
+  previousUploadId: string;
+  onDelta: (delta: UploadDeltaResponse) => void;
+}
+
+// Re-upload a later export of the same orders; only what changed is parsed, and edits and groups carry over
+export default function ReuploadButton({ password, previousUploadId, onDelta }: ReuploadButtonProps) {
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+  const fileRef = useRef<HTMLInputElement>(null);
+
+  const handleFile = async () => {
+    const file = fileRef.current?.files?.[0];
+    if (!file) return;
+
+    setLoading(true);
+    setError(null);
+    try {
+      onDelta(await uploadDelta(password, file, previousUploadId));
+    } catch (e) {
+      setError(e instanceof Error ? e.message : "Re-upload failed");
+    } finally {
+      setLoading(false);
+      if (fileRef.current) fileRef.current.value = "";
+    }
+  };
+
+  return (
+    <span className="flex items-center gap-2">
+      {error && <span className="text-sm text-red-600">{error}</span>}
+      <input
+        ref={fileRef}
+        type="file"
+        accept=".xlsx"
+        onChange={handleFile}
+        className="hidden"
+      />
+      <button
+        onClick={() => fileRef.current?.click()}
+        disabled={loading}
+        className="text-sm text-gray-700 border border-gray-300 rounded px-3 py-1 hover:bg-rose-600 hover:text-white hover:border-rose-600 disabled:opacity-50"
+      >
+        {loading ? <><Spinner className="inline mr-1.5" />Updating...</> : "Re-upload export"}
+      </button>
+    </span>
+  );
+}
@@ -0,0 +1,99 @@
+import { useEffect, useRef, useState } from "react";
+import type { AnalyzeResponse } from "../types";
+
+/** Server reply to a selection change: new totals of the items that changed (0 = gone). */
+export interface LiveTotalsMessage {
+  changed: Record<string, number>;
+  total_items: number;
+  orders_selected: number;
+}
+
+/** Apply a live-totals reply to the current item totals. */
+export function applyLiveChanges(
+  totals: Record<string, number>,
+  changed: Record<string, number>,
+): Record<string, number> {
+  const next = { ...totals };
+  for (const [name, quantity] of Object.entries(changed)) {
+    if (quantity === 0) delete next[name];
+    else next[name] = quantity;
+  }
+  return next;
+}
+
+/** Live totals as an analysis result, most ordered items first. */
+export function liveAnalysis(
+  totals: Record<string, number>,
+  totalItems: number,
+  ordersSelected: number,
+): AnalyzeResponse {
+  const sorted_items = Object.entries(totals)
+    .map(([item_name, quantity]) => ({ item_name, quantity }))
+    .sort((a, b) => b.quantity - a.quantity || a.item_name.localeCompare(b.item_name));
+  return { sorted_items, total_items: totalItems, orders_analyzed: ordersSelected };
+}
+
+/**
+ * Item totals of the selected orders of an upload session, kept current over
+ * a WebSocket. Only the orders added or removed since the last change are
+ * sent, and only the item totals that moved come back. Pass null as indices
+ * to pause (e.g. while the selection includes orders the session lacks).
+ */
+export function useLiveTotals(
+  password: string,
+  sessionId: string | null | undefined,
+  indices: Set<number> | null,
+) {
+  const [ready, setReady] = useState(false);
+  const [totals, setTotals] = useState<Record<string, number>>({});
+  const [totalItems, setTotalItems] = useState(0);
+  const [ordersSelected, setOrdersSelected] = useState(0);
+  const socketRef = useRef<WebSocket | null>(null);
+  const sentRef = useRef<Set<number>>(new Set());
+
+  useEffect(() => {
+    if (!sessionId) return;
+    const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
+    const ws = new WebSocket(
+      `${protocol}//${window.location.host}/api/analyze/live/${encodeURIComponent(sessionId)}`,
+    );
+    socketRef.current = ws;
+    sentRef.current = new Set();
+
+    ws.onopen = () => ws.send(JSON.stringify({ password }));
+    ws.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.ready) {
+        setReady(true);
+      } else if (message.changed) {
+        const update = message as LiveTotalsMessage;
+        setTotals((prev) => applyLiveChanges(prev, update.changed));
+        setTotalItems(update.total_items);
+        setOrdersSelected(update.orders_selected);
+      }
+    };
+    ws.onclose = () => setReady(false);
+
+    return () => {
+      ws.close();
+      socketRef.current = null;
+      setReady(false);
+      setTotals({});
+      setTotalItems(0);
+      setOrdersSelected(0);
+    };
+  }, [password, sessionId]);
+
+  useEffect(() => {
+    const ws = socketRef.current;
+    if (!ready || !ws || !indices) return;
+    const sent = sentRef.current;
+    const add = [...indices].filter((i) => !sent.has(i));
+    const remove = [...sent].filter((i) => !indices.has(i));
+    if (add.length === 0 && remove.length === 0) return;
+    ws.send(JSON.stringify({ add, remove }));
+    sentRef.current = new Set(indices);
+  }, [ready, indices]);
+
+  return { ready, totals, totalItems, ordersSelected };
+}
@@ -1,6 +1,7 @@
-import { useState, useEffect, useRef } from "react";
+import { useState, useEffect, useMemo, useRef } from "react";
 import type { OrderItem, SortedItem, AnalyzeResponse } from "../types";
-import { analyzeOrders } from "../api";
+import { analyzeOrders, analyzeSessionOrders } from "../api";
+import { liveAnalysis, useLiveTotals } from "../hooks/useLiveTotals";
 import OrderTable from "../components/OrderTable";
 import AnalysisResults from "../components/AnalysisResults";
 import Spinner from "../components/Spinner";
@@ -13,11 +14,13 @@ interface AnalyzePageProps {
   showLabel?: boolean;
   onToggleLabel?: () => void;
   foodColumnLabels?: Record<string, string>;
+  sessionId?: string | null;
 }
 
 export default function AnalyzePage({
   orders,
   password,
+  sessionId,
   onAnalysis,
   groupColors,
   showLabel,
@@ -31,6 +34,21 @@ export default function AnalyzePage({
   const [showSuccess, setShowSuccess] = useState(false);
   const successTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
 
+  // Live totals cover session orders only; pause while an edited or added order is selected
+  const liveIndices = useMemo(
+    () => (orders.some((o) => o.isManual && selected.has(o.index)) ? null : selected),
+    [orders, selected],
+  );
+  const live = useLiveTotals(password, sessionId, liveIndices);
+  const liveActive = live.ready && liveIndices !== null && selected.size > 0;
+  // While live totals follow the selection they fill the results pane; Analyze still
+  // confirms the selection for labels, and covers selections with edited orders
+  const liveResults = useMemo(
+    () => (liveActive ? liveAnalysis(live.totals, live.totalItems, live.ordersSelected) : null),
+    [liveActive, live.totals, live.totalItems, live.ordersSelected],
+  );
+  const shownResults = liveResults ?? results;
+
   useEffect(() => {
     return () => { if (successTimerRef.current) clearTimeout(successTimerRef.current); };
   }, []);
@@ -38,14 +56,16 @@ export default function AnalyzePage({
   const handleAnalyze = async () => {
     if (selected.size === 0) return;
 
-    const selectedOrders = orders
-      .filter((o) => selected.has(o.index))
-      .map((o) => o.item_quantities);
+    const selectedOrders = orders.filter((o) => selected.has(o.index));
 
     setLoading(true);
     setError(null);
     try {
-      const data = await analyzeOrders(password, selectedOrders);
+      // Unedited upload orders are on the server already; only their indices need sending
+      const data =
+        sessionId && selectedOrders.every((o) => !o.isManual)
+          ? await analyzeSessionOrders(password, sessionId, selectedOrders.map((o) => o.index))
+          : await analyzeOrders(password, selectedOrders.map((o) => o.item_quantities));
       setResults(data);
       onAnalysis(data.sorted_items);
       setShowSuccess(true);
@@ -83,6 +103,9 @@ export default function AnalyzePage({
               {showSuccess && (
                 <span className="animate-success-flash text-sm text-green-700">Done!</span>
               )}
+              {liveActive && (
+                <span className="text-sm text-gray-500">{live.totalItems} items</span>
+              )}
               <button
                 onClick={handleAnalyze}
                 disabled={selected.size === 0 || loading}
@@ -97,8 +120,8 @@ export default function AnalyzePage({
 
       {/* Right: results */}
       <div>
-        {results ? (
-          <AnalysisResults data={results} foodColumnLabels={foodColumnLabels} />
+        {shownResults ? (
+          <AnalysisResults data={shownResults} foodColumnLabels={foodColumnLabels} />
         ) : (
           <div className="bg-rose-50 rounded-lg shadow-md p-8 text-center text-gray-400">
             Select orders and click Analyze to see results
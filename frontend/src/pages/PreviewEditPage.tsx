@@ -1,5 +1,5 @@
 import { Fragment, useEffect, useRef, useState } from "react";
-import type { MenuItem, OrderItem, UploadResponse } from "../types";
+import type { BatchUploadResponse, MenuItem, OrderItem, UploadResponse } from "../types";
 import { fetchMenu } from "../api";
 import DiscrepancyWarning from "../components/DiscrepancyWarning";
 import AddOrderForm from "../components/AddOrderForm";
@@ -157,7 +157,10 @@ export default function PreviewEditPage({
       <div className="animate-success-flash text-sm text-green-700 bg-green-50 border border-green-200 rounded-lg px-4 py-2 text-center pointer-events-none">
         File processed — {orders.length} order{orders.length !== 1 ? "s" : ""} loaded
       </div>
-      <DiscrepancyWarning discrepancies={uploadData.discrepancies} />
+      <DiscrepancyWarning
+        discrepancies={uploadData.discrepancies}
+        files={"files" in uploadData ? (uploadData as BatchUploadResponse).files : undefined}
+      />
 
       {/* Header */}
       <div className="flex items-center justify-between">
@@ -1,6 +1,6 @@
 import { useState } from "react";
 import type { OrderItem, RouteResponse } from "../types";
-import { routeOrders } from "../api";
+import { routeOrders, routeSessionOrders } from "../api";
 import OrderTable from "../components/OrderTable";
 import Spinner from "../components/Spinner";
 
@@ -28,9 +28,10 @@ interface RoutingPageProps {
   showLabel?: boolean;
   onToggleLabel?: () => void;
   foodColumnLabels?: Record<string, string>;
+  sessionId?: string | null;
 }
 
-export default function RoutingPage({ orders, password, groupColors, showLabel, onToggleLabel, foodColumnLabels }: RoutingPageProps) {
+export default function RoutingPage({ orders, password, groupColors, showLabel, onToggleLabel, foodColumnLabels, sessionId }: RoutingPageProps) {
   const [selected, setSelected] = useState<Set<number>>(new Set());
   const [startAddress, setStartAddress] = useState(DEFAULT_START_ADDRESS);
   const [routeResult, setRouteResult] = useState<RouteResponse | null>(null);
@@ -46,15 +47,14 @@ export default function RoutingPage({ orders, password, groupColors, showLabel,
       return;
     }
 
-    const selectedOrders = orders
-      .filter((o) => selected.has(o.index))
-      .map((o) => ({
-        index: o.index,
-        customer: o.customer,
-        address: o.address,
-        city: o.city,
-        zip_code: o.zip_code,
-      }));
+    const picked = orders.filter((o) => selected.has(o.index));
+    const selectedOrders = picked.map((o) => ({
+      index: o.index,
+      customer: o.customer,
+      address: o.address,
+      city: o.city,
+      zip_code: o.zip_code,
+    }));
 
     const [depH, depM] = startTime.split(":").map(Number);
     const now = new Date();
@@ -67,12 +67,11 @@ export default function RoutingPage({ orders, password, groupColors, showLabel,
     setLoading(true);
     setError(null);
     try {
-      const data = await routeOrders(
-        password,
-        selectedOrders,
-        startAddress.trim(),
-        departureTime,
-      );
+      // Unedited upload orders are on the server already; only their indices need sending
+      const data =
+        sessionId && picked.every((o) => !o.isManual)
+          ? await routeSessionOrders(password, sessionId, picked.map((o) => o.index), startAddress.trim(), departureTime)
+          : await routeOrders(password, selectedOrders, startAddress.trim(), departureTime);
       setRouteResult(data);
     } catch (e) {
       setError(e instanceof Error ? e.message : "Routing failed");
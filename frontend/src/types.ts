@@ -22,10 +22,67 @@ export interface UploadResponse {
   orders: OrderItem[];
   discrepancies: Discrepancy[];
   food_columns: string[];
+  format: "raw" | "formatted" | "mixed";
+  food_column_labels: Record<string, string>;
+  upload_id?: string | null;
+  /** Server-side copy of the parsed orders; analyze/route/labels accept it plus order indices */
+  session_id?: string | null;
+}
+
+export interface ColumnarUploadResponse {
+  orders: {
+    index: number[];
+    delivery: string[];
+    customer: string[];
+    phone_number: string[];
+    address: string[];
+    city: string[];
+    zip_code: string[];
+    items_ordered: string[] | null;
+  };
+  quantities: { order: number[]; item: number[]; quantity: number[] };
+  menu_ids: number[];
+  discrepancies: Discrepancy[];
+  food_columns: string[];
+  format: "raw" | "formatted" | "mixed";
+  food_column_labels: Record<string, string>;
+  upload_id?: string | null;
+  /** Server-side copy of the parsed orders; analyze/route/labels accept it plus order indices */
+  session_id?: string | null;
+}
+
+export interface UploadDeltaResponse {
+  upload_id: string;
+  session_id?: string | null;
+  previous_upload_id: string;
+  total_orders: number;
+  previous_index: (number | null)[];
+  added: OrderItem[];
+  changed: OrderItem[];
+  removed: number[];
+  discrepancies: Discrepancy[];
+  food_columns: string[];
   format: "raw" | "formatted";
   food_column_labels: Record<string, string>;
 }
 
+export interface BatchFileResult {
+  filename: string;
+  format: "raw" | "formatted";
+  orders: number;
+  duplicates: number;
+  order_indices: number[];
+  discrepancies: Discrepancy[];
+}
+
+export interface BatchUploadResponse extends UploadResponse {
+  files: BatchFileResult[];
+}
+
+export interface ColumnarBatchUploadResponse extends ColumnarUploadResponse {
+  files: BatchFileResult[];
+}
+
 export interface MenuItem {
   id: number;
   item_zh: string;
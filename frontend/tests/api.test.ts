@@ -0,0 +1,129 @@
+import { describe, it, expect } from "vitest";
+import { applyUploadDelta, decodeColumnarUpload } from "../src/api";
+import type { ColumnarUploadResponse, OrderItem, UploadDeltaResponse } from "../src/types";
+
+const columnar: ColumnarUploadResponse = {
+  orders: {
+    index: [0, 1],
+    delivery: ["1", "2"],
+    customer: ["张三", "李四"],
+    phone_number: ["111", "222"],
+    address: ["123 Main St", "456 Oak Ave"],
+    city: ["Fremont", "Hayward"],
+    zip_code: ["94536", "94541"],
+    items_ordered: null,
+  },
+  quantities: { order: [0, 0, 1], item: [1, 2, 1], quantity: [3, 2, 1] },
+  menu_ids: [1, 2],
+  discrepancies: [],
+  food_columns: ["烧卖", "馄饨"],
+  format: "raw",
+  food_column_labels: { 烧卖: "烧卖", 馄饨: "馄饨" },
+};
+
+describe("decodeColumnarUpload", () => {
+  it("rebuilds one OrderItem per order", () => {
+    const data = decodeColumnarUpload(columnar);
+    expect(data.orders).toHaveLength(2);
+    expect(data.orders[1]).toEqual({
+      index: 1,
+      delivery: "2",
+      customer: "李四",
+      items_ordered: "",
+      phone_number: "222",
+      address: "456 Oak Ave",
+      city: "Hayward",
+      zip_code: "94541",
+      item_quantities: { 烧卖: 1 },
+    });
+  });
+
+  it("maps menu ids back to item names", () => {
+    const data = decodeColumnarUpload(columnar);
+    expect(data.orders[0].item_quantities).toEqual({ 烧卖: 3, 馄饨: 2 });
+    expect(data.food_columns).toEqual(["烧卖", "馄饨"]);
+  });
+
+  it("keeps raw text when the server includes it", () => {
+    const data = decodeColumnarUpload({
+      ...columnar,
+      orders: { ...columnar.orders, items_ordered: ["烧卖x3", "烧卖x1"] },
+    });
+    expect(data.orders[0].items_ordered).toBe("烧卖x3");
+  });
+});
+
+describe("applyUploadDelta", () => {
+  const order = (index: number, customer: string, extra: Partial<OrderItem> = {}): OrderItem => ({
+    index,
+    delivery: String(index + 1),
+    customer,
+    items_ordered: "",
+    phone_number: "",
+    address: "",
+    city: "",
+    zip_code: "",
+    item_quantities: { 烧卖: 1 },
+    ...extra,
+  });
+
+  const delta: UploadDeltaResponse = {
+    upload_id: "new",
+    previous_upload_id: "old",
+    total_orders: 3,
+    previous_index: [0, 2, null],
+    added: [order(2, "王五")],
+    changed: [order(1, "李四", { item_quantities: { 烧卖: 4 } })],
+    removed: [1],
+    discrepancies: [],
+    food_columns: ["烧卖"],
+    format: "raw",
+    food_column_labels: {},
+  };
+
+  it("keeps local state of unchanged and changed orders", () => {
+    const orders = [
+      order(0, "张三", { group: "A", delivery: "edited" }),
+      order(1, "赵六", { group: "B" }),
+      order(2, "李四", { group: "C" }),
+      order(3, "手动", { isManual: true }),
+    ];
+    const next = applyUploadDelta(orders, delta);
+
+    expect(next.map((o) => [o.index, o.customer, o.group])).toEqual([
+      [0, "张三", "A"],
+      [1, "李四", "C"],
+      [2, "王五", undefined],
+      [3, "手动", undefined],
+    ]);
+    expect(next[0].delivery).toBe("edited");
+    expect(next[1].item_quantities).toEqual({ 烧卖: 4 });
+  });
+
+  it("keeps an uploaded order edited in PreviewEditPage once, in place", () => {
+    const orders = [
+      order(0, "张三改", { group: "A", isManual: true }),
+      order(1, "赵六", { group: "B" }),
+      order(2, "李四", { group: "C" }),
+    ];
+    const next = applyUploadDelta(orders, delta);
+
+    expect(next.map((o) => [o.index, o.customer])).toEqual([
+      [0, "张三改"],
+      [1, "李四"],
+      [2, "王五"],
+    ]);
+    expect(next[0].isManual).toBe(true);
+  });
+
+  it("keeps unchanged orders deleted locally out", () => {
+    const orders = [order(1, "赵六", { group: "B" }), order(2, "李四", { group: "C" })];
+    const next = applyUploadDelta(orders, delta);
+
+    expect(next.map((o) => [o.index, o.customer])).toEqual([
+      [1, "李四"],
+      [2, "王五"],
+    ]);
+    expect(next.every((o) => o.customer)).toBe(true);
+  });
+});
@@ -0,0 +1,31 @@
+import { render, screen } from "@testing-library/react";
+import userEvent from "@testing-library/user-event";
+import { describe, it, expect } from "vitest";
+import DiscrepancyWarning from "../../src/components/DiscrepancyWarning";
+import type { BatchFileResult } from "../../src/types";
+
+const file = (filename: string, parsed: number, expected: number): BatchFileResult => ({
+  filename,
+  format: "raw",
+  orders: 1,
+  duplicates: 0,
+  order_indices: [0],
+  discrepancies: [{ food_item: "韭菜猪肉水饺", parsed_total: parsed, expected_total: expected }],
+});
+
+describe("DiscrepancyWarning", () => {
+  it("renders nothing without discrepancies", () => {
+    const { container } = render(<DiscrepancyWarning discrepancies={[]} />);
+    expect(container).toBeEmptyDOMElement();
+  });
+
+  it("points to per-file mismatches that cancel out in the combined totals", async () => {
+    render(<DiscrepancyWarning discrepancies={[]} files={[file("a.xlsx", 2, 3), file("b.xlsx", 4, 3)]} />);
+
+    await userEvent.click(screen.getByRole("button", { name: /Discrepancies in 2 files/ }));
+
+    expect(screen.getByText("a.xlsx")).toBeInTheDocument();
+    expect(screen.getByText("b.xlsx")).toBeInTheDocument();
+    expect(screen.getAllByText("韭菜猪肉水饺")).toHaveLength(2);
+  });
+});
@@ -0,0 +1,49 @@
+import { render, screen, waitFor } from "@testing-library/react";
+import userEvent from "@testing-library/user-event";
+import { describe, it, expect, vi, beforeEach } from "vitest";
+import ReuploadButton from "../../src/components/ReuploadButton";
+import { uploadDelta } from "../../src/api";
+import type { UploadDeltaResponse } from "../../src/types";
+
+vi.mock("../../src/api", () => ({ uploadDelta: vi.fn() }));
+
+const delta: UploadDeltaResponse = {
+  upload_id: "new",
+  previous_upload_id: "old",
+  total_orders: 0,
+  previous_index: [],
+  added: [],
+  changed: [],
+  removed: [],
+  discrepancies: [],
+  food_columns: [],
+  format: "raw",
+  food_column_labels: {},
+};
+
+describe("ReuploadButton", () => {
+  beforeEach(() => {
+    vi.mocked(uploadDelta).mockReset();
+  });
+
+  it("sends the chosen file as a delta of the previous upload", async () => {
+    vi.mocked(uploadDelta).mockResolvedValue(delta);
+    const onDelta = vi.fn();
+    const { container } = render(<ReuploadButton password="pw" previousUploadId="old" onDelta={onDelta} />);
+
+    const file = new File(["xlsx"], "export.xlsx");
+    await userEvent.upload(container.querySelector("input[type=file]") as HTMLInputElement, file);
+
+    await waitFor(() => expect(onDelta).toHaveBeenCalledWith(delta));
+    expect(uploadDelta).toHaveBeenCalledWith("pw", file, "old");
+  });
+
+  it("shows why a delta was refused", async () => {
+    vi.mocked(uploadDelta).mockRejectedValue(new Error("Previous upload not found, please upload the full file"));
+    const { container } = render(<ReuploadButton password="pw" previousUploadId="old" onDelta={() => {}} />);
+
+    await userEvent.upload(container.querySelector("input[type=file]") as HTMLInputElement, new File([""], "a.xlsx"));
+
+    expect(await screen.findByText(/Previous upload not found/)).toBeInTheDocument();
+  });
+});
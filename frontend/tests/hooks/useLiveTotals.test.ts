@@ -0,0 +1,24 @@
+import { describe, it, expect } from "vitest";
+import { applyLiveChanges, liveAnalysis } from "../../src/hooks/useLiveTotals";
+
+describe("applyLiveChanges", () => {
+  it("updates changed items and drops those back at zero", () => {
+    const totals = { 烧卖: 3, 馄饨: 2 };
+    expect(applyLiveChanges(totals, { 烧卖: 0, 素鸭: 4 })).toEqual({ 馄饨: 2, 素鸭: 4 });
+    expect(totals).toEqual({ 烧卖: 3, 馄饨: 2 });
+  });
+});
+
+describe("liveAnalysis", () => {
+  it("lists the live totals most ordered first", () => {
+    expect(liveAnalysis({ 馄饨: 2, 烧卖: 5, 素鸭: 3 }, 10, 3)).toEqual({
+      sorted_items: [
+        { item_name: "烧卖", quantity: 5 },
+        { item_name: "素鸭", quantity: 3 },
+        { item_name: "馄饨", quantity: 2 },
+      ],
+      total_items: 10,
+      orders_analyzed: 3,
+    });
+  });
+});